@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flask_cors import CORS
 from pymongo import MongoClient
@@ -8,35 +9,82 @@ mongo_client = None
 db = None
 
 
+def connect_mongo(event_listeners):
+    """
+    Create the MongoDB client without waiting for the server
+    pymongo connects in the background, so worker boot never blocks on
+    MongoDB; whether it is reachable is tracked by the ConnectionMonitor
+    Args:
+        event_listeners: pymongo event listeners for the client
+    """
+    global mongo_client, db
+    mongo_client = MongoClient(
+        Config.MONGODB_URI,
+        serverSelectionTimeoutMS=5000,  # 5 second timeout
+        connectTimeoutMS=10000,  # 10 second connection timeout
+        socketTimeoutMS=20000,  # 20 second socket timeout
+        event_listeners=event_listeners
+    )
+    db = mongo_client[Config.MONGODB_DB_NAME]
+
+
 def create_app():
     """Create and configure the Flask application"""
+    from app.utils.health import ColdStartTimer
+    cold_start = ColdStartTimer()
+    
     app = Flask(__name__)
     app.config.from_object(Config)
     app.secret_key = Config.SECRET_KEY
     
+    # Encode ObjectId/datetime directly so models can hand documents to jsonify
+    from app.utils.json_provider import install_json_provider
+    install_json_provider(app, Config.JSON_PROVIDER)
+    
     # Enable CORS
     CORS(app)
     
-    # Initialize MongoDB connection with timeout and error handling
-    global mongo_client, db
-    try:
-        # Set connection timeout to avoid blocking workers
-        mongo_client = MongoClient(
-            Config.MONGODB_URI,
-            serverSelectionTimeoutMS=5000,  # 5 second timeout
-            connectTimeoutMS=10000,  # 10 second connection timeout
-            socketTimeoutMS=20000  # 20 second socket timeout
-        )
-        # Test the connection
-        mongo_client.admin.command('ping')
-        db = mongo_client[Config.MONGODB_DB_NAME]
-        print(f"✓ Connected to MongoDB: {Config.MONGODB_DB_NAME}")
-    except Exception as e:
-        print(f"⚠ Warning: MongoDB connection failed: {str(e)}")
-        print("⚠ The app will start but database operations will fail until MongoDB is available")
-        # Create a dummy client to prevent errors
-        mongo_client = None
-        db = None
+    # Request and MongoDB metrics, exposed at /metrics
+    event_listeners = []
+    if Config.METRICS_ENABLED:
+        from app.utils.metrics import instrument_app, mongo_event_listeners
+        instrument_app(app)
+        event_listeners = mongo_event_listeners()
+    
+    # Opt-in request profiling (collapsed stacks plus Mongo calls per request)
+    if Config.PROFILING_SAMPLE_RATE > 0 or Config.PROFILING_TOKEN:
+        from app.utils.profiling import MongoCallRecorder, RequestProfiler, install_profiler
+        install_profiler(app, RequestProfiler(
+            Config.PROFILING_DIR,
+            sample_rate=Config.PROFILING_SAMPLE_RATE,
+            token=Config.PROFILING_TOKEN,
+            interval=Config.PROFILING_INTERVAL_MS / 1000
+        ))
+        event_listeners.append(MongoCallRecorder())
+    
+    # Initialize the storage backend (MongoDB unless STORAGE_BACKEND=memory)
+    from app.storage import MemoryStorage, MongoStorage, set_storage
+    if Config.STORAGE_BACKEND == 'memory':
+        set_storage(MemoryStorage(seed=Config.MEMORY_STORAGE_SEED))
+        print("✓ Using in-memory storage (data is lost when the process exits)")
+    else:
+        connect_mongo(event_listeners)
+        breaker = None
+        if Config.CIRCUIT_BREAKER_ENABLED:
+            from app.storage.circuit_breaker import CircuitBreaker
+            breaker = CircuitBreaker(
+                failure_rate=Config.CIRCUIT_BREAKER_FAILURE_RATE,
+                minimum_calls=Config.CIRCUIT_BREAKER_MINIMUM_CALLS,
+                window=Config.CIRCUIT_BREAKER_WINDOW_CALLS,
+                open_seconds=Config.CIRCUIT_BREAKER_OPEN_SECONDS,
+                half_open_calls=Config.CIRCUIT_BREAKER_HALF_OPEN_CALLS
+            )
+        set_storage(MongoStorage(db, breaker=breaker))
+    
+    # Per-request time budget, passed to MongoDB as the operation timeout
+    if Config.REQUEST_DEADLINE_MS > 0:
+        from app.utils.deadline import install_deadline
+        install_deadline(app, Config.REQUEST_DEADLINE_MS / 1000)
     
     # Register blueprints
     from app.routes.auth import auth_bp
@@ -49,10 +97,65 @@ def create_app():
     app.register_blueprint(playlist_bp, url_prefix='/api/playlist')
     app.register_blueprint(discover_bp, url_prefix='/api/discover')
     
-    @app.route('/')
-    def health_check():
-        return {'status': 'ok', 'message': 'Heartbeat Dating App Backend API'}, 200
+    # Register CLI commands (flask db ensure-indexes / flask db audit-indexes)
+    from app.cli import register_commands
+    register_commands(app)
+    
+    # Create model indexes so lookups do not fall back to collection scans
+    # (the in-memory store always needs them: they carry its unique constraints)
+    from app.utils.db_indexes import ensure_indexes
+    if Config.STORAGE_BACKEND == 'memory':
+        ensure_indexes()
+    else:
+        # Watch MongoDB in the background; indexes are created once it is reachable
+        from app.storage import get_storage
+        from app.utils.health import ConnectionMonitor
+        on_connect = [ensure_indexes] if Config.MONGODB_ENSURE_INDEXES else []
+        app.extensions['connection_monitor'] = ConnectionMonitor(
+            get_storage(),
+            interval=Config.MONGODB_MONITOR_INTERVAL_SECONDS,
+            timeout=Config.READINESS_TIMEOUT_MS / 1000,
+            on_connect=on_connect
+        )
+        app.extensions['connection_monitor'].start()
+    
+    # Memory-map the MinHash LSH index built by `flask db build-minhash-index`
+    from app.utils.minhash import IndexRefresher, get_index, load_index
+    get_index().max_overlay = Config.MINHASH_OVERLAY_MAX_SIZE
+    if Config.MINHASH_INDEX_PATH and os.path.exists(Config.MINHASH_INDEX_PATH):
+        try:
+            count = load_index(Config.MINHASH_INDEX_PATH, max_overlay=Config.MINHASH_OVERLAY_MAX_SIZE)
+            print(f"✓ Loaded MinHash index: {count} users")
+        except Exception as e:
+            print(f"⚠ Warning: Failed to load MinHash index: {str(e)}")
+    
+    # Share playlist updates between workers and pick up rebuilt index files
+    if Config.MINHASH_INDEX_PATH and Config.MINHASH_REFRESH_SECONDS > 0:
+        from app.models import Playlist
+        app.extensions['minhash_refresher'] = IndexRefresher(
+            Config.MINHASH_INDEX_PATH,
+            Playlist.find_updated_since,
+            interval=Config.MINHASH_REFRESH_SECONDS,
+            max_overlay=Config.MINHASH_OVERLAY_MAX_SIZE
+        )
+        app.extensions['minhash_refresher'].start()
+    
+    # Liveness (/healthz) and dependency-aware readiness (/readyz)
+    from app.utils.health import ReadinessCheck, install_health_routes, storage_check
+    readiness = ReadinessCheck(
+        {'database': storage_check(Config.READINESS_TIMEOUT_MS / 1000)},
+        ttl=Config.READINESS_CACHE_SECONDS
+    )
+    install_health_routes(app, readiness, cold_start)
+    
+    if Config.METRICS_ENABLED:
+        @app.route('/metrics')
+        def metrics():
+            from app.utils.metrics import render_metrics
+            body, content_type = render_metrics()
+            return body, 200, {'Content-Type': content_type}
     
+    cold_start.app_ready()
     return app
 
 
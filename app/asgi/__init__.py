@@ -0,0 +1,100 @@
+"""
+Async (ASGI) serving mode
+
+Read-heavy endpoints are served natively by a Quart app backed by motor, so
+one process can keep hundreds of requests waiting on MongoDB at once:
+    GET /api/profile, GET /api/playlist, GET /api/discover/matches and
+    GET /api/discover/matches/stream
+Every other route (auth, profile and playlist writes, discover, swipes,
+health checks, metrics) falls through to the existing Flask app, run
+synchronously on a pool of ASGI_WSGI_THREADS threads by a2wsgi. Each of those
+requests holds a thread until it finishes, and they queue once all threads
+are busy, so this mode is partial: it only frees the routes listed above.
+
+Run with:
+    uvicorn app.asgi:asgi_app --host 0.0.0.0 --port 5001
+"""
+from quart import Quart
+from a2wsgi import WSGIMiddleware
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+from app.config import Config
+from app.utils.json_provider import install_json_provider
+
+
+class RouteDispatcher:
+    """ASGI app that sends requests matching the async app's routes to it and
+    everything else to the WSGI app"""
+    
+    def __init__(self, async_app, wsgi_app):
+        self.async_app = async_app
+        self.wsgi_app = WSGIMiddleware(wsgi_app, workers=Config.ASGI_WSGI_THREADS)
+        self._adapter = async_app.url_map.bind('')
+    
+    def _is_async_route(self, scope):
+        # CORS preflights stay with flask-cors on the WSGI side
+        if scope['method'] == 'OPTIONS':
+            return False
+        try:
+            self._adapter.match(scope['path'], method=scope['method'])
+        except (HTTPException, RequestRedirect):
+            return False
+        return True
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and not self._is_async_route(scope):
+            return await self.wsgi_app(scope, receive, send)
+        # Lifespan events go to Quart, which runs its startup/shutdown hooks
+        return await self.async_app(scope, receive, send)
+
+
+def create_asgi_app():
+    """Create the ASGI application (async routes plus the Flask app as fallback)"""
+    from app import app as flask_app
+    from app.asgi.routes import async_bp
+    
+    quart_app = Quart(__name__)
+    quart_app.config.from_object(Config)
+    install_json_provider(quart_app, Config.JSON_PROVIDER)
+    quart_app.register_blueprint(async_bp, url_prefix='/api')
+    
+    @quart_app.after_request
+    async def add_cors_headers(response):
+        response.headers.setdefault('Access-Control-Allow-Origin', '*')
+        return response
+    
+    if Config.REQUEST_DEADLINE_MS > 0:
+        from app.utils.deadline import install_deadline_async
+        install_deadline_async(quart_app, Config.REQUEST_DEADLINE_MS / 1000)
+    
+    if Config.METRICS_ENABLED:
+        from quart import g, request
+        from app.utils.metrics import start_request, finish_request, route_label
+        
+        @quart_app.before_request
+        async def start_request_timer():
+            route = route_label(request)
+            g.metrics_request = (request.method, route, start_request(request.method, route))
+        
+        @quart_app.after_request
+        async def record_response_status(response):
+            g.metrics_status = response.status_code
+            return response
+        
+        @quart_app.teardown_request
+        async def finish_request_timer(error=None):
+            started = g.pop('metrics_request', None)
+            if started:
+                method, route, start = started
+                finish_request(start, method, route, g.pop('metrics_status', 500))
+    
+    @quart_app.after_serving
+    async def close_async_client():
+        from app.asgi import models
+        if models.async_client is not None:
+            models.async_client.close()
+    
+    return RouteDispatcher(quart_app, flask_app)
+
+
+asgi_app = create_asgi_app()
@@ -0,0 +1,179 @@
+import asyncio
+from app.asgi.models import AsyncUser, AsyncPlaylist, AsyncMatch
+from app.config import Config
+from app.models.user import User
+from app.models.playlist import Playlist
+from app.controllers.discover_controller import (
+    parse_match_cursors,
+    matched_user_ids_for,
+    build_matches_response,
+    matches_etag,
+    match_event_message
+)
+from app.utils.match_events import get_match_events
+from app.utils.pagination import decode_cursor
+from app.utils.etag import compute_etag
+from app.utils.errors import failure_response
+
+
+async def get_user_profile(user_id):
+    """
+    Get user profile by ID
+    Args:
+        user_id: User ID string
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    user = await AsyncUser.find_card_by_id(user_id, raw=Config.MONGODB_RAW_READS)
+    if not user:
+        return {'error': 'User not found', 'status_code': 404}, 404
+    
+    return User.to_dict(user), 200
+
+
+async def get_user_playlist(user_id):
+    """
+    Get user's playlist
+    Args:
+        user_id: User ID string
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    # Verify user exists
+    if not await AsyncUser.exists(user_id):
+        return {'error': 'User not found', 'status_code': 404}, 404
+    
+    playlist = await AsyncPlaylist.find_by_user_id(user_id, raw=Config.MONGODB_RAW_READS)
+    if not playlist:
+        return {'error': 'Playlist not found', 'status_code': 404}, 404
+    
+    return Playlist.to_dict(playlist), 200
+
+
+async def get_user_matches(current_user_id, limit, cursor=None, since=None):
+    """
+    Get one page of matches for the current user with matched user information
+    Args:
+        current_user_id: Current user ID string
+        limit: Maximum number of matches to return
+        cursor: Optional cursor from a previous page's next_cursor (older matches)
+        since: Optional cursor from a previous sync_cursor (only newer matches)
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    before, after, error = parse_match_cursors(cursor, since)
+    if error:
+        return error
+    
+    if not await AsyncUser.exists(current_user_id):
+        return {'error': 'User not found', 'status_code': 404}, 404
+    
+    try:
+        matches, has_more = await AsyncMatch.find_page_by_user(
+            current_user_id,
+            limit,
+            before=before,
+            after=after,
+            raw=Config.MONGODB_RAW_READS
+        )
+        matched_users = await AsyncUser.find_by_ids(
+            matched_user_ids_for(current_user_id, matches),
+            raw=Config.MONGODB_RAW_READS
+        )
+        return build_matches_response(current_user_id, matches, has_more, matched_users, cursor, since), 200
+    except Exception as e:
+        return failure_response(e, 'Failed to get matches')
+
+
+async def get_profile_etag(user_id):
+    """
+    Compute the ETag of a user's profile from its updated_at (uncached projected read)
+    Args:
+        user_id: User ID string
+    Returns:
+        ETag string or None if the user does not exist
+    """
+    user = await AsyncUser.find_version(user_id)
+    if not user:
+        return None
+    return compute_etag('profile', user['_id'], user.get('updated_at'))
+
+
+async def get_playlist_etag(user_id):
+    """
+    Compute the ETag of a user's playlist from its updated_at (projected read)
+    Args:
+        user_id: User ID string
+    Returns:
+        ETag string or None if the user has no playlist
+    """
+    playlist = await AsyncPlaylist.find_version(user_id)
+    if not playlist:
+        return None
+    return compute_etag('playlist', playlist['_id'], playlist.get('updated_at'))
+
+
+async def get_matches_etag(current_user_id, limit, cursor=None, since=None):
+    """
+    Compute the ETag of a matches listing from the match count and the latest match
+    Args:
+        current_user_id: Current user ID string
+        limit: Page size
+        cursor: cursor query parameter
+        since: since query parameter
+    Returns:
+        ETag string or None if the user does not exist
+    """
+    if not await AsyncUser.exists(current_user_id):
+        return None
+    count, latest = await AsyncMatch.version_for_user(current_user_id)
+    return matches_etag(current_user_id, count, latest, limit, cursor, since)
+
+
+async def stream_match_events(current_user_id, dumps, last_event_id=None):
+    """
+    Generate the Server-Sent Events stream of a user's new matches
+    Events published from other threads are handed to this event loop
+    Args:
+        current_user_id: Current user ID string
+        dumps: JSON encoder of the app (current_app.json.dumps)
+        last_event_id: Optional Last-Event-ID header of a reconnecting client
+    Yields:
+        SSE message strings
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    
+    def deliver(match):
+        loop.call_soon_threadsafe(events.put_nowait, match)
+    
+    # Subscribe before replaying so that no match falls between the two
+    unsubscribe = get_match_events().subscribe(current_user_id, deliver)
+    try:
+        yield 'retry: 5000\n\n'
+        
+        replayed = set()
+        after = decode_cursor(last_event_id) if last_event_id else None
+        if after:
+            matches, _ = await AsyncMatch.find_page_by_user(current_user_id, Config.MATCHES_MAX_PAGE_SIZE, after=after)
+            matched_user_ids = matched_user_ids_for(current_user_id, matches)
+            matched_users = await AsyncUser.find_by_ids(matched_user_ids)
+            for match, matched_user_id in zip(matches, matched_user_ids):
+                replayed.add(match['_id'])
+                if matched_user_id in matched_users:
+                    yield match_event_message(current_user_id, match, matched_users[matched_user_id], dumps)
+        
+        while True:
+            try:
+                match = await asyncio.wait_for(events.get(), timeout=Config.MATCH_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if match['_id'] in replayed:
+                continue
+            matched_user_id = matched_user_ids_for(current_user_id, [match])[0]
+            matched_user = await AsyncUser.find_card_by_id(matched_user_id)
+            if matched_user:
+                yield match_event_message(current_user_id, match, matched_user, dumps)
+    finally:
+        unsubscribe()
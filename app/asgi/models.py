@@ -0,0 +1,291 @@
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import Config
+from app.storage import MemoryStorage, get_storage
+from app.models.user import User, apply_projection
+from app.models.playlist import Playlist
+from app.models.match import Match
+from app.utils.raw_bson import raw_collection
+
+# Created lazily inside the running event loop (motor binds to the loop of first use)
+async_client = None
+
+
+class AsyncMemoryCursor:
+    """Awaitable view of a MemoryCursor with the motor cursor methods the async models use"""
+    
+    def __init__(self, cursor):
+        self._cursor = cursor
+    
+    def sort(self, key_or_list, direction=None):
+        self._cursor.sort(key_or_list, direction)
+        return self
+    
+    def limit(self, limit):
+        self._cursor.limit(limit)
+        return self
+    
+    async def to_list(self, length=None):
+        documents = list(self._cursor)
+        return documents[:length] if length else documents
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncMemoryCollection:
+    """
+    Awaitable view of a MemoryCollection, so the async routes read the same
+    in-process store as the Flask ones when STORAGE_BACKEND=memory (the
+    store does no I/O, so calls run inline on the event loop)
+    """
+    
+    def __init__(self, collection):
+        self._collection = collection
+        self.codec_options = collection.codec_options
+    
+    def with_options(self, **kwargs):
+        return self
+    
+    def find(self, *args, **kwargs):
+        return AsyncMemoryCursor(self._collection.find(*args, **kwargs))
+    
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+        
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncMemoryDatabase:
+    """Database handle over a MemoryStorage returning AsyncMemoryCollections"""
+    
+    def __init__(self, storage):
+        self._storage = storage
+    
+    def __getitem__(self, name):
+        return AsyncMemoryCollection(self._storage.collection(name))
+
+
+def get_async_db():
+    """
+    Get the motor database handle, creating the client on first use
+    With STORAGE_BACKEND=memory, returns an awaitable view of the in-memory
+    store instead. Fails fast while the circuit breaker of the sync models
+    is open (async calls do not feed the breaker; the Flask routes served by
+    the same process do)
+    """
+    global async_client
+    storage = get_storage()
+    if isinstance(storage, MemoryStorage):
+        return AsyncMemoryDatabase(storage)
+    breaker = getattr(storage, 'breaker', None)
+    if breaker is not None:
+        breaker.check_open()
+    if async_client is None:
+        event_listeners = []
+        if Config.METRICS_ENABLED:
+            from app.utils.metrics import mongo_event_listeners
+            event_listeners = mongo_event_listeners()
+        async_client = AsyncIOMotorClient(
+            Config.MONGODB_URI,
+            serverSelectionTimeoutMS=5000,
+            connectTimeoutMS=10000,
+            socketTimeoutMS=20000,
+            event_listeners=event_listeners
+        )
+    return async_client[Config.MONGODB_DB_NAME]
+
+
+class AsyncUser:
+    """Non-blocking read path of the User model (shares User's cache and documents)"""
+    
+    @staticmethod
+    def get_collection(raw=False):
+        """
+        Get the users collection
+        Args:
+            raw: Return RawBSONDocuments instead of dicts (read-only use)
+        """
+        collection = get_async_db()[User.COLLECTION_NAME]
+        return raw_collection(collection) if raw else collection
+    
+    @staticmethod
+    async def find_by_id(user_id, projection=None, raw=False):
+        """
+        Find user by ID
+        Args:
+            user_id: User ObjectId or string
+            projection: Optional field projection (partial documents are not cached)
+            raw: Return a lazily decoded RawBSONDocument on a cache miss (not cached)
+        Returns:
+            User document or None
+        """
+        cached = User.cache.get(f"id:{user_id}")
+        if cached is not None:
+            return apply_projection(cached, projection)
+        
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        if projection is not None or raw:
+            return await AsyncUser.get_collection(raw=raw).find_one({'_id': user_id}, projection)
+        user = await AsyncUser.get_collection().find_one({'_id': user_id})
+        User._cache_user(user)
+        return dict(user) if user else None
+    
+    @staticmethod
+    async def find_version(user_id):
+        """
+        Read a user's updated_at straight from the database, bypassing the cache
+        (another worker may have updated the user); a cached copy older than it is dropped
+        Args:
+            user_id: User ObjectId or string
+        Returns:
+            Document limited to User.VERSION_PROJECTION or None
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        version = await AsyncUser.get_collection().find_one({'_id': user_id}, User.VERSION_PROJECTION)
+        User._drop_stale(user_id, version)
+        return version
+    
+    @staticmethod
+    async def exists(user_id):
+        """
+        Check that a user exists, reading only its _id
+        Args:
+            user_id: User ObjectId or string
+        Returns:
+            bool
+        """
+        return await AsyncUser.find_by_id(user_id, User.EXISTS_PROJECTION) is not None
+    
+    @staticmethod
+    async def find_card_by_id(user_id, raw=False):
+        """
+        Find the public profile fields of a user (no password hash)
+        Args:
+            user_id: User ObjectId or string
+            raw: Return a lazily decoded RawBSONDocument on a cache miss
+        Returns:
+            User document limited to User.CARD_PROJECTION or None
+        """
+        return await AsyncUser.find_by_id(user_id, User.CARD_PROJECTION, raw=raw)
+    
+    @staticmethod
+    async def find_by_ids(user_ids, projection=None, raw=False):
+        """
+        Find several users in a single query, excluding the password hash
+        Args:
+            user_ids: Iterable of user ObjectIds or strings
+            projection: Optional field projection (defaults to User.CARD_PROJECTION)
+            raw: Return lazily decoded RawBSONDocuments
+        Returns:
+            dict mapping user ObjectId to user document
+        """
+        object_ids = [ObjectId(user_id) if isinstance(user_id, str) else user_id for user_id in user_ids]
+        if not object_ids:
+            return {}
+        
+        cursor = AsyncUser.get_collection(raw=raw).find({'_id': {'$in': object_ids}}, projection or User.CARD_PROJECTION)
+        return {user['_id']: user async for user in cursor}
+
+
+class AsyncPlaylist:
+    """Non-blocking read path of the Playlist model"""
+    
+    @staticmethod
+    def get_collection(raw=False):
+        """
+        Get the playlists collection
+        Args:
+            raw: Return RawBSONDocuments instead of dicts (read-only use)
+        """
+        collection = get_async_db()[Playlist.COLLECTION_NAME]
+        return raw_collection(collection) if raw else collection
+    
+    @staticmethod
+    async def find_by_user_id(user_id, raw=False, projection=None):
+        """
+        Find playlist by user ID
+        Args:
+            user_id: User ObjectId or string
+            raw: Return a lazily decoded RawBSONDocument
+            projection: Optional field projection
+        Returns:
+            Playlist document or None
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        return await AsyncPlaylist.get_collection(raw=raw).find_one({'user_id': user_id}, projection)
+    
+    @staticmethod
+    async def find_version(user_id):
+        """
+        Read only the fields the playlist ETag is derived from
+        Args:
+            user_id: User ObjectId or string
+        Returns:
+            dict with _id and updated_at, or None
+        """
+        return await AsyncPlaylist.find_by_user_id(user_id, projection={'updated_at': 1})
+
+
+class AsyncMatch:
+    """Non-blocking read path of the Match model"""
+    
+    @staticmethod
+    def get_collection(raw=False):
+        """
+        Get the matches collection
+        Args:
+            raw: Return RawBSONDocuments instead of dicts (read-only use)
+        """
+        collection = get_async_db()[Match.COLLECTION_NAME]
+        return raw_collection(collection) if raw else collection
+    
+    @staticmethod
+    async def version_for_user(user_id):
+        """
+        Get the values the matches ETag is derived from, using only the indexes
+        Args:
+            user_id: User ID (ObjectId or string)
+        Returns:
+            tuple: (match count, latest match dict with _id and created_at, or None)
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        collection = AsyncMatch.get_collection()
+        query = {'$or': [{'user_id_1': user_id}, {'user_id_2': user_id}]}
+        count = await collection.count_documents(query)
+        latest = await collection.find_one(query, {'created_at': 1}, sort=[('created_at', -1), ('_id', -1)])
+        return count, latest
+    
+    @staticmethod
+    async def find_page_by_user(user_id, limit, before=None, after=None, raw=False):
+        """
+        Find one page of matches for a user using keyset pagination
+        Args:
+            user_id: User ID (ObjectId or string)
+            limit: Maximum number of matches to return
+            before: Optional (created_at, _id) position; returns older matches, most recent first
+            after: Optional (created_at, _id) position; returns newer matches, oldest first
+            raw: Return lazily decoded RawBSONDocuments
+        Returns:
+            tuple: (list of match documents, has_more: bool)
+        """
+        query, sort = Match.page_query(user_id, before=before, after=after)
+        
+        # Read one extra document to know whether another page exists
+        cursor = AsyncMatch.get_collection(raw=raw).find(query).sort(sort).limit(limit + 1)
+        matches = await cursor.to_list(length=limit + 1)
+        has_more = len(matches) > limit
+        return matches[:limit], has_more
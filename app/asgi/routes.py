@@ -0,0 +1,116 @@
+from functools import wraps
+from quart import Blueprint, request, jsonify, current_app, make_response
+from app.asgi.controllers import (
+    get_user_profile,
+    get_user_playlist,
+    get_user_matches,
+    get_profile_etag,
+    get_playlist_etag,
+    get_matches_etag,
+    stream_match_events
+)
+from app.config import Config
+from app.middleware.auth_middleware import authenticate
+from app.utils.deadline import no_deadline
+from app.utils.etag import is_not_modified, not_modified_response, set_etag
+from app.utils.pagination import parse_limit
+from app.utils.errors import failure_response, retry_after_headers
+
+async_bp = Blueprint('async_api', __name__)
+
+
+def require_auth_async(f):
+    """
+    Async counterpart of require_auth
+    Adds user_id and user_email to the Quart request context
+    """
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        payload, error = authenticate(request.headers.get('Authorization'))
+        if error:
+            return jsonify(error), error['status_code']
+        
+        request.user_id = payload.get('user_id')
+        request.user_email = payload.get('email')
+        
+        return await f(*args, **kwargs)
+    
+    return decorated_function
+
+
+@async_bp.route('/profile', methods=['GET'])
+@require_auth_async
+async def get_profile():
+    """Get user profile endpoint (honors If-None-Match)"""
+    try:
+        etag = await get_profile_etag(request.user_id)
+        if is_not_modified(request, etag):
+            return not_modified_response(current_app.response_class, etag)
+        
+        response, status_code = await get_user_profile(request.user_id)
+        return set_etag(jsonify(response), etag if status_code == 200 else None), status_code, retry_after_headers(response)
+    except Exception as e:
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
+
+
+@async_bp.route('/playlist', methods=['GET'])
+@require_auth_async
+async def get_playlist():
+    """Get user's playlist endpoint (honors If-None-Match)"""
+    try:
+        etag = await get_playlist_etag(request.user_id)
+        if is_not_modified(request, etag):
+            return not_modified_response(current_app.response_class, etag)
+        
+        response, status_code = await get_user_playlist(request.user_id)
+        return set_etag(jsonify(response), etag if status_code == 200 else None), status_code, retry_after_headers(response)
+    except Exception as e:
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
+
+
+@async_bp.route('/discover/matches', methods=['GET'])
+@require_auth_async
+async def get_matches():
+    """Get user matches endpoint (keyset paginated, or incremental with since; honors If-None-Match)"""
+    try:
+        limit, error = parse_limit(
+            request.args.get('limit'),
+            Config.MATCHES_PAGE_SIZE,
+            Config.MATCHES_MAX_PAGE_SIZE
+        )
+        if error:
+            return jsonify({'error': error, 'status_code': 400}), 400
+        
+        cursor = request.args.get('cursor')
+        since = request.args.get('since')
+        etag = await get_matches_etag(request.user_id, limit, cursor=cursor, since=since)
+        if is_not_modified(request, etag):
+            return not_modified_response(current_app.response_class, etag)
+        
+        response, status_code = await get_user_matches(request.user_id, limit, cursor=cursor, since=since)
+        return set_etag(jsonify(response), etag if status_code == 200 else None), status_code, retry_after_headers(response)
+    except Exception as e:
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
+
+
+@async_bp.route('/discover/matches/stream', methods=['GET'])
+@no_deadline
+@require_auth_async
+async def stream_matches():
+    """Stream new matches as Server-Sent Events (resumes from Last-Event-ID)"""
+    events = stream_match_events(
+        request.user_id,
+        current_app.json.dumps,
+        last_event_id=request.headers.get('Last-Event-ID')
+    )
+    response = await make_response(
+        events,
+        200,
+        {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Long-lived stream: no response timeout
+    response.timeout = None
+    return response
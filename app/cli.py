@@ -0,0 +1,71 @@
+import click
+from flask.cli import AppGroup
+
+db_cli = AppGroup('db', help='MongoDB maintenance commands')
+
+
+@db_cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create the indexes declared by every model"""
+    from app.utils.db_indexes import ensure_indexes
+    
+    for collection_name, index_names in ensure_indexes().items():
+        click.echo(f"✓ {collection_name}: {', '.join(index_names)}")
+
+
+@db_cli.command('audit-indexes')
+def audit_indexes_command():
+    """Explain every model query and fail if any of them does a COLLSCAN"""
+    from app.utils.db_indexes import audit_query_plans
+    
+    failed = False
+    for entry in audit_query_plans():
+        stages = ' > '.join(entry['stages'])
+        if entry['collscan']:
+            failed = True
+            click.echo(f"✗ {entry['collection']}.{entry['query']}: {stages}")
+        else:
+            click.echo(f"✓ {entry['collection']}.{entry['query']}: {stages}")
+    
+    if failed:
+        raise click.ClickException('One or more queries perform a collection scan')
+
+
+@db_cli.command('rebuild-taste-index')
+def rebuild_taste_index_command():
+    """Rebuild the artist/genre inverted index from the users collection"""
+    from app.models import User, TasteIndex
+    
+    count = TasteIndex.rebuild(User.get_collection())
+    click.echo(f"✓ {TasteIndex.COLLECTION_NAME}: {count} posting lists")
+
+
+@db_cli.command('build-minhash-index')
+@click.option('--path', default=None, help='Output file (defaults to MINHASH_INDEX_PATH)')
+def build_minhash_index_command(path):
+    """Build the MinHash LSH similar-user index from every playlist"""
+    import os
+    import time
+    from app.config import Config
+    from app.models import Playlist
+    from app.utils.minhash import MinHashLSHIndex, playlist_tokens
+    
+    path = path or Config.MINHASH_INDEX_PATH
+    # Taken before reading: workers keep (and re-read) the updates made while the build runs
+    built_at = time.time()
+    playlists = Playlist.get_collection().find({}, {'user_id': 1, 'songs': 1})
+    index = MinHashLSHIndex.build(
+        ((playlist['user_id'], playlist_tokens(playlist)) for playlist in playlists),
+        built_at=built_at
+    )
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = index.save(path)
+    click.echo(f"✓ {path}: {count} users")
+
+
+def register_commands(app):
+    """Register CLI command groups on the Flask app"""
+    app.cli.add_command(db_cli)
@@ -24,12 +24,100 @@ class Config:
                 MONGODB_DB_NAME = 'music_dating_db'
         except:
             MONGODB_DB_NAME = 'music_dating_db'
+    # Create the model indexes when the app starts (idempotent)
+    MONGODB_ENSURE_INDEXES = os.getenv('MONGODB_ENSURE_INDEXES', 'True').lower() == 'true'
+    # Serve the read-only endpoints from lazily decoded RawBSONDocuments
+    MONGODB_RAW_READS = os.getenv('MONGODB_RAW_READS', 'False').lower() == 'true'
+    # Document store behind the models: 'mongo', or 'memory' (in-process, for benchmarks and tests)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mongo')
+    # Seed of the in-memory store's $sample draws, for repeatable runs (unset: unseeded)
+    MEMORY_STORAGE_SEED = int(os.environ['MEMORY_STORAGE_SEED']) if os.getenv('MEMORY_STORAGE_SEED') else None
+    # Seconds between background pings that track whether MongoDB is reachable
+    MONGODB_MONITOR_INTERVAL_SECONDS = float(os.getenv('MONGODB_MONITOR_INTERVAL_SECONDS', 5))
+    
+    # Readiness probe (/readyz): database ping limit and how long a result is reused
+    READINESS_TIMEOUT_MS = int(os.getenv('READINESS_TIMEOUT_MS', 1000))
+    READINESS_CACHE_SECONDS = float(os.getenv('READINESS_CACHE_SECONDS', 2))
+    
+    # Time budget of a request; what is left becomes the timeout of each MongoDB call (0 disables)
+    REQUEST_DEADLINE_MS = int(os.getenv('REQUEST_DEADLINE_MS', 3000))
+    
+    # Circuit breaker: fail fast with 503 while MongoDB calls keep failing or timing out
+    CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'True').lower() == 'true'
+    CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', 0.5))
+    CIRCUIT_BREAKER_MINIMUM_CALLS = int(os.getenv('CIRCUIT_BREAKER_MINIMUM_CALLS', 10))
+    CIRCUIT_BREAKER_WINDOW_CALLS = int(os.getenv('CIRCUIT_BREAKER_WINDOW_CALLS', 20))
+    CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', 5))
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS = int(os.getenv('CIRCUIT_BREAKER_HALF_OPEN_CALLS', 3))
     
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default-secret-key-change-in-production')
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRATION_HOURS = 24
     
+    # Password hashing (bcrypt runs on a bounded per-worker thread pool)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_POOL_SIZE = int(os.getenv('BCRYPT_POOL_SIZE', 2))
+    BCRYPT_QUEUE_DEPTH = int(os.getenv('BCRYPT_QUEUE_DEPTH', 8))
+    BCRYPT_TIMEOUT_SECONDS = float(os.getenv('BCRYPT_TIMEOUT_SECONDS', 10))
+    BCRYPT_RETRY_AFTER_SECONDS = int(os.getenv('BCRYPT_RETRY_AFTER_SECONDS', 1))
+    
+    # Cache of already-verified JWTs used by require_auth (per worker)
+    TOKEN_CACHE_ENABLED = os.getenv('TOKEN_CACHE_ENABLED', 'True').lower() == 'true'
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+    TOKEN_CACHE_TTL_SECONDS = float(os.getenv('TOKEN_CACHE_TTL_SECONDS', 300))
+    
+    # Matches pagination
+    MATCHES_PAGE_SIZE = int(os.getenv('MATCHES_PAGE_SIZE', 50))
+    MATCHES_MAX_PAGE_SIZE = int(os.getenv('MATCHES_MAX_PAGE_SIZE', 100))
+    
+    # Read-through user profile cache (per worker)
+    USER_CACHE_ENABLED = os.getenv('USER_CACHE_ENABLED', 'True').lower() == 'true'
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', 30))
+    
+    # Maximum number of swipes accepted by POST /api/discover/swipes
+    SWIPE_BATCH_MAX_SIZE = int(os.getenv('SWIPE_BATCH_MAX_SIZE', 100))
+    
+    # Discover deck (per-user queue of candidate IDs)
+    DECK_SIZE = int(os.getenv('DECK_SIZE', 100))
+    DECK_LOW_WATERMARK = int(os.getenv('DECK_LOW_WATERMARK', 20))
+    # Number of unseen candidates sampled and scored per refill
+    DECK_CANDIDATE_POOL = int(os.getenv('DECK_CANDIDATE_POOL', 1000))
+    # Encoded taste vectors of ranked users (per worker), and the token vocabulary they index
+    PROFILE_CACHE_ENABLED = os.getenv('PROFILE_CACHE_ENABLED', 'True').lower() == 'true'
+    PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 50000))
+    PROFILE_CACHE_TTL_SECONDS = float(os.getenv('PROFILE_CACHE_TTL_SECONDS', 300))
+    TASTE_VOCABULARY_SIZE = int(os.getenv('TASTE_VOCABULARY_SIZE', 500000))
+    
+    # MinHash LSH similar-user index, memory-mapped at startup when the file exists
+    MINHASH_INDEX_PATH = os.getenv('MINHASH_INDEX_PATH', 'data/minhash_lsh.bin')
+    # Seconds between refreshes (playlist updates from other workers, rebuilt index file); 0 disables
+    MINHASH_REFRESH_SECONDS = float(os.getenv('MINHASH_REFRESH_SECONDS', 30))
+    # Playlist updates kept on top of the index file until the next rebuild
+    MINHASH_OVERLAY_MAX_SIZE = int(os.getenv('MINHASH_OVERLAY_MAX_SIZE', 50000))
+    
+    # JSON encoder for responses: 'orjson' (falls back to 'stdlib' when orjson is missing) or 'stdlib'
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+    
+    # Prometheus metrics at /metrics (set PROMETHEUS_MULTIPROC_DIR when running several workers)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # On-demand request profiling: sampled requests, or requests sending 'X-Profile: <PROFILING_TOKEN>'
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+    PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+    PROFILING_DIR = os.getenv('PROFILING_DIR', 'data/profiles')
+    PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', 2))
+    
+    # Match notifications (SSE): 'memory' (single process) or 'change_stream' (needs a replica set)
+    MATCH_EVENTS_BACKEND = os.getenv('MATCH_EVENTS_BACKEND', 'memory')
+    MATCH_EVENTS_HEARTBEAT_SECONDS = int(os.getenv('MATCH_EVENTS_HEARTBEAT_SECONDS', 15))
+    # Match streams open at once per gunicorn worker (each holds a thread); 0 leaves them to the async mode
+    MATCH_STREAMS_MAX_SYNC = int(os.getenv('MATCH_STREAMS_MAX_SYNC', 4))
+    
+    # Async (ASGI) mode: threads running the Flask routes that have no async version
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 16))
+    
     # Flask Configuration
     SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'default-flask-secret-key-change-in-production')
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
@@ -1,7 +1,23 @@
-import bcrypt
 from app.models.user import User
+from app.utils.password_hashing import password_hasher, PasswordHasherBusy
 from app.utils.validators import validate_email, validate_password, validate_arrays
 from app.utils.jwt_utils import generate_token
+from app.utils.errors import failure_response
+
+
+def _busy_response(error):
+    """
+    Build the response for a request rejected by the password hashing pool
+    Args:
+        error: PasswordHasherBusy exception
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    return {
+        'error': 'Server is busy, please retry later',
+        'status_code': 503,
+        'retry_after': error.retry_after
+    }, 503
 
 
 def register_user(data):
@@ -48,17 +64,19 @@ def register_user(data):
         return {'error': error, 'status_code': 400}, 400
     
     # Check if user already exists
-    existing_user = User.find_by_email(email)
-    if existing_user:
+    if User.email_exists(email):
         return {'error': 'User with this email already exists', 'status_code': 400}, 400
     
-    # Hash password
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=12))
+    # Hash password on the bcrypt pool
+    try:
+        hashed_password = password_hasher.hash_password(password)
+    except PasswordHasherBusy as e:
+        return _busy_response(e)
     
     # Create user data
     user_data = {
         'email': email,
-        'password': hashed_password.decode('utf-8'),
+        'password': hashed_password,
         'favorite_songs': favorite_songs or [],
         'favorite_artists': favorite_artists or [],
         'favorite_genres': favorite_genres or [],
@@ -73,7 +91,7 @@ def register_user(data):
             'user_id': str(user['_id'])
         }, 201
     except Exception as e:
-        return {'error': f'Failed to register user: {str(e)}', 'status_code': 500}, 500
+        return failure_response(e, 'Failed to register user')
 
 
 def login_user(data):
@@ -94,14 +112,22 @@ def login_user(data):
         return {'error': 'Password is required', 'status_code': 400}, 400
     
     # Find user by email
-    user = User.find_by_email(email)
+    user = User.find_auth_by_email(email)
     if not user:
         return {'error': 'Invalid email or password', 'status_code': 401}, 401
     
-    # Verify password
-    stored_password = user.get('password', '').encode('utf-8')
-    if not bcrypt.checkpw(password.encode('utf-8'), stored_password):
-        return {'error': 'Invalid email or password', 'status_code': 401}, 401
+    # Verify password on the bcrypt pool
+    stored_password = user.get('password', '')
+    try:
+        if not password_hasher.check_password(password, stored_password):
+            return {'error': 'Invalid email or password', 'status_code': 401}, 401
+    except PasswordHasherBusy as e:
+        return _busy_response(e)
+    
+    # Transparently upgrade hashes made with an outdated cost factor
+    if password_hasher.needs_rehash(stored_password):
+        user_id = user['_id']
+        password_hasher.hash_password_async(password, lambda new_hash: User.set_password(user_id, new_hash))
     
     # Generate JWT token
     token = generate_token(str(user['_id']), user['email'])
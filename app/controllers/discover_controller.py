@@ -1,153 +1,458 @@
+import queue
+from bson import ObjectId
 from app.models.user import User
 from app.models.swipe_right import SwipeRight
 from app.models.match import Match
+from app.models.discover_deck import DiscoverDeck
+from app.config import Config
+from app.utils.deck_refill import refill_deck, schedule_refill
+from app.utils.etag import compute_etag
+from app.utils.match_events import get_match_events, publish_match, format_sse
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.errors import failure_response
 
 
 def get_random_user(current_user_id):
     """
-    Get a random user profile excluding the current user
+    Get the next candidate profile from the current user's discover deck
+    Decks are ordered by music-taste compatibility, so this is the top-scored unseen candidate
     Args:
         current_user_id: Current user ID string
     Returns:
         tuple: (response_dict, status_code)
     """
     # Verify current user exists
-    user = User.find_by_id(current_user_id)
-    if not user:
+    if not User.exists(current_user_id):
         return {'error': 'User not found', 'status_code': 404}, 404
     
-    # Get random user
+    # Pop candidates until one still exists
     try:
-        random_user = User.find_random_user(current_user_id)
-        if not random_user:
-            return {'error': 'No other users found', 'status_code': 404}, 404
-        
-        user_dict = User.to_dict(random_user)
-        return user_dict, 200
+        refilled = False
+        while True:
+            candidate_id, remaining = DiscoverDeck.pop_candidate(current_user_id, peek=Config.DECK_LOW_WATERMARK)
+            if candidate_id is None:
+                # Deck is empty - refill it in the request once before giving up. Pop again whatever
+                # the refill added: a concurrent refill may have pushed the same candidates first
+                if refilled:
+                    return {'error': 'No other users found', 'status_code': 404}, 404
+                refill_deck(current_user_id)
+                refilled = True
+                continue
+            
+            if remaining < Config.DECK_LOW_WATERMARK:
+                schedule_refill(current_user_id)
+            
+            candidate = User.find_card_by_id(candidate_id)
+            if candidate:
+                user_dict = User.to_dict(candidate)
+                return user_dict, 200
     except Exception as e:
-        return {'error': f'Failed to get random user: {str(e)}', 'status_code': 500}, 500
+        return failure_response(e, 'Failed to get random user')
 
 
 def swipe_right(current_user_id, swiped_user_id):
     """
     Handle swipe right action and create match if mutual
+    The swipe is recorded first and the reciprocal swipe is then claimed with
+    find_one_and_delete, so when two users swipe each other concurrently at
+    least one of them sees the other's swipe; the match itself is a single
+    upsert on a unique index, so it can never be duplicated
     Args:
         current_user_id: Current user ID string (user making the swipe)
         swiped_user_id: Swiped user ID string (user being swiped)
     Returns:
         tuple: (response_dict, status_code)
     """
-    # Validate users are different
-    if current_user_id == swiped_user_id:
+    if not ObjectId.is_valid(swiped_user_id):
+        return {'error': 'Invalid user_id', 'status_code': 400}, 400
+    
+    # Validate users are different (as ObjectIds: hex strings are accepted in any case)
+    current_object_id = ObjectId(current_user_id)
+    swiped_object_id = ObjectId(swiped_user_id)
+    if current_object_id == swiped_object_id:
         return {'error': 'Cannot swipe right on yourself', 'status_code': 400}, 400
     
-    # Verify current user exists
-    current_user = User.find_by_id(current_user_id)
-    if not current_user:
+    # Verify both users exist with a single query
+    existing_ids = User.find_existing_ids([current_object_id, swiped_object_id])
+    if current_object_id not in existing_ids:
         return {'error': 'User not found', 'status_code': 404}, 404
-    
-    # Verify swiped user exists
-    swiped_user = User.find_by_id(swiped_user_id)
-    if not swiped_user:
+    if swiped_object_id not in existing_ids:
         return {'error': 'Swiped user not found', 'status_code': 404}, 404
     
     try:
-        # Check if swiped user already swiped right on current user (mutual swipe)
-        mutual_swipe = SwipeRight.find_by_users(swiped_user_id, current_user_id)
+        # Record this swipe (upsert on the unique index)
+        swipe, swipe_created = SwipeRight.upsert(current_object_id, swiped_object_id)
         
-        if mutual_swipe:
-            # Both users swiped right - create match
-            # Check if match already exists
-            existing_match = Match.find_by_users(current_user_id, swiped_user_id)
-            
-            if existing_match:
-                match_dict = Match.to_dict(existing_match)
-                return {
-                    'message': 'Match already exists',
-                    'match': match_dict,
-                    'is_new_match': False
-                }, 200
-            
-            # Delete the existing swipe_right from B->A before creating match
-            SwipeRight.delete_by_users(swiped_user_id, current_user_id)
-            
-            # Create new match
-            match = Match.create(current_user_id, swiped_user_id)
-            match_dict = Match.to_dict(match)
-            
-            return {
-                'message': 'It\'s a match!',
-                'match': match_dict,
-                'is_new_match': True
-            }, 201
-        else:
-            # No mutual swipe - save swipe right relationship
-            # Check if swipe already exists
-            existing_swipe = SwipeRight.find_by_users(current_user_id, swiped_user_id)
-            
-            if existing_swipe:
-                swipe_dict = SwipeRight.to_dict(existing_swipe)
+        # Claim the reciprocal swipe, if any
+        mutual_swipe = SwipeRight.pop(swiped_object_id, current_object_id)
+        
+        if not mutual_swipe:
+            swipe_dict = SwipeRight.to_dict(swipe)
+            if not swipe_created:
                 return {
                     'message': 'Swipe right already recorded',
                     'swipe': swipe_dict
                 }, 200
-            
-            # Create new swipe right
-            swipe = SwipeRight.create(current_user_id, swiped_user_id)
-            swipe_dict = SwipeRight.to_dict(swipe)
-            
             return {
                 'message': 'Swipe right recorded',
                 'swipe': swipe_dict
             }, 201
-            
+        
+        # Both users swiped right - create the match and drop this side's swipe
+        match, match_created = Match.upsert(current_object_id, swiped_object_id)
+        SwipeRight.delete_by_users(current_object_id, swiped_object_id)
+        if match_created:
+            publish_match(match)
+        match_dict = Match.to_dict(match)
+        
+        if not match_created:
+            return {
+                'message': 'Match already exists',
+                'match': match_dict,
+                'is_new_match': False
+            }, 200
+        
+        return {
+            'message': 'It\'s a match!',
+            'match': match_dict,
+            'is_new_match': True
+        }, 201
+        
     except Exception as e:
-        return {'error': f'Failed to process swipe right: {str(e)}', 'status_code': 500}, 500
+        return failure_response(e, 'Failed to process swipe right')
 
 
-def get_user_matches(current_user_id):
+def swipe_right_batch(current_user_id, swipes):
     """
-    Get all matches for the current user with matched user information
+    Handle an ordered batch of swipe right actions
+    Existence checks, swipe writes, mutual-match checks and match writes are
+    each done once for the whole batch instead of once per swipe
     Args:
-        current_user_id: Current user ID string
+        current_user_id: Current user ID string (user making the swipes)
+        swipes: List of dicts with the swiped user_id
     Returns:
         tuple: (response_dict, status_code)
     """
-    # Verify current user exists
-    user = User.find_by_id(current_user_id)
-    if not user:
+    if not isinstance(swipes, list) or not swipes:
+        return {'error': 'swipes must be a non-empty array', 'status_code': 400}, 400
+    
+    if len(swipes) > Config.SWIPE_BATCH_MAX_SIZE:
+        return {
+            'error': f'A batch can contain at most {Config.SWIPE_BATCH_MAX_SIZE} swipes',
+            'status_code': 400
+        }, 400
+    
+    current_object_id = ObjectId(current_user_id)
+    
+    # Validate every item, keeping the first occurrence of each swiped user
+    results = [None] * len(swipes)
+    targets = {}
+    for index, item in enumerate(swipes):
+        swiped_user_id = item.get('user_id') if isinstance(item, dict) else None
+        if not swiped_user_id:
+            results[index] = {'user_id': swiped_user_id, 'error': 'user_id is required', 'status_code': 400}
+        elif not ObjectId.is_valid(swiped_user_id):
+            results[index] = {'user_id': swiped_user_id, 'error': 'Invalid user_id', 'status_code': 400}
+        elif ObjectId(swiped_user_id) == current_object_id:
+            results[index] = {'user_id': swiped_user_id, 'error': 'Cannot swipe right on yourself', 'status_code': 400}
+        elif ObjectId(swiped_user_id) in targets:
+            results[index] = {'user_id': swiped_user_id, 'error': 'Duplicate swipe in batch', 'status_code': 400}
+        else:
+            targets[ObjectId(swiped_user_id)] = index
+    
+    # Verify the current user and every swiped user exist with a single query
+    existing_ids = User.find_existing_ids([current_object_id] + list(targets))
+    if current_object_id not in existing_ids:
         return {'error': 'User not found', 'status_code': 404}, 404
     
+    for swiped_object_id in [target for target in targets if target not in existing_ids]:
+        results[targets.pop(swiped_object_id)] = {
+            'user_id': str(swiped_object_id),
+            'error': 'Swiped user not found',
+            'status_code': 404
+        }
+    
+    new_matches = []
     try:
-        # Get all matches for the user
-        matches = Match.find_all_by_user(current_user_id)
+        swiped_ids = list(targets)
         
-        # Build matches list with matched user information
-        matches_list = []
-        for match in matches:
-            match_dict = Match.to_dict(match)
-            
-            # Determine which user is the matched user (the other one)
-            if match_dict['user_id_1'] == current_user_id:
-                matched_user_id = match_dict['user_id_2']
+        # Record every swipe first, then look for reciprocal swipes (same
+        # ordering as swipe_right, so concurrent mutual swipes are never lost)
+        recorded = SwipeRight.bulk_upsert(current_object_id, swiped_ids)
+        swipers = SwipeRight.find_swipers_among(current_object_id, swiped_ids)
+        mutual_ids = [swiped_id for swiped_id in swiped_ids if swiped_id in swipers]
+        
+        matches = {}
+        if mutual_ids:
+            matches = Match.bulk_upsert(current_object_id, mutual_ids)
+            SwipeRight.bulk_delete_pairs(
+                [(mutual_id, current_object_id) for mutual_id in mutual_ids] +
+                [(current_object_id, mutual_id) for mutual_id in mutual_ids]
+            )
+        
+        for swiped_id, index in targets.items():
+            if swiped_id in matches:
+                match = matches[swiped_id]
+                match_dict = Match.to_dict(match)
+                if match['created']:
+                    new_matches.append(match_dict)
+                    publish_match(match)
+                results[index] = {
+                    'user_id': str(swiped_id),
+                    'message': 'It\'s a match!' if match['created'] else 'Match already exists',
+                    'match': match_dict,
+                    'is_new_match': match['created'],
+                    'status_code': 201 if match['created'] else 200
+                }
             else:
-                matched_user_id = match_dict['user_id_1']
-            
-            # Get matched user information
-            matched_user = User.find_by_id(matched_user_id)
-            if matched_user:
-                matched_user_dict = User.to_dict(matched_user)
-                matches_list.append({
-                    'match_id': match_dict['_id'],
-                    'matched_user': matched_user_dict,
-                    'created_at': match_dict['created_at']
-                })
+                swipe = recorded[swiped_id]
+                results[index] = {
+                    'user_id': str(swiped_id),
+                    'message': 'Swipe right recorded' if swipe['created'] else 'Swipe right already recorded',
+                    'swipe': SwipeRight.to_dict(swipe),
+                    'status_code': 201 if swipe['created'] else 200
+                }
         
         return {
-            'matches': matches_list,
-            'count': len(matches_list)
+            'results': results,
+            'new_matches': new_matches,
+            'count': len(results)
         }, 200
         
     except Exception as e:
-        return {'error': f'Failed to get matches: {str(e)}', 'status_code': 500}, 500
+        return failure_response(e, 'Failed to process swipes')
+
 
+def parse_match_cursors(cursor=None, since=None):
+    """
+    Decode the cursor/since query parameters of the matches listing
+    Args:
+        cursor: Optional cursor from a previous page's next_cursor
+        since: Optional cursor from a previous sync_cursor
+    Returns:
+        tuple: (before, after, error_response or None)
+    """
+    if cursor and since:
+        return None, None, ({'error': 'cursor and since cannot be used together', 'status_code': 400}, 400)
+    
+    before = None
+    after = None
+    if cursor:
+        before = decode_cursor(cursor)
+        if not before:
+            return None, None, ({'error': 'Invalid cursor', 'status_code': 400}, 400)
+    if since:
+        after = decode_cursor(since)
+        if not after:
+            return None, None, ({'error': 'Invalid since cursor', 'status_code': 400}, 400)
+    return before, after, None
+
+
+def matched_user_ids_for(current_user_id, matches):
+    """
+    Determine which user is the matched user (the other one) for every match
+    Args:
+        current_user_id: Current user ID string
+        matches: List of match documents
+    Returns:
+        List of matched user ObjectIds, one per match
+    """
+    return [
+        match['user_id_2'] if str(match['user_id_1']) == current_user_id else match['user_id_1']
+        for match in matches
+    ]
+
+
+def match_list_item(match, matched_user):
+    """
+    Build one entry of the matches listing (also the payload of match events)
+    Args:
+        match: Match document
+        matched_user: Document of the other user of the match
+    Returns:
+        dict with match_id, matched_user and created_at
+    """
+    match_dict = Match.to_dict(match)
+    return {
+        'match_id': match_dict['_id'],
+        'matched_user': User.to_dict(matched_user),
+        'created_at': match_dict['created_at']
+    }
+
+
+def match_event_message(current_user_id, match, matched_user, dumps):
+    """
+    Format a match as a Server-Sent Events message
+    The event ID is the match's sync cursor, so a reconnecting client's
+    Last-Event-ID resumes the stream right after it
+    Args:
+        current_user_id: Current user ID string
+        match: Match document
+        matched_user: Document of the other user of the match
+        dumps: JSON encoder of the app (current_app.json.dumps)
+    Returns:
+        SSE message string
+    """
+    return format_sse(
+        dumps(match_list_item(match, matched_user)),
+        event='match',
+        event_id=encode_cursor(match['created_at'], match['_id'])
+    )
+
+
+def build_matches_response(current_user_id, matches, has_more, matched_users, cursor=None, since=None):
+    """
+    Build the matches listing response from one page of matches
+    Args:
+        current_user_id: Current user ID string
+        matches: List of match documents of the page
+        has_more: Whether another page exists
+        matched_users: dict mapping matched user ObjectId to user document
+        cursor: cursor query parameter of the request
+        since: since query parameter of the request
+    Returns:
+        response dict
+    """
+    # Build matches list with matched user information
+    matches_list = []
+    for match, matched_user_id in zip(matches, matched_user_ids_for(current_user_id, matches)):
+        matched_user = matched_users.get(matched_user_id)
+        if matched_user:
+            matches_list.append(match_list_item(match, matched_user))
+    
+    # next_cursor pages towards older matches; sync_cursor marks the newest match seen
+    next_cursor = None
+    sync_cursor = since
+    if matches:
+        first_cursor = encode_cursor(matches[0]['created_at'], matches[0]['_id'])
+        last_cursor = encode_cursor(matches[-1]['created_at'], matches[-1]['_id'])
+        if since:
+            sync_cursor = last_cursor
+        else:
+            next_cursor = last_cursor if has_more else None
+            sync_cursor = first_cursor if not cursor else None
+    
+    return {
+        'matches': matches_list,
+        'count': len(matches_list),
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+        'sync_cursor': sync_cursor
+    }
+
+
+def matches_etag(current_user_id, count, latest, limit, cursor=None, since=None):
+    """
+    Build the ETag of a matches listing
+    Matched users' profile edits do not change it; clients see them once a
+    match is added or removed
+    Args:
+        current_user_id: Current user ID string
+        count: Number of matches of the user
+        latest: Latest match (_id and created_at) or None
+        limit, cursor, since: Query parameters of the listing
+    Returns:
+        ETag string
+    """
+    latest_id = latest['_id'] if latest else None
+    latest_at = latest.get('created_at') if latest else None
+    return compute_etag('matches', current_user_id, count, latest_id, latest_at, limit, cursor, since)
+
+
+def get_matches_etag(current_user_id, limit, cursor=None, since=None):
+    """
+    Compute the ETag of a matches listing from the match count and the latest match
+    Args:
+        current_user_id: Current user ID string
+        limit: Page size
+        cursor: cursor query parameter
+        since: since query parameter
+    Returns:
+        ETag string or None if the user does not exist
+    """
+    if not User.exists(current_user_id):
+        return None
+    count, latest = Match.version_for_user(current_user_id)
+    return matches_etag(current_user_id, count, latest, limit, cursor, since)
+
+
+def get_user_matches(current_user_id, limit, cursor=None, since=None):
+    """
+    Get one page of matches for the current user with matched user information
+    Args:
+        current_user_id: Current user ID string
+        limit: Maximum number of matches to return
+        cursor: Optional cursor from a previous page's next_cursor (older matches)
+        since: Optional cursor from a previous sync_cursor (only newer matches)
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    before, after, error = parse_match_cursors(cursor, since)
+    if error:
+        return error
+    
+    # Verify current user exists
+    if not User.exists(current_user_id):
+        return {'error': 'User not found', 'status_code': 404}, 404
+    
+    try:
+        # Get one page of matches for the user
+        matches, has_more = Match.find_page_by_user(
+            current_user_id,
+            limit,
+            before=before,
+            after=after,
+            raw=Config.MONGODB_RAW_READS
+        )
+        
+        # Fetch all matched users in a single query
+        matched_users = User.find_by_ids(matched_user_ids_for(current_user_id, matches), raw=Config.MONGODB_RAW_READS)
+        
+        return build_matches_response(current_user_id, matches, has_more, matched_users, cursor, since), 200
+        
+    except Exception as e:
+        return failure_response(e, 'Failed to get matches')
+
+
+def stream_match_events(current_user_id, dumps, last_event_id=None):
+    """
+    Generate the Server-Sent Events stream of a user's new matches
+    Matches created after Last-Event-ID are replayed first; afterwards the
+    stream blocks on the match event source and sends a comment as heartbeat
+    Args:
+        current_user_id: Current user ID string
+        dumps: JSON encoder of the app (current_app.json.dumps)
+        last_event_id: Optional Last-Event-ID header of a reconnecting client
+    Yields:
+        SSE message strings
+    """
+    # Subscribe before replaying so that no match falls between the two
+    events = queue.SimpleQueue()
+    unsubscribe = get_match_events().subscribe(current_user_id, events.put)
+    try:
+        yield 'retry: 5000\n\n'
+        
+        replayed = set()
+        after = decode_cursor(last_event_id) if last_event_id else None
+        if after:
+            matches, _ = Match.find_page_by_user(current_user_id, Config.MATCHES_MAX_PAGE_SIZE, after=after)
+            matched_users = User.find_by_ids(matched_user_ids_for(current_user_id, matches))
+            for match, matched_user_id in zip(matches, matched_user_ids_for(current_user_id, matches)):
+                replayed.add(match['_id'])
+                if matched_user_id in matched_users:
+                    yield match_event_message(current_user_id, match, matched_users[matched_user_id], dumps)
+        
+        while True:
+            try:
+                match = events.get(timeout=Config.MATCH_EVENTS_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            if match['_id'] in replayed:
+                continue
+            matched_user_id = matched_user_ids_for(current_user_id, [match])[0]
+            matched_user = User.find_card_by_id(matched_user_id)
+            if matched_user:
+                yield match_event_message(current_user_id, match, matched_user, dumps)
+    finally:
+        unsubscribe()
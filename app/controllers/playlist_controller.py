@@ -1,6 +1,9 @@
+from app.config import Config
 from app.models.playlist import Playlist
 from app.models.user import User
+from app.utils.etag import compute_etag
 from app.utils.validators import validate_playlist_songs
+from app.utils.errors import failure_response
 
 
 def create_or_update_playlist(user_id, data):
@@ -13,8 +16,7 @@ def create_or_update_playlist(user_id, data):
         tuple: (response_dict, status_code)
     """
     # Verify user exists
-    user = User.find_by_id(user_id)
-    if not user:
+    if not User.exists(user_id):
         return {'error': 'User not found', 'status_code': 404}, 404
     
     # Validate songs
@@ -32,7 +34,7 @@ def create_or_update_playlist(user_id, data):
         playlist_dict = Playlist.to_dict(playlist)
         return playlist_dict, 200
     except Exception as e:
-        return {'error': f'Failed to save playlist: {str(e)}', 'status_code': 500}, 500
+        return failure_response(e, 'Failed to save playlist')
 
 
 def get_user_playlist(user_id):
@@ -44,15 +46,27 @@ def get_user_playlist(user_id):
         tuple: (response_dict, status_code)
     """
     # Verify user exists
-    user = User.find_by_id(user_id)
-    if not user:
+    if not User.exists(user_id):
         return {'error': 'User not found', 'status_code': 404}, 404
     
     # Find playlist
-    playlist = Playlist.find_by_user_id(user_id)
+    playlist = Playlist.find_by_user_id(user_id, raw=Config.MONGODB_RAW_READS)
     if not playlist:
         return {'error': 'Playlist not found', 'status_code': 404}, 404
     
     playlist_dict = Playlist.to_dict(playlist)
     return playlist_dict, 200
 
+
+def get_playlist_etag(user_id):
+    """
+    Compute the ETag of a user's playlist from its updated_at (projected read)
+    Args:
+        user_id: User ID string
+    Returns:
+        ETag string or None if the user has no playlist
+    """
+    playlist = Playlist.find_version(user_id)
+    if not playlist:
+        return None
+    return compute_etag('playlist', playlist['_id'], playlist.get('updated_at'))
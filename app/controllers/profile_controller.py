@@ -1,5 +1,8 @@
+from app.config import Config
 from app.models.user import User
+from app.utils.etag import compute_etag
 from app.utils.validators import validate_email, validate_arrays
+from app.utils.errors import failure_response
 
 
 def get_user_profile(user_id):
@@ -10,7 +13,7 @@ def get_user_profile(user_id):
     Returns:
         tuple: (response_dict, status_code)
     """
-    user = User.find_by_id(user_id)
+    user = User.find_card_by_id(user_id, raw=Config.MONGODB_RAW_READS)
     if not user:
         return {'error': 'User not found', 'status_code': 404}, 404
     
@@ -18,6 +21,20 @@ def get_user_profile(user_id):
     return user_dict, 200
 
 
+def get_profile_etag(user_id):
+    """
+    Compute the ETag of a user's profile from its updated_at (uncached projected read)
+    Args:
+        user_id: User ID string
+    Returns:
+        ETag string or None if the user does not exist
+    """
+    user = User.find_version(user_id)
+    if not user:
+        return None
+    return compute_etag('profile', user['_id'], user.get('updated_at'))
+
+
 def update_user_profile(user_id, data):
     """
     Update user profile
@@ -27,7 +44,7 @@ def update_user_profile(user_id, data):
     Returns:
         tuple: (response_dict, status_code)
     """
-    user = User.find_by_id(user_id)
+    user = User.find_card_by_id(user_id)
     if not user:
         return {'error': 'User not found', 'status_code': 404}, 404
     
@@ -66,7 +83,7 @@ def update_user_profile(user_id, data):
             user_dict = User.to_dict(updated_user)
             return user_dict, 200
         except Exception as e:
-            return {'error': f'Failed to update profile: {str(e)}', 'status_code': 500}, 500
+            return failure_response(e, 'Failed to update profile')
     
     # No data to update, return current profile
     user_dict = User.to_dict(user)
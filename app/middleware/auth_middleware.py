@@ -1,6 +1,35 @@
 from functools import wraps
 from flask import request, jsonify
-from app.utils.jwt_utils import decode_token
+from app.utils.jwt_utils import decode_token_cached
+
+
+def authenticate(auth_header):
+    """
+    Validate an Authorization header value
+    Shared by the Flask decorator and the async (ASGI) entry point
+    Args:
+        auth_header: Value of the Authorization header or None
+    Returns:
+        tuple: (payload dict or None, error_response dict or None)
+    """
+    token = None
+    
+    # Get token from Authorization header
+    if auth_header:
+        try:
+            token = auth_header.split(' ')[1]  # Format: "Bearer <token>"
+        except IndexError:
+            return None, {'error': 'Invalid authorization header format', 'status_code': 401}
+    
+    if not token:
+        return None, {'error': 'Token is missing', 'status_code': 401}
+    
+    # Decode and validate token (verified tokens are cached until they expire)
+    payload = decode_token_cached(token)
+    if not payload:
+        return None, {'error': 'Invalid or expired token', 'status_code': 401}
+    
+    return payload, None
 
 
 def require_auth(f):
@@ -10,23 +39,9 @@ def require_auth(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = None
-        
-        # Get token from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if auth_header:
-            try:
-                token = auth_header.split(' ')[1]  # Format: "Bearer <token>"
-            except IndexError:
-                return jsonify({'error': 'Invalid authorization header format', 'status_code': 401}), 401
-        
-        if not token:
-            return jsonify({'error': 'Token is missing', 'status_code': 401}), 401
-        
-        # Decode and validate token
-        payload = decode_token(token)
-        if not payload:
-            return jsonify({'error': 'Invalid or expired token', 'status_code': 401}), 401
+        payload, error = authenticate(request.headers.get('Authorization'))
+        if error:
+            return jsonify(error), error['status_code']
         
         # Add user info to request context
         request.user_id = payload.get('user_id')
@@ -35,4 +50,3 @@ def require_auth(f):
         return f(*args, **kwargs)
     
     return decorated_function
-
@@ -1,7 +1,9 @@
+from app.models.taste_index import TasteIndex
 from app.models.user import User
 from app.models.playlist import Playlist
 from app.models.swipe_right import SwipeRight
 from app.models.match import Match
+from app.models.discover_deck import DiscoverDeck
 
-__all__ = ['User', 'Playlist', 'SwipeRight', 'Match']
+__all__ = ['User', 'Playlist', 'SwipeRight', 'Match', 'DiscoverDeck', 'TasteIndex']
 
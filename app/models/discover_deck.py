@@ -0,0 +1,157 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.storage import get_storage
+from app.models.user import User
+from app.models.swipe_right import SwipeRight
+from app.models.match import Match
+from app.models.taste_index import TasteIndex
+
+
+class DiscoverDeck:
+    """DiscoverDeck model for MongoDB operations
+    
+    Stores a per-user queue of candidate user IDs for discovery, so serving a
+    profile is a pop plus one lookup by _id instead of a $sample over users.
+    """
+    
+    COLLECTION_NAME = 'discover_decks'
+    INDEXES = []
+    
+    @staticmethod
+    def get_collection():
+        """Get the discover_decks collection"""
+        return get_storage().collection(DiscoverDeck.COLLECTION_NAME)
+    
+    @staticmethod
+    def ensure_indexes():
+        """
+        Create the indexes declared in INDEXES (idempotent)
+        Returns:
+            List of index names
+        """
+        if not DiscoverDeck.INDEXES:
+            return []
+        collection = DiscoverDeck.get_collection()
+        return collection.create_indexes(DiscoverDeck.INDEXES)
+    
+    @staticmethod
+    def query_shapes():
+        """
+        Representative queries issued by this model, used by the index audit
+        Returns:
+            List of (name, filter, sort) tuples
+        """
+        return [
+            ('pop_candidate', {'_id': ObjectId(), 'candidates.0': {'$exists': True}}, None)
+        ]
+    
+    @staticmethod
+    def pop_candidate(user_id, peek=0):
+        """
+        Remove and return the next candidate from a user's deck
+        Args:
+            user_id: User ObjectId or string
+            peek: Number of candidates left behind the popped one to report (bounds the read)
+        Returns:
+            tuple: (candidate ObjectId or None if the deck is empty, remaining count up to peek)
+        """
+        collection = DiscoverDeck.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        deck = collection.find_one_and_update(
+            {'_id': user_id, 'candidates.0': {'$exists': True}},
+            {'$pop': {'candidates': -1}},
+            projection={'candidates': {'$slice': peek + 1}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not deck or not deck.get('candidates'):
+            return None, 0
+        
+        candidates = deck['candidates']
+        return candidates[0], len(candidates) - 1
+    
+    @staticmethod
+    def sample_candidates(user_id, size, tokens=None, similar_ids=None):
+        """
+        Gather fresh candidates for a user's deck
+        Approximate nearest neighbours from the MinHash index come first, then
+        candidates sharing the most artists/genres from the taste index; the
+        rest of the pool is topped up with a random sample. Excludes the
+        user, users already swiped right on, matched users and candidates
+        already queued in the deck
+        Args:
+            user_id: User ObjectId or string
+            size: Maximum number of candidates to gather
+            tokens: Optional taste index tokens of the user (see TasteIndex.tokens_for)
+            similar_ids: Optional list of similar user ObjectIds to include first
+        Returns:
+            List of candidate user documents with their favorite arrays only
+        """
+        collection = DiscoverDeck.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        deck = collection.find_one({'_id': user_id}, {'candidates': 1})
+        exclude_ids = {user_id}
+        if deck:
+            exclude_ids.update(deck.get('candidates', []))
+        exclude_ids.update(SwipeRight.find_swiped_user_ids(user_id))
+        exclude_ids.update(Match.find_matched_user_ids(user_id))
+        
+        projection = User.TASTE_PROJECTION
+        users_collection = User.get_collection()
+        
+        preferred_ids = [candidate_id for candidate_id in similar_ids or [] if candidate_id not in exclude_ids]
+        preferred_ids = preferred_ids[:size]
+        if tokens and len(preferred_ids) < size:
+            preferred_ids.extend(
+                candidate_id
+                for candidate_id, _ in TasteIndex.find_candidates(
+                    tokens,
+                    exclude_ids=exclude_ids | set(preferred_ids),
+                    limit=size - len(preferred_ids)
+                )
+            )
+        
+        candidates = []
+        if preferred_ids:
+            candidates = list(users_collection.find({'_id': {'$in': preferred_ids}}, projection))
+            exclude_ids.update(preferred_ids)
+        
+        if len(candidates) < size:
+            pipeline = [
+                {'$match': {'_id': {'$nin': list(exclude_ids)}}},
+                {'$sample': {'size': size - len(candidates)}},
+                {'$project': projection}
+            ]
+            candidates.extend(users_collection.aggregate(pipeline))
+        return candidates
+    
+    @staticmethod
+    def push_candidates(user_id, candidate_ids):
+        """
+        Append candidates to the end of a user's deck, keeping their order
+        Args:
+            user_id: User ObjectId or string
+            candidate_ids: List of candidate user ObjectIds
+        Returns:
+            Number of candidates pushed
+        """
+        collection = DiscoverDeck.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        if not candidate_ids:
+            return 0
+        
+        # $addToSet keeps the deck free of duplicates if two refills race
+        collection.update_one(
+            {'_id': user_id},
+            {
+                '$addToSet': {'candidates': {'$each': candidate_ids}},
+                '$set': {'updated_at': datetime.utcnow()}
+            },
+            upsert=True
+        )
+        return len(candidate_ids)
@@ -1,19 +1,78 @@
 from datetime import datetime
 from bson import ObjectId
-from app import db
+from pymongo import IndexModel, ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from app.storage import get_storage
+from app.utils.raw_bson import raw_collection
 
 
 class Match:
     """Match model for MongoDB operations"""
     
     COLLECTION_NAME = 'matches'
+    INDEXES = [
+        IndexModel(
+            [('user_id_1', ASCENDING), ('user_id_2', ASCENDING)],
+            unique=True,
+            name='user_id_1_user_id_2_unique'
+        ),
+        IndexModel(
+            [('user_id_1', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+            name='user_id_1_created_at_id'
+        ),
+        IndexModel(
+            [('user_id_2', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+            name='user_id_2_created_at_id'
+        )
+    ]
     
     @staticmethod
-    def get_collection():
-        """Get the matches collection"""
-        if db is None:
-            raise ConnectionError("MongoDB connection not available. Please check your MONGODB_URI.")
-        return db[Match.COLLECTION_NAME]
+    def get_collection(raw=False):
+        """
+        Get the matches collection
+        Args:
+            raw: Return RawBSONDocuments instead of dicts (read-only use)
+        """
+        collection = get_storage().collection(Match.COLLECTION_NAME)
+        return raw_collection(collection) if raw else collection
+    
+    @staticmethod
+    def ensure_indexes():
+        """
+        Create the indexes declared in INDEXES (idempotent)
+        Returns:
+            List of index names
+        """
+        collection = Match.get_collection()
+        return collection.create_indexes(Match.INDEXES)
+    
+    @staticmethod
+    def query_shapes():
+        """
+        Representative queries issued by this model, used by the index audit
+        Returns:
+            List of (name, filter, sort) tuples
+        """
+        user_id = ObjectId()
+        return [
+            ('find_by_users', {'user_id_1': user_id, 'user_id_2': ObjectId()}, None),
+            (
+                'find_all_by_user',
+                {'$or': [{'user_id_1': user_id}, {'user_id_2': user_id}]},
+                [('created_at', -1)]
+            ),
+            (
+                'find_page_by_user',
+                Match._keyset_query(user_id, datetime.utcnow(), ObjectId(), newer=False),
+                [('created_at', -1), ('_id', -1)]
+            ),
+            (
+                'version_for_user',
+                {'$or': [{'user_id_1': user_id}, {'user_id_2': user_id}]},
+                [('created_at', -1), ('_id', -1)]
+            ),
+            ('find_matched_user_ids', {'$or': [{'user_id_1': user_id}, {'user_id_2': user_id}]}, None)
+        ]
     
     @staticmethod
     def create(user_id_1, user_id_2):
@@ -24,7 +83,22 @@ class Match:
             user_id_1: First user ID (ObjectId or string)
             user_id_2: Second user ID (ObjectId or string)
         Returns:
-            Inserted match document with _id
+            Inserted (or already existing) match document with _id
+        """
+        match, _ = Match.upsert(user_id_1, user_id_2)
+        return match
+    
+    @staticmethod
+    def upsert(user_id_1, user_id_2):
+        """
+        Create a match in a single round trip, relying on the unique
+        (user_id_1, user_id_2) index so concurrent mutual swipes cannot
+        produce duplicate matches
+        Args:
+            user_id_1: First user ID (ObjectId or string)
+            user_id_2: Second user ID (ObjectId or string)
+        Returns:
+            tuple: (match document, created: bool)
         """
         collection = Match.get_collection()
         if isinstance(user_id_1, str):
@@ -34,25 +108,80 @@ class Match:
         
         # Sort user IDs to ensure consistent storage (avoid duplicates)
         sorted_ids = sorted([user_id_1, user_id_2])
-        
-        match_data = {
+        match_filter = {
             'user_id_1': sorted_ids[0],
-            'user_id_2': sorted_ids[1],
-            'created_at': datetime.utcnow()
+            'user_id_2': sorted_ids[1]
         }
         
-        # Check if match already exists
-        existing = collection.find_one({
-            'user_id_1': sorted_ids[0],
-            'user_id_2': sorted_ids[1]
-        })
+        new_id = ObjectId()
+        try:
+            match = collection.find_one_and_update(
+                match_filter,
+                {'$setOnInsert': {'_id': new_id, 'created_at': datetime.utcnow()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent upsert of the same match won the insert
+            match = collection.find_one(match_filter)
+        return match, match['_id'] == new_id
+    
+    @staticmethod
+    def bulk_upsert(user_id, other_user_ids):
+        """
+        Create matches between a user and several others with a single
+        unordered bulk_write on the unique (user_id_1, user_id_2) index
+        Args:
+            user_id: User ObjectId or string
+            other_user_ids: List of matched user ObjectIds (no duplicates)
+        Returns:
+            dict mapping other user ObjectId to its match document,
+            with an extra 'created' flag
+        """
+        collection = Match.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        if not other_user_ids:
+            return {}
         
-        if existing:
-            return existing
+        now = datetime.utcnow()
+        pairs = [sorted([user_id, other_user_id]) for other_user_id in other_user_ids]
+        operations = [
+            UpdateOne(
+                {'user_id_1': pair[0], 'user_id_2': pair[1]},
+                {'$setOnInsert': {'_id': ObjectId(), 'created_at': now}},
+                upsert=True
+            )
+            for pair in pairs
+        ]
+        try:
+            upserted = collection.bulk_write(operations, ordered=False).upserted_ids
+        except BulkWriteError as e:
+            # Duplicate keys mean a concurrent request created the same match
+            if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+            upserted = {item['index']: item['_id'] for item in e.details.get('upserted', [])}
         
-        result = collection.insert_one(match_data)
-        match_data['_id'] = result.inserted_id
-        return match_data
+        matches = {}
+        existing_pairs = []
+        for index, (other_user_id, pair) in enumerate(zip(other_user_ids, pairs)):
+            if index in upserted:
+                matches[other_user_id] = {
+                    '_id': upserted[index],
+                    'user_id_1': pair[0],
+                    'user_id_2': pair[1],
+                    'created_at': now,
+                    'created': True
+                }
+            else:
+                existing_pairs.append({'user_id_1': pair[0], 'user_id_2': pair[1]})
+        
+        if existing_pairs:
+            for match in collection.find({'$or': existing_pairs}):
+                match['created'] = False
+                other_user_id = match['user_id_2'] if match['user_id_1'] == user_id else match['user_id_1']
+                matches[other_user_id] = match
+        return matches
     
     @staticmethod
     def find_by_users(user_id_1, user_id_2):
@@ -101,6 +230,119 @@ class Match:
         
         return list(matches)
     
+    @staticmethod
+    def find_matched_user_ids(user_id):
+        """
+        Find the IDs of every user a user has matched with
+        Args:
+            user_id: User ID (ObjectId or string)
+        Returns:
+            List of matched user ObjectIds
+        """
+        collection = Match.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        matches = collection.find(
+            {'$or': [{'user_id_1': user_id}, {'user_id_2': user_id}]},
+            {'_id': 0, 'user_id_1': 1, 'user_id_2': 1}
+        )
+        return [
+            match['user_id_2'] if match['user_id_1'] == user_id else match['user_id_1']
+            for match in matches
+        ]
+    
+    @staticmethod
+    def _keyset_query(user_id, created_at, match_id, newer):
+        """
+        Build the filter for matches of a user before or after a keyset position
+        Each side of the $or is bounded by its (user_id_N, created_at, _id) index
+        Args:
+            user_id: User ObjectId
+            created_at: created_at of the keyset position
+            match_id: _id of the keyset position
+            newer: True for matches after the position, False for matches before it
+        Returns:
+            MongoDB filter document
+        """
+        if newer:
+            created_range = {'$gte': created_at}
+            after = {'created_at': {'$gt': created_at}}
+            tie = {'created_at': created_at, '_id': {'$gt': match_id}}
+        else:
+            created_range = {'$lte': created_at}
+            after = {'created_at': {'$lt': created_at}}
+            tie = {'created_at': created_at, '_id': {'$lt': match_id}}
+        
+        return {
+            '$or': [
+                {'user_id_1': user_id, 'created_at': created_range, '$or': [after, tie]},
+                {'user_id_2': user_id, 'created_at': created_range, '$or': [after, tie]}
+            ]
+        }
+    
+    @staticmethod
+    def version_for_user(user_id):
+        """
+        Get the values the matches ETag is derived from, using only the indexes
+        Args:
+            user_id: User ID (ObjectId or string)
+        Returns:
+            tuple: (match count, latest match dict with _id and created_at, or None)
+        """
+        collection = Match.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        query = {'$or': [{'user_id_1': user_id}, {'user_id_2': user_id}]}
+        count = collection.count_documents(query)
+        latest = collection.find_one(query, {'created_at': 1}, sort=[('created_at', -1), ('_id', -1)])
+        return count, latest
+    
+    @staticmethod
+    def page_query(user_id, before=None, after=None):
+        """
+        Build the filter and sort of one keyset page of a user's matches
+        Shared by find_page_by_user and the async (motor) model
+        Args:
+            user_id: User ID (ObjectId or string)
+            before: Optional (created_at, _id) position; older matches, most recent first
+            after: Optional (created_at, _id) position; newer matches, oldest first
+        Returns:
+            tuple: (MongoDB filter document, sort specification)
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        if after:
+            return Match._keyset_query(user_id, after[0], after[1], newer=True), [('created_at', 1), ('_id', 1)]
+        if before:
+            query = Match._keyset_query(user_id, before[0], before[1], newer=False)
+        else:
+            query = {'$or': [{'user_id_1': user_id}, {'user_id_2': user_id}]}
+        return query, [('created_at', -1), ('_id', -1)]
+    
+    @staticmethod
+    def find_page_by_user(user_id, limit, before=None, after=None, raw=False):
+        """
+        Find one page of matches for a user using keyset pagination
+        Args:
+            user_id: User ID (ObjectId or string)
+            limit: Maximum number of matches to return
+            before: Optional (created_at, _id) position; returns older matches, most recent first
+            after: Optional (created_at, _id) position; returns newer matches, oldest first
+            raw: Return lazily decoded RawBSONDocuments
+        Returns:
+            tuple: (list of match documents, has_more: bool)
+        """
+        collection = Match.get_collection(raw=raw)
+        query, sort = Match.page_query(user_id, before=before, after=after)
+        
+        # Read one extra document to know whether another page exists
+        matches = list(collection.find(query).sort(sort).limit(limit + 1))
+        has_more = len(matches) > limit
+        return matches[:limit], has_more
+    
     @staticmethod
     def to_dict(match_doc):
         """
@@ -108,16 +350,16 @@ class Match:
         Args:
             match_doc: MongoDB match document
         Returns:
-            dict representation
+            dict representation (ObjectId/datetime values are encoded by the app's JSON provider)
         """
         if not match_doc:
             return None
         
         match_dict = {
-            '_id': str(match_doc['_id']),
-            'user_id_1': str(match_doc['user_id_1']),
-            'user_id_2': str(match_doc['user_id_2']),
-            'created_at': match_doc.get('created_at').isoformat() if match_doc.get('created_at') else None
+            '_id': match_doc['_id'],
+            'user_id_1': match_doc['user_id_1'],
+            'user_id_2': match_doc['user_id_2'],
+            'created_at': match_doc.get('created_at')
         }
         return match_dict
 
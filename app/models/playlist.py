@@ -1,19 +1,54 @@
 from datetime import datetime
 from bson import ObjectId
-from app import db
+from pymongo import IndexModel, ASCENDING
+from app.storage import get_storage
+from app.utils.raw_bson import raw_collection
+from app.utils.compatibility import profile_cache
+from app.utils.minhash import get_index, playlist_tokens
 
 
 class Playlist:
     """Playlist model for MongoDB operations"""
     
     COLLECTION_NAME = 'playlists'
+    INDEXES = [
+        IndexModel([('user_id', ASCENDING)], unique=True, name='user_id_unique'),
+        # MinHash index refresh: playlists changed since the last pass
+        IndexModel([('updated_at', ASCENDING)], name='updated_at')
+    ]
     
     @staticmethod
-    def get_collection():
-        """Get the playlists collection"""
-        if db is None:
-            raise ConnectionError("MongoDB connection not available. Please check your MONGODB_URI.")
-        return db[Playlist.COLLECTION_NAME]
+    def get_collection(raw=False):
+        """
+        Get the playlists collection
+        Args:
+            raw: Return RawBSONDocuments instead of dicts (read-only use)
+        """
+        collection = get_storage().collection(Playlist.COLLECTION_NAME)
+        return raw_collection(collection) if raw else collection
+    
+    @staticmethod
+    def ensure_indexes():
+        """
+        Create the indexes declared in INDEXES (idempotent)
+        Returns:
+            List of index names
+        """
+        collection = Playlist.get_collection()
+        return collection.create_indexes(Playlist.INDEXES)
+    
+    @staticmethod
+    def query_shapes():
+        """
+        Representative queries issued by this model, used by the index audit
+        Returns:
+            List of (name, filter, sort) tuples
+        """
+        return [
+            ('find_by_user_id', {'user_id': ObjectId()}, None),
+            ('find_by_user_ids', {'user_id': {'$in': [ObjectId(), ObjectId()]}}, None),
+            ('find_updated_since', {'updated_at': {'$gt': datetime.utcnow()}}, [('updated_at', ASCENDING)])
+        ]
     
     @staticmethod
     def create(playlist_data):
@@ -35,18 +70,65 @@ class Playlist:
         return playlist_data
     
     @staticmethod
-    def find_by_user_id(user_id):
+    def find_by_user_id(user_id, raw=False, projection=None):
         """
         Find playlist by user ID
         Args:
             user_id: User ObjectId or string
+            raw: Return a lazily decoded RawBSONDocument
+            projection: Optional field projection
         Returns:
             Playlist document or None
         """
-        collection = Playlist.get_collection()
+        collection = Playlist.get_collection(raw=raw)
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
-        return collection.find_one({'user_id': user_id})
+        return collection.find_one({'user_id': user_id}, projection)
+    
+    @staticmethod
+    def find_version(user_id):
+        """
+        Read only the fields the playlist ETag is derived from
+        Args:
+            user_id: User ObjectId or string
+        Returns:
+            dict with _id and updated_at, or None
+        """
+        return Playlist.find_by_user_id(user_id, projection={'updated_at': 1})
+    
+    @staticmethod
+    def find_by_user_ids(user_ids):
+        """
+        Find the playlists of several users in a single query
+        Args:
+            user_ids: Iterable of user ObjectIds or strings
+        Returns:
+            dict mapping user ObjectId to playlist document
+        """
+        collection = Playlist.get_collection()
+        object_ids = [ObjectId(user_id) if isinstance(user_id, str) else user_id for user_id in user_ids]
+        if not object_ids:
+            return {}
+        
+        playlists = collection.find({'user_id': {'$in': object_ids}}, {'user_id': 1, 'songs': 1})
+        return {playlist['user_id']: playlist for playlist in playlists}
+    
+    @staticmethod
+    def find_updated_since(since, limit):
+        """
+        Find the playlists changed after a point in time, oldest change first
+        Args:
+            since: datetime (naive UTC)
+            limit: Maximum number of playlists
+        Returns:
+            List of playlist documents with user_id, songs and updated_at
+        """
+        collection = Playlist.get_collection()
+        cursor = collection.find(
+            {'updated_at': {'$gt': since}},
+            {'user_id': 1, 'songs': 1, 'updated_at': 1}
+        ).sort('updated_at', ASCENDING).limit(limit)
+        return list(cursor)
     
     @staticmethod
     def update_or_create(user_id, songs):
@@ -77,13 +159,18 @@ class Playlist:
                 {'$set': playlist_data},
                 return_document=True
             )
-            return result
         else:
             # Create new playlist
             playlist_data['created_at'] = datetime.utcnow()
-            result = collection.insert_one(playlist_data)
-            playlist_data['_id'] = result.inserted_id
-            return playlist_data
+            insert_result = collection.insert_one(playlist_data)
+            playlist_data['_id'] = insert_result.inserted_id
+            result = playlist_data
+        
+        # Keep this worker's MinHash LSH index and compatibility profiles in sync with the new songs
+        # (other workers pick the change up through their IndexRefresher)
+        get_index().update(user_id, playlist_tokens(playlist_data), updated_at=playlist_data['updated_at'])
+        profile_cache.invalidate(user_id)
+        return result
     
     @staticmethod
     def to_dict(playlist_doc):
@@ -92,17 +179,17 @@ class Playlist:
         Args:
             playlist_doc: MongoDB playlist document
         Returns:
-            dict representation
+            dict representation (ObjectId/datetime values are encoded by the app's JSON provider)
         """
         if not playlist_doc:
             return None
         
         playlist_dict = {
-            '_id': str(playlist_doc['_id']),
-            'user_id': str(playlist_doc['user_id']),
+            '_id': playlist_doc['_id'],
+            'user_id': playlist_doc['user_id'],
             'songs': playlist_doc.get('songs', []),
-            'created_at': playlist_doc.get('created_at').isoformat() if playlist_doc.get('created_at') else None,
-            'updated_at': playlist_doc.get('updated_at').isoformat() if playlist_doc.get('updated_at') else None
+            'created_at': playlist_doc.get('created_at'),
+            'updated_at': playlist_doc.get('updated_at')
         }
         return playlist_dict
 
@@ -1,19 +1,49 @@
 from datetime import datetime
 from bson import ObjectId
-from app import db
+from pymongo import IndexModel, ASCENDING, ReturnDocument, UpdateOne, DeleteOne
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from app.storage import get_storage
 
 
 class SwipeRight:
     """SwipeRight model for MongoDB operations"""
     
     COLLECTION_NAME = 'swipe_right'
+    INDEXES = [
+        IndexModel(
+            [('user_id', ASCENDING), ('swiped_user_id', ASCENDING)],
+            unique=True,
+            name='user_id_swiped_user_id_unique'
+        )
+    ]
     
     @staticmethod
     def get_collection():
         """Get the swipe_right collection"""
-        if db is None:
-            raise ConnectionError("MongoDB connection not available. Please check your MONGODB_URI.")
-        return db[SwipeRight.COLLECTION_NAME]
+        return get_storage().collection(SwipeRight.COLLECTION_NAME)
+    
+    @staticmethod
+    def ensure_indexes():
+        """
+        Create the indexes declared in INDEXES (idempotent)
+        Returns:
+            List of index names
+        """
+        collection = SwipeRight.get_collection()
+        return collection.create_indexes(SwipeRight.INDEXES)
+    
+    @staticmethod
+    def query_shapes():
+        """
+        Representative queries issued by this model, used by the index audit
+        Returns:
+            List of (name, filter, sort) tuples
+        """
+        return [
+            ('find_by_users', {'user_id': ObjectId(), 'swiped_user_id': ObjectId()}, None),
+            ('find_swiped_user_ids', {'user_id': ObjectId()}, None),
+            ('find_swipers_among', {'user_id': {'$in': [ObjectId(), ObjectId()]}, 'swiped_user_id': ObjectId()}, None)
+        ]
     
     @staticmethod
     def create(user_id, swiped_user_id):
@@ -23,7 +53,21 @@ class SwipeRight:
             user_id: User who made the swipe (ObjectId or string)
             swiped_user_id: User who was swiped right (ObjectId or string)
         Returns:
-            Inserted swipe_right document with _id
+            Inserted (or already existing) swipe_right document with _id
+        """
+        swipe, _ = SwipeRight.upsert(user_id, swiped_user_id)
+        return swipe
+    
+    @staticmethod
+    def upsert(user_id, swiped_user_id):
+        """
+        Record a swipe right in a single round trip, relying on the unique
+        (user_id, swiped_user_id) index instead of a find-then-insert
+        Args:
+            user_id: User who made the swipe (ObjectId or string)
+            swiped_user_id: User who was swiped right (ObjectId or string)
+        Returns:
+            tuple: (swipe_right document, created: bool)
         """
         collection = SwipeRight.get_collection()
         if isinstance(user_id, str):
@@ -31,24 +75,136 @@ class SwipeRight:
         if isinstance(swiped_user_id, str):
             swiped_user_id = ObjectId(swiped_user_id)
         
-        swipe_data = {
-            'user_id': user_id,
-            'swiped_user_id': swiped_user_id,
-            'created_at': datetime.utcnow()
-        }
+        swipe_filter = {'user_id': user_id, 'swiped_user_id': swiped_user_id}
+        new_id = ObjectId()
+        try:
+            swipe = collection.find_one_and_update(
+                swipe_filter,
+                {'$setOnInsert': {'_id': new_id, 'created_at': datetime.utcnow()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent upsert of the same swipe won the insert
+            swipe = collection.find_one(swipe_filter)
+        return swipe, swipe['_id'] == new_id
+    
+    @staticmethod
+    def bulk_upsert(user_id, swiped_user_ids):
+        """
+        Record several swipes by one user with a single unordered bulk_write
+        Args:
+            user_id: User who made the swipes (ObjectId or string)
+            swiped_user_ids: List of swiped user ObjectIds (no duplicates)
+        Returns:
+            dict mapping swiped user ObjectId to its swipe_right document,
+            with an extra 'created' flag
+        """
+        collection = SwipeRight.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        if not swiped_user_ids:
+            return {}
         
-        # Check if swipe already exists to avoid duplicates
-        existing = collection.find_one({
+        now = datetime.utcnow()
+        new_ids = [ObjectId() for _ in swiped_user_ids]
+        operations = [
+            UpdateOne(
+                {'user_id': user_id, 'swiped_user_id': swiped_user_id},
+                {'$setOnInsert': {'_id': new_id, 'created_at': now}},
+                upsert=True
+            )
+            for swiped_user_id, new_id in zip(swiped_user_ids, new_ids)
+        ]
+        try:
+            upserted = collection.bulk_write(operations, ordered=False).upserted_ids
+        except BulkWriteError as e:
+            # Duplicate keys mean a concurrent request recorded the same swipe
+            if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+            upserted = {item['index']: item['_id'] for item in e.details.get('upserted', [])}
+        
+        swipes = {}
+        existing_ids = []
+        for index, swiped_user_id in enumerate(swiped_user_ids):
+            if index in upserted:
+                swipes[swiped_user_id] = {
+                    '_id': upserted[index],
+                    'user_id': user_id,
+                    'swiped_user_id': swiped_user_id,
+                    'created_at': now,
+                    'created': True
+                }
+            else:
+                existing_ids.append(swiped_user_id)
+        
+        if existing_ids:
+            for swipe in collection.find({'user_id': user_id, 'swiped_user_id': {'$in': existing_ids}}):
+                swipe['created'] = False
+                swipes[swipe['swiped_user_id']] = swipe
+        return swipes
+    
+    @staticmethod
+    def find_swipers_among(user_id, candidate_ids):
+        """
+        Find which of several users have swiped right on a user, in one query
+        Args:
+            user_id: Swiped user ID (ObjectId or string)
+            candidate_ids: List of user ObjectIds that may have swiped
+        Returns:
+            set of user ObjectIds that swiped right on user_id
+        """
+        collection = SwipeRight.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        if not candidate_ids:
+            return set()
+        
+        swipes = collection.find(
+            {'user_id': {'$in': candidate_ids}, 'swiped_user_id': user_id},
+            {'_id': 0, 'user_id': 1}
+        )
+        return {swipe['user_id'] for swipe in swipes}
+    
+    @staticmethod
+    def bulk_delete_pairs(pairs):
+        """
+        Delete several swipe right relationships with a single unordered bulk_write
+        Args:
+            pairs: List of (user_id, swiped_user_id) ObjectId tuples
+        Returns:
+            Number of deleted documents
+        """
+        collection = SwipeRight.get_collection()
+        if not pairs:
+            return 0
+        
+        operations = [
+            DeleteOne({'user_id': user_id, 'swiped_user_id': swiped_user_id})
+            for user_id, swiped_user_id in pairs
+        ]
+        return collection.bulk_write(operations, ordered=False).deleted_count
+    
+    @staticmethod
+    def pop(user_id, swiped_user_id):
+        """
+        Atomically find and delete a swipe right relationship
+        Args:
+            user_id: User ID (ObjectId or string)
+            swiped_user_id: Swiped user ID (ObjectId or string)
+        Returns:
+            Deleted swipe_right document or None
+        """
+        collection = SwipeRight.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        if isinstance(swiped_user_id, str):
+            swiped_user_id = ObjectId(swiped_user_id)
+        
+        return collection.find_one_and_delete({
             'user_id': user_id,
             'swiped_user_id': swiped_user_id
         })
-        
-        if existing:
-            return existing
-        
-        result = collection.insert_one(swipe_data)
-        swipe_data['_id'] = result.inserted_id
-        return swipe_data
     
     @staticmethod
     def find_by_users(user_id, swiped_user_id):
@@ -71,6 +227,22 @@ class SwipeRight:
             'swiped_user_id': swiped_user_id
         })
     
+    @staticmethod
+    def find_swiped_user_ids(user_id):
+        """
+        Find the IDs of every user a user has swiped right on
+        Args:
+            user_id: User ID (ObjectId or string)
+        Returns:
+            List of swiped user ObjectIds
+        """
+        collection = SwipeRight.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        swipes = collection.find({'user_id': user_id}, {'_id': 0, 'swiped_user_id': 1})
+        return [swipe['swiped_user_id'] for swipe in swipes]
+    
     @staticmethod
     def delete_by_users(user_id, swiped_user_id):
         """
@@ -101,16 +273,16 @@ class SwipeRight:
         Args:
             swipe_doc: MongoDB swipe_right document
         Returns:
-            dict representation
+            dict representation (ObjectId/datetime values are encoded by the app's JSON provider)
         """
         if not swipe_doc:
             return None
         
         swipe_dict = {
-            '_id': str(swipe_doc['_id']),
-            'user_id': str(swipe_doc['user_id']),
-            'swiped_user_id': str(swipe_doc['swiped_user_id']),
-            'created_at': swipe_doc.get('created_at').isoformat() if swipe_doc.get('created_at') else None
+            '_id': swipe_doc['_id'],
+            'user_id': swipe_doc['user_id'],
+            'swiped_user_id': swipe_doc['swiped_user_id'],
+            'created_at': swipe_doc.get('created_at')
         }
         return swipe_dict
 
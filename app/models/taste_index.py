@@ -0,0 +1,204 @@
+import zlib
+from datetime import datetime
+import numpy as np
+from bson import ObjectId
+from pymongo import ASCENDING, DeleteOne, IndexModel, UpdateOne
+from app.storage import get_storage
+from app.utils.compatibility import normalize
+
+# User fields feeding the inverted index and their token namespaces
+INDEXED_FIELDS = {
+    'favorite_artists': 'artist',
+    'favorite_genres': 'genre'
+}
+
+# Documents each posting list is split into, by a hash of the user ID. Every
+# ID takes ~20 bytes in a BSON array, so even a token shared by 10M users
+# leaves buckets of ~3 MB, well below the 16 MB document limit, and adding or
+# removing a user rewrites one bucket instead of the whole list. Changing it
+# requires `flask db rebuild-taste-index`
+BUCKETS = 64
+
+
+def bucket_of(user_id):
+    """
+    Get the posting list bucket of a user
+    Args:
+        user_id: User ObjectId
+    Returns:
+        int in [0, BUCKETS)
+    """
+    return zlib.crc32(user_id.binary) % BUCKETS
+
+
+class TasteIndex:
+    """TasteIndex model for MongoDB operations
+    
+    Inverted index from a normalized artist or genre token to the IDs of the
+    users who list it among their favorites. Each token's posting list is
+    spread over up to BUCKETS documents {token, bucket, user_ids}, with
+    user_ids kept sorted in ObjectId (byte) order.
+    """
+    
+    COLLECTION_NAME = 'taste_index'
+    INDEXES = [
+        IndexModel([('token', ASCENDING), ('bucket', ASCENDING)], unique=True, name='token_bucket_unique')
+    ]
+    
+    @staticmethod
+    def get_collection():
+        """Get the taste_index collection"""
+        return get_storage().collection(TasteIndex.COLLECTION_NAME)
+    
+    @staticmethod
+    def ensure_indexes():
+        """
+        Create the indexes declared in INDEXES (idempotent)
+        Returns:
+            List of index names
+        """
+        collection = TasteIndex.get_collection()
+        return collection.create_indexes(TasteIndex.INDEXES)
+    
+    @staticmethod
+    def query_shapes():
+        """
+        Representative queries issued by this model, used by the index audit
+        Returns:
+            List of (name, filter, sort) tuples
+        """
+        return [
+            ('find_candidates', {'token': {'$in': ['artist:audit', 'genre:audit']}}, None),
+            ('update_user', {'token': 'artist:audit', 'bucket': 0}, None)
+        ]
+    
+    @staticmethod
+    def tokens_for(user_doc):
+        """
+        Get the index tokens of a user document
+        Args:
+            user_doc: User document (or partial document with favorite arrays)
+        Returns:
+            set of namespaced tokens, e.g. 'artist:queen' or 'genre:rock'
+        """
+        tokens = set()
+        for field, namespace in INDEXED_FIELDS.items():
+            for value in user_doc.get(field) or []:
+                tokens.add(f"{namespace}:{normalize(value)}")
+        return tokens
+    
+    @staticmethod
+    def update_user(user_id, old_tokens, new_tokens):
+        """
+        Move a user between posting lists after their favorites changed
+        Only the user's bucket of each posting list is updated
+        Args:
+            user_id: User ObjectId or string
+            old_tokens: Tokens the user was indexed under
+            new_tokens: Tokens the user should be indexed under
+        Returns:
+            Number of posting lists touched
+        """
+        collection = TasteIndex.get_collection()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        bucket = bucket_of(user_id)
+        operations = []
+        for token in old_tokens - new_tokens:
+            operations.append(UpdateOne({'token': token, 'bucket': bucket}, {'$pull': {'user_ids': user_id}}))
+            operations.append(DeleteOne({'token': token, 'bucket': bucket, 'user_ids': {'$size': 0}}))
+        for token in new_tokens - old_tokens:
+            # $addToSet cannot keep the array sorted: create the bucket, then
+            # $push with $sort unless the user is already in it
+            operations.append(UpdateOne(
+                {'token': token, 'bucket': bucket},
+                {'$setOnInsert': {'user_ids': []}},
+                upsert=True
+            ))
+            operations.append(UpdateOne(
+                {'token': token, 'bucket': bucket, 'user_ids': {'$ne': user_id}},
+                {'$push': {'user_ids': {'$each': [user_id], '$sort': 1}}}
+            ))
+        
+        if operations:
+            collection.bulk_write(operations, ordered=True)
+        return len(old_tokens ^ new_tokens)
+    
+    @staticmethod
+    def rebuild(users_collection):
+        """
+        Rebuild the whole index from the users collection
+        Args:
+            users_collection: pymongo users collection
+        Returns:
+            Number of posting lists written
+        """
+        collection = TasteIndex.get_collection()
+        
+        postings = {}
+        projection = {field: 1 for field in INDEXED_FIELDS}
+        for user in users_collection.find({}, projection):
+            bucket = bucket_of(user['_id'])
+            for token in TasteIndex.tokens_for(user):
+                postings.setdefault((token, bucket), []).append(user['_id'])
+        
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {'token': token, 'bucket': bucket},
+                {'$set': {'user_ids': sorted(user_ids), 'rebuilt_at': now}},
+                upsert=True
+            )
+            for (token, bucket), user_ids in postings.items()
+        ]
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        # Buckets no user is left in (and documents of the former one-per-token layout)
+        collection.delete_many({'rebuilt_at': {'$ne': now}})
+        return len({token for token, _ in postings})
+    
+    @staticmethod
+    def find_candidates(tokens, exclude_ids=None, limit=None):
+        """
+        Merge the posting lists of a set of tokens into ranked candidates
+        Reads only the posting lists of the given tokens, so the cost grows with
+        the number of users sharing a taste rather than the total number of users
+        Args:
+            tokens: Iterable of namespaced tokens (see tokens_for)
+            exclude_ids: Optional set of user ObjectIds to leave out
+            limit: Optional maximum number of candidates to return
+        Returns:
+            List of (user ObjectId, shared token count) sorted by descending count
+        """
+        collection = TasteIndex.get_collection()
+        tokens = list(tokens)
+        if not tokens:
+            return []
+        
+        postings = [
+            np.frombuffer(b''.join(user_id.binary for user_id in posting['user_ids']), dtype='S12')
+            for posting in collection.find({'token': {'$in': tokens}}, {'user_ids': 1, '_id': 0})
+            if posting.get('user_ids')
+        ]
+        if not postings:
+            return []
+        
+        # The buckets are sorted runs, which a stable (tim)sort merges in about
+        # linear time; a user is in one bucket of a posting list, once, so the
+        # length of each run of equal IDs is the number of shared tokens
+        merged = np.concatenate(postings)
+        merged.sort(kind='stable')
+        starts = np.flatnonzero(np.concatenate(([True], merged[1:] != merged[:-1])))
+        user_ids = merged[starts]
+        counts = np.diff(np.append(starts, len(merged)))
+        if exclude_ids:
+            excluded = np.array([user_id.binary for user_id in exclude_ids], dtype='S12')
+            keep = ~np.isin(user_ids, excluded)
+            user_ids, counts = user_ids[keep], counts[keep]
+        
+        order = np.argsort(-counts, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        # tobytes() keeps trailing NUL bytes that numpy strips from 'S12' scalars
+        return [(ObjectId(user_ids[i:i + 1].tobytes()), int(counts[i])) for i in order]
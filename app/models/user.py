@@ -1,19 +1,146 @@
 from datetime import datetime
 from bson import ObjectId
-from app import db
+from pymongo import IndexModel, ASCENDING, ReturnDocument
+from app.storage import get_storage
+from app.utils.raw_bson import raw_collection
+from app.config import Config
+from app.utils.cache import LRUTTLCache, NullCache
+from app.models.taste_index import TasteIndex, INDEXED_FIELDS
+from app.utils.compatibility import PROFILE_FIELDS, profile_cache
+
+
+def apply_projection(doc, projection):
+    """
+    Apply a MongoDB-style field projection to a document already in memory
+    Args:
+        doc: Full document
+        projection: Inclusion ({'field': 1}) or exclusion ({'field': 0}) dict, or None
+    Returns:
+        Projected copy of the document
+    """
+    if projection is None:
+        return dict(doc)
+    
+    fields = {field: value for field, value in projection.items() if field != '_id'}
+    inclusion = any(fields.values()) if fields else bool(projection.get('_id'))
+    if not inclusion:
+        # Exclusion projection, e.g. {'password': 0} or {'_id': 0} alone
+        return {field: value for field, value in doc.items() if projection.get(field, 1)}
+    
+    projected = {field: doc[field] for field, value in fields.items() if value and field in doc}
+    if projection.get('_id', 1) and '_id' in doc:
+        projected['_id'] = doc['_id']
+    return projected
+
+
+def _create_cache():
+    """Build the user cache backend from the configuration"""
+    if not Config.USER_CACHE_ENABLED:
+        return NullCache()
+    return LRUTTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL_SECONDS)
 
 
 class User:
     """User model for MongoDB operations"""
     
     COLLECTION_NAME = 'users'
+    # Read-through cache for find_by_id/find_by_email; see set_cache_backend
+    cache = _create_cache()
+    INDEXES = [
+        IndexModel([('email', ASCENDING)], unique=True, name='email_unique')
+    ]
+    
+    # Projections of the purpose-specific lookups
+    EXISTS_PROJECTION = {'_id': 1}
+    # Fields shown on a profile card (everything to_dict returns)
+    CARD_PROJECTION = {
+        'email': 1,
+        'favorite_songs': 1,
+        'favorite_artists': 1,
+        'favorite_genres': 1,
+        'spotify_username': 1,
+        'created_at': 1,
+        'updated_at': 1
+    }
+    AUTH_PROJECTION = {'email': 1, 'password': 1}
+    TASTE_PROJECTION = {'favorite_songs': 1, 'favorite_artists': 1, 'favorite_genres': 1}
+    # Fields the profile ETag is derived from
+    VERSION_PROJECTION = {'updated_at': 1}
     
     @staticmethod
-    def get_collection():
-        """Get the users collection"""
-        if db is None:
-            raise ConnectionError("MongoDB connection not available. Please check your MONGODB_URI.")
-        return db[User.COLLECTION_NAME]
+    def get_collection(raw=False):
+        """
+        Get the users collection
+        Args:
+            raw: Return RawBSONDocuments instead of dicts (read-only use)
+        """
+        collection = get_storage().collection(User.COLLECTION_NAME)
+        return raw_collection(collection) if raw else collection
+    
+    @staticmethod
+    def ensure_indexes():
+        """
+        Create the indexes declared in INDEXES (idempotent)
+        Returns:
+            List of index names
+        """
+        collection = User.get_collection()
+        return collection.create_indexes(User.INDEXES)
+    
+    @staticmethod
+    def query_shapes():
+        """
+        Representative queries issued by this model, used by the index audit
+        Returns:
+            List of (name, filter, sort) tuples
+        """
+        return [
+            ('find_by_email', {'email': 'audit@example.com'}, None),
+            ('find_by_id', {'_id': ObjectId()}, None),
+            ('find_by_ids', {'_id': {'$in': [ObjectId(), ObjectId()]}}, None),
+            ('find_existing_ids', {'_id': {'$in': [ObjectId(), ObjectId()]}}, None),
+            # $match stage of the $sample pipeline of DiscoverDeck.sample_candidates
+            ('sample_candidates', {'_id': {'$nin': [ObjectId(), ObjectId()]}}, None)
+        ]
+    
+    @staticmethod
+    def set_cache_backend(backend):
+        """
+        Replace the user cache backend (e.g. with a shared store)
+        Args:
+            backend: CacheBackend implementation
+        """
+        User.cache = backend
+    
+    @staticmethod
+    def cache_stats():
+        """
+        Get user cache counters
+        Returns:
+            dict with hits, misses, evictions, expirations and size
+        """
+        return User.cache.stats()
+    
+    @staticmethod
+    def _cache_user(user_doc):
+        """Store a user document under both its ID and email keys"""
+        if user_doc:
+            User.cache.set(f"id:{user_doc['_id']}", user_doc)
+            if user_doc.get('email'):
+                User.cache.set(f"email:{user_doc['email']}", user_doc)
+    
+    @staticmethod
+    def invalidate_cache(user_id, email=None):
+        """
+        Drop a user from the cache
+        Args:
+            user_id: User ObjectId or string
+            email: Optional email of the user
+        """
+        keys = [f"id:{user_id}"]
+        if email:
+            keys.append(f"email:{email}")
+        User.cache.delete(*keys)
     
     @staticmethod
     def create(user_data):
@@ -29,33 +156,170 @@ class User:
         user_data['updated_at'] = datetime.utcnow()
         result = collection.insert_one(user_data)
         user_data['_id'] = result.inserted_id
+        User._reindex_tastes(user_data['_id'], {}, user_data)
         return user_data
     
     @staticmethod
-    def find_by_email(email):
+    def find_by_email(email, projection=None):
         """
         Find user by email
         Args:
             email: User email
+            projection: Optional field projection (partial documents are not cached)
         Returns:
             User document or None
         """
+        cached = User.cache.get(f"email:{email}")
+        if cached is not None:
+            return apply_projection(cached, projection)
+        
         collection = User.get_collection()
-        return collection.find_one({'email': email})
+        if projection is not None:
+            return collection.find_one({'email': email}, projection)
+        user = collection.find_one({'email': email})
+        User._cache_user(user)
+        return dict(user) if user else None
     
     @staticmethod
-    def find_by_id(user_id):
+    def find_by_id(user_id, projection=None, raw=False):
         """
         Find user by ID
         Args:
             user_id: User ObjectId or string
+            projection: Optional field projection (partial documents are not cached)
+            raw: Return a lazily decoded RawBSONDocument on a cache miss (not cached)
         Returns:
             User document or None
         """
-        collection = User.get_collection()
+        cached = User.cache.get(f"id:{user_id}")
+        if cached is not None:
+            return apply_projection(cached, projection)
+        
+        collection = User.get_collection(raw=raw)
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
-        return collection.find_one({'_id': user_id})
+        if projection is not None or raw:
+            return collection.find_one({'_id': user_id}, projection)
+        user = collection.find_one({'_id': user_id})
+        User._cache_user(user)
+        return dict(user) if user else None
+    
+    @staticmethod
+    def find_version(user_id):
+        """
+        Read a user's updated_at straight from the database, bypassing the cache
+        (another worker may have updated the user); a cached copy older than it is dropped
+        Args:
+            user_id: User ObjectId or string
+        Returns:
+            Document limited to VERSION_PROJECTION or None
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        version = User.get_collection().find_one({'_id': user_id}, User.VERSION_PROJECTION)
+        User._drop_stale(user_id, version)
+        return version
+    
+    @staticmethod
+    def _drop_stale(user_id, version):
+        """Drop the cached copy of a user whose updated_at differs from the stored one"""
+        cached = User.cache.get(f"id:{user_id}")
+        if cached is not None and (version is None or cached.get('updated_at') != version.get('updated_at')):
+            User.invalidate_cache(user_id, cached.get('email'))
+    
+    @staticmethod
+    def exists(user_id):
+        """
+        Check that a user exists, reading only its _id
+        Args:
+            user_id: User ObjectId or string
+        Returns:
+            bool
+        """
+        return User.find_by_id(user_id, User.EXISTS_PROJECTION) is not None
+    
+    @staticmethod
+    def email_exists(email):
+        """
+        Check whether an email is already registered, reading only its _id
+        Args:
+            email: User email
+        Returns:
+            bool
+        """
+        return User.find_by_email(email, User.EXISTS_PROJECTION) is not None
+    
+    @staticmethod
+    def find_card_by_id(user_id, raw=False):
+        """
+        Find the public profile fields of a user (no password hash)
+        Args:
+            user_id: User ObjectId or string
+            raw: Return a lazily decoded RawBSONDocument on a cache miss
+        Returns:
+            User document limited to CARD_PROJECTION or None
+        """
+        return User.find_by_id(user_id, User.CARD_PROJECTION, raw=raw)
+    
+    @staticmethod
+    def find_auth_by_email(email):
+        """
+        Find the fields needed to authenticate a user
+        Args:
+            email: User email
+        Returns:
+            User document limited to _id, email and password or None
+        """
+        return User.find_by_email(email, User.AUTH_PROJECTION)
+    
+    @staticmethod
+    def find_existing_ids(user_ids):
+        """
+        Check which of several users exist, querying only those not found in the cache
+        Users are never deleted, so a user seen once (cached document or
+        existence marker) is known to exist without a round trip
+        Args:
+            user_ids: Iterable of user ObjectIds or strings
+        Returns:
+            set of existing user ObjectIds
+        """
+        object_ids = [ObjectId(user_id) if isinstance(user_id, str) else user_id for user_id in user_ids]
+        if not object_ids:
+            return set()
+        
+        cached = User.cache.get_many(
+            [f"exists:{object_id}" for object_id in object_ids] + [f"id:{object_id}" for object_id in object_ids]
+        )
+        existing = {
+            object_id for object_id, marker, doc in zip(object_ids, cached, cached[len(object_ids):])
+            if marker is not None or doc is not None
+        }
+        missing = [object_id for object_id in object_ids if object_id not in existing]
+        if missing:
+            collection = User.get_collection()
+            for user in collection.find({'_id': {'$in': missing}}, {'_id': 1}):
+                existing.add(user['_id'])
+                User.cache.set(f"exists:{user['_id']}", True)
+        return existing
+    
+    @staticmethod
+    def find_by_ids(user_ids, projection=None, raw=False):
+        """
+        Find several users in a single query, excluding the password hash
+        Args:
+            user_ids: Iterable of user ObjectIds or strings
+            projection: Optional field projection (defaults to CARD_PROJECTION)
+            raw: Return lazily decoded RawBSONDocuments
+        Returns:
+            dict mapping user ObjectId to user document
+        """
+        collection = User.get_collection(raw=raw)
+        object_ids = [ObjectId(user_id) if isinstance(user_id, str) else user_id for user_id in user_ids]
+        if not object_ids:
+            return {}
+        
+        users = collection.find({'_id': {'$in': object_ids}}, projection or User.CARD_PROJECTION)
+        return {user['_id']: user for user in users}
     
     @staticmethod
     def update(user_id, update_data):
@@ -72,36 +336,72 @@ class User:
             user_id = ObjectId(user_id)
         
         update_data['updated_at'] = datetime.utcnow()
-        result = collection.find_one_and_update(
+        if not any(field in update_data for field in INDEXED_FIELDS):
+            result = collection.find_one_and_update(
+                {'_id': user_id},
+                {'$set': update_data},
+                return_document=True
+            )
+            if result:
+                User.invalidate_cache(user_id, result.get('email'))
+                if any(field in update_data for field in PROFILE_FIELDS):
+                    profile_cache.invalidate(user_id)
+            return result
+        
+        # Favorites changed - keep the previous version to update the taste index
+        previous = collection.find_one_and_update(
             {'_id': user_id},
             {'$set': update_data},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
+        if not previous:
+            return None
+        
+        result = dict(previous)
+        result.update(update_data)
+        User.invalidate_cache(user_id, previous.get('email'))
+        profile_cache.invalidate(user_id)
+        User._reindex_tastes(user_id, previous, result)
         return result
     
     @staticmethod
-    def find_random_user(exclude_user_id):
+    def set_password(user_id, password_hash):
         """
-        Find a random user excluding the specified user
+        Replace a user's password hash without touching updated_at
         Args:
-            exclude_user_id: User ID to exclude (ObjectId or string)
+            user_id: User ObjectId or string
+            password_hash: New bcrypt hash string
         Returns:
-            User document or None
+            True if the user was updated
         """
         collection = User.get_collection()
-        if isinstance(exclude_user_id, str):
-            exclude_user_id = ObjectId(exclude_user_id)
-        
-        # Use aggregation pipeline to get a random user excluding the current user
-        pipeline = [
-            {'$match': {'_id': {'$ne': exclude_user_id}}},
-            {'$sample': {'size': 1}}
-        ]
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
         
-        result = list(collection.aggregate(pipeline))
-        if result:
-            return result[0]
-        return None
+        user = collection.find_one_and_update(
+            {'_id': user_id},
+            {'$set': {'password': password_hash}},
+            projection={'email': 1}
+        )
+        if not user:
+            return False
+        User.invalidate_cache(user_id, user.get('email'))
+        return True
+    
+    @staticmethod
+    def _reindex_tastes(user_id, old_doc, new_doc):
+        """
+        Update the artist/genre inverted index after a user's favorites changed
+        Args:
+            user_id: User ObjectId
+            old_doc: Previous user document (empty dict for new users)
+            new_doc: Current user document
+        """
+        try:
+            TasteIndex.update_user(user_id, TasteIndex.tokens_for(old_doc), TasteIndex.tokens_for(new_doc))
+        except Exception as e:
+            # The index can be rebuilt with `flask db rebuild-taste-index`
+            print(f"⚠ Warning: Failed to update taste index for {user_id}: {str(e)}")
     
     @staticmethod
     def to_dict(user_doc):
@@ -110,20 +410,20 @@ class User:
         Args:
             user_doc: MongoDB user document
         Returns:
-            dict without password field
+            dict without password field (ObjectId/datetime values are encoded by the app's JSON provider)
         """
         if not user_doc:
             return None
         
         user_dict = {
-            '_id': str(user_doc['_id']),
+            '_id': user_doc['_id'],
             'email': user_doc.get('email'),
             'favorite_songs': user_doc.get('favorite_songs', []),
             'favorite_artists': user_doc.get('favorite_artists', []),
             'favorite_genres': user_doc.get('favorite_genres', []),
             'spotify_username': user_doc.get('spotify_username'),
-            'created_at': user_doc.get('created_at').isoformat() if user_doc.get('created_at') else None,
-            'updated_at': user_doc.get('updated_at').isoformat() if user_doc.get('updated_at') else None
+            'created_at': user_doc.get('created_at'),
+            'updated_at': user_doc.get('updated_at')
         }
         return user_dict
 
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.controllers.auth_controller import register_user, login_user
+from app.utils.errors import failure_response, retry_after_headers
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -13,9 +14,10 @@ def register():
             return jsonify({'error': 'Request body is required', 'status_code': 400}), 400
         
         response, status_code = register_user(data)
-        return jsonify(response), status_code
+        return jsonify(response), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
 
 @auth_bp.route('/login', methods=['POST'])
@@ -27,7 +29,8 @@ def login():
             return jsonify({'error': 'Request body is required', 'status_code': 400}), 400
         
         response, status_code = login_user(data)
-        return jsonify(response), status_code
+        return jsonify(response), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
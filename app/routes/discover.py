@@ -1,6 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from app.middleware.auth_middleware import require_auth
-from app.controllers.discover_controller import get_random_user, swipe_right, get_user_matches
+from app.controllers.discover_controller import (
+    get_random_user,
+    swipe_right,
+    swipe_right_batch,
+    get_user_matches,
+    get_matches_etag,
+    stream_match_events
+)
+from app.config import Config
+from app.utils.deadline import no_deadline
+from app.utils.etag import is_not_modified, not_modified_response, set_etag
+from app.utils.pagination import parse_limit
+from app.utils.errors import failure_response, retry_after_headers
+from app.utils.match_events import sync_stream_slots
 
 discover_bp = Blueprint('discover', __name__)
 
@@ -12,9 +25,10 @@ def get_random_user_profile():
     try:
         user_id = request.user_id
         response, status_code = get_random_user(user_id)
-        return jsonify(response), status_code
+        return jsonify(response), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
 
 @discover_bp.route('/swipe-right', methods=['POST'])
@@ -32,19 +46,84 @@ def swipe_right_endpoint():
             return jsonify({'error': 'user_id is required', 'status_code': 400}), 400
         
         response, status_code = swipe_right(user_id, swiped_user_id)
-        return jsonify(response), status_code
+        return jsonify(response), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
+
+
+@discover_bp.route('/swipes', methods=['POST'])
+@require_auth
+def swipe_batch_endpoint():
+    """Submit an ordered batch of swipe rights endpoint"""
+    try:
+        user_id = request.user_id
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Request body is required', 'status_code': 400}), 400
+        
+        swipes = data.get('swipes')
+        if not swipes:
+            return jsonify({'error': 'swipes is required', 'status_code': 400}), 400
+        
+        response, status_code = swipe_right_batch(user_id, swipes)
+        return jsonify(response), status_code, retry_after_headers(response)
+    except Exception as e:
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
 
 @discover_bp.route('/matches', methods=['GET'])
 @require_auth
 def get_matches():
-    """Get all user matches endpoint"""
+    """Get user matches endpoint (keyset paginated, or incremental with since; honors If-None-Match)"""
     try:
         user_id = request.user_id
-        response, status_code = get_user_matches(user_id)
-        return jsonify(response), status_code
+        limit, error = parse_limit(
+            request.args.get('limit'),
+            Config.MATCHES_PAGE_SIZE,
+            Config.MATCHES_MAX_PAGE_SIZE
+        )
+        if error:
+            return jsonify({'error': error, 'status_code': 400}), 400
+        
+        cursor = request.args.get('cursor')
+        since = request.args.get('since')
+        etag = get_matches_etag(user_id, limit, cursor=cursor, since=since)
+        if is_not_modified(request, etag):
+            return not_modified_response(current_app.response_class, etag)
+        
+        response, status_code = get_user_matches(user_id, limit, cursor=cursor, since=since)
+        return set_etag(jsonify(response), etag if status_code == 200 else None), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
+
 
+@discover_bp.route('/matches/stream', methods=['GET'])
+@no_deadline
+@require_auth
+def stream_matches():
+    """Stream new matches as Server-Sent Events (resumes from Last-Event-ID)"""
+    # Each stream holds one of the worker's threads until the client disconnects
+    if not sync_stream_slots.acquire():
+        response = {
+            'error': 'Too many open match streams, please retry later',
+            'status_code': 503,
+            'retry_after': 5
+        }
+        return jsonify(response), 503, retry_after_headers(response)
+    
+    events = stream_match_events(
+        request.user_id,
+        current_app.json.dumps,
+        last_event_id=request.headers.get('Last-Event-ID')
+    )
+    response = Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Called when the response is closed, even if the stream never started
+    response.call_on_close(sync_stream_slots.release)
+    return response
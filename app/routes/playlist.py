@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.middleware.auth_middleware import require_auth
-from app.controllers.playlist_controller import create_or_update_playlist, get_user_playlist
+from app.controllers.playlist_controller import create_or_update_playlist, get_user_playlist, get_playlist_etag
+from app.utils.etag import is_not_modified, not_modified_response, set_etag
+from app.utils.errors import failure_response, retry_after_headers
 
 playlist_bp = Blueprint('playlist', __name__)
 
@@ -16,19 +18,25 @@ def create_playlist():
             return jsonify({'error': 'Request body is required', 'status_code': 400}), 400
         
         response, status_code = create_or_update_playlist(user_id, data)
-        return jsonify(response), status_code
+        return jsonify(response), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
 
 @playlist_bp.route('', methods=['GET'])
 @require_auth
 def get_playlist():
-    """Get user's playlist endpoint"""
+    """Get user's playlist endpoint (honors If-None-Match)"""
     try:
         user_id = request.user_id
+        etag = get_playlist_etag(user_id)
+        if is_not_modified(request, etag):
+            return not_modified_response(current_app.response_class, etag)
+        
         response, status_code = get_user_playlist(user_id)
-        return jsonify(response), status_code
+        return set_etag(jsonify(response), etag if status_code == 200 else None), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
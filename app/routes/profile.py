@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.middleware.auth_middleware import require_auth
-from app.controllers.profile_controller import get_user_profile, update_user_profile
+from app.controllers.profile_controller import get_user_profile, get_profile_etag, update_user_profile
+from app.utils.etag import is_not_modified, not_modified_response, set_etag
+from app.utils.errors import failure_response, retry_after_headers
 
 profile_bp = Blueprint('profile', __name__)
 
@@ -8,13 +10,18 @@ profile_bp = Blueprint('profile', __name__)
 @profile_bp.route('', methods=['GET'])
 @require_auth
 def get_profile():
-    """Get user profile endpoint"""
+    """Get user profile endpoint (honors If-None-Match)"""
     try:
         user_id = request.user_id
+        etag = get_profile_etag(user_id)
+        if is_not_modified(request, etag):
+            return not_modified_response(current_app.response_class, etag)
+        
         response, status_code = get_user_profile(user_id)
-        return jsonify(response), status_code
+        return set_etag(jsonify(response), etag if status_code == 200 else None), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
 
 @profile_bp.route('', methods=['PUT'])
@@ -28,7 +35,8 @@ def update_profile():
             return jsonify({'error': 'Request body is required', 'status_code': 400}), 400
         
         response, status_code = update_user_profile(user_id, data)
-        return jsonify(response), status_code
+        return jsonify(response), status_code, retry_after_headers(response)
     except Exception as e:
-        return jsonify({'error': f'Internal server error: {str(e)}', 'status_code': 500}), 500
+        response, status_code = failure_response(e)
+        return jsonify(response), status_code, retry_after_headers(response)
 
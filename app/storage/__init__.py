@@ -0,0 +1,29 @@
+from app.storage.base import StorageBackend
+from app.storage.mongo import MongoStorage
+from app.storage.memory import MemoryStorage
+
+__all__ = ['StorageBackend', 'MongoStorage', 'MemoryStorage', 'get_storage', 'set_storage']
+
+# Process-wide backend installed by create_app (STORAGE_BACKEND)
+storage = None
+
+
+def get_storage():
+    """
+    Get the process-wide storage backend
+    Raises:
+        ConnectionError: if no backend is installed yet (create_app has not run)
+    """
+    if storage is None:
+        raise ConnectionError("MongoDB connection not available. Please check your MONGODB_URI.")
+    return storage
+
+
+def set_storage(backend):
+    """
+    Replace the process-wide storage backend (e.g. with a MemoryStorage in benchmarks)
+    Args:
+        backend: StorageBackend or None
+    """
+    global storage
+    storage = backend
@@ -0,0 +1,39 @@
+class StorageBackend:
+    """
+    Interface for the document stores behind the models
+    collection() returns an object with the pymongo Collection methods the
+    models use (find, find_one_and_update, bulk_write, ...)
+    """
+    
+    # Name used in logs and by STORAGE_BACKEND
+    name = None
+    # Whether collections support watch() (MATCH_EVENTS_BACKEND=change_stream)
+    supports_change_streams = False
+    
+    def collection(self, name):
+        """
+        Get a collection
+        Args:
+            name: Collection name
+        Returns:
+            pymongo Collection or a compatible object
+        """
+        raise NotImplementedError
+    
+    def drop_collection(self, name):
+        """
+        Remove a collection with its documents and indexes
+        Args:
+            name: Collection name
+        """
+        raise NotImplementedError
+    
+    def ping(self, timeout=None):
+        """
+        Check that the store is reachable
+        Args:
+            timeout: Optional limit in seconds
+        Raises:
+            Exception: if the store did not answer (e.g. pymongo ServerSelectionTimeoutError)
+        """
+        raise NotImplementedError
@@ -0,0 +1,273 @@
+import math
+import threading
+import time
+from collections import deque
+from pymongo.cursor import Cursor
+from pymongo.command_cursor import CommandCursor
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, PyMongoError, WTimeoutError
+
+
+class CircuitOpenError(ConnectionFailure):
+    """
+    Raised instead of calling MongoDB while the circuit is open
+    A ConnectionFailure, so code handling PyMongoError treats it like any outage
+    """
+    
+    def __init__(self, retry_after):
+        super().__init__('MongoDB circuit breaker is open')
+        self.retry_after = retry_after
+
+
+def is_unavailable(error):
+    """
+    Check whether an exception means the database is down or too slow
+    (as opposed to an answer such as a duplicate key error)
+    Args:
+        error: Exception
+    Returns:
+        bool
+    """
+    if isinstance(error, (ConnectionFailure, ExecutionTimeout, WTimeoutError, ConnectionError)):
+        return True
+    # Errors raised when a pymongo.timeout() budget ran out
+    return isinstance(error, PyMongoError) and error.timeout
+
+
+class CircuitBreaker:
+    """
+    Fail fast while MongoDB is failing
+    closed: calls go through; the outcomes of the last window calls are
+        kept and the circuit opens when at least minimum_calls were recorded
+        and the failure rate reached failure_rate (a count-based window: a
+        hung server completes few calls, so a time-based one would stay
+        dominated by the successes from before the outage)
+    open: calls raise CircuitOpenError without touching the network
+    half_open: after open_seconds, up to half_open_calls trial calls go
+        through at a time; that many successes close the circuit, any failure
+        opens it again
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_rate=0.5, minimum_calls=10, window=20, open_seconds=5.0, half_open_calls=3, clock=time.monotonic):
+        """
+        Args:
+            failure_rate: Share of failed calls in the window that opens the circuit
+            minimum_calls: Calls needed in the window before the rate is considered
+            window: Number of recent calls whose outcomes are considered while closed
+            open_seconds: Seconds to reject calls before probing
+            half_open_calls: Concurrent trial calls, and successes needed to close
+            clock: Monotonic time source in seconds
+        """
+        self.failure_rate = failure_rate
+        self.minimum_calls = minimum_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.clock = clock
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+    
+    def retry_after(self):
+        """Whole seconds until the circuit will next let a trial call through"""
+        return max(1, math.ceil(self._opened_at + self.open_seconds - self.clock()))
+    
+    def check_open(self):
+        """
+        Raise CircuitOpenError if the circuit is open, without taking a trial slot
+        (for callers whose outcomes are not recorded)
+        """
+        if self.state == self.OPEN and self.clock() < self._opened_at + self.open_seconds:
+            raise CircuitOpenError(self.retry_after())
+    
+    def before_call(self):
+        """
+        Admit a call
+        Returns:
+            bool: True if the call is a half-open trial
+        Raises:
+            CircuitOpenError: if the call must not go through
+        """
+        if self.state == self.CLOSED:
+            return False
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() < self._opened_at + self.open_seconds:
+                    raise CircuitOpenError(self.retry_after())
+                self.state = self.HALF_OPEN
+                self._trials = 0
+                self._trial_successes = 0
+            if self.state == self.HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    raise CircuitOpenError(1)
+                self._trials += 1
+                return True
+            return False
+    
+    def record(self, failed, trial=False):
+        """
+        Record the outcome of an admitted call
+        Args:
+            failed: True if the database was unavailable
+            trial: Value returned by before_call
+        """
+        now = self.clock()
+        with self._lock:
+            if trial:
+                self._trials -= 1
+                if self.state != self.HALF_OPEN:
+                    return
+                if failed:
+                    self._open(now, 'half-open trial failed')
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self.state = self.CLOSED
+                        self._outcomes.clear()
+                        self._failures = 0
+                        print("✓ MongoDB circuit closed")
+                return
+            if self.state != self.CLOSED:
+                # Late outcome of a call admitted before the circuit opened
+                return
+            
+            if len(self._outcomes) == self.window:
+                self._failures -= self._outcomes[0]
+            self._outcomes.append(failed)
+            self._failures += failed
+            calls = len(self._outcomes)
+            if failed and calls >= self.minimum_calls and self._failures >= self.failure_rate * calls:
+                self._open(now, f"{self._failures} of the last {calls} calls failed")
+    
+    def _open(self, now, reason):
+        self.state = self.OPEN
+        self._opened_at = now
+        print(f"⚠ Warning: MongoDB circuit opened ({reason}); failing fast for {self.open_seconds:.0f}s")
+    
+    def call(self, func, *args, **kwargs):
+        """
+        Run a database call through the breaker
+        Returns:
+            The call's result
+        Raises:
+            CircuitOpenError: if the circuit is open
+        """
+        trial = self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record(is_unavailable(e), trial)
+            raise
+        self.record(False, trial)
+        return result
+
+
+class GuardedCursor:
+    """
+    Cursor whose first fetch goes through the circuit breaker
+    find() sends nothing until the cursor is iterated, so the query is
+    admitted and recorded on the first next(); later batches only record
+    failures, so iterating a large result does not dilute the failure rate
+    """
+    
+    # Cursor methods that return the cursor itself
+    CHAINING = {'sort', 'limit', 'skip', 'batch_size', 'hint', 'max_time_ms', 'collation', 'comment', 'allow_disk_use'}
+    
+    def __init__(self, cursor, breaker, started=False):
+        """
+        Args:
+            cursor: pymongo Cursor or CommandCursor
+            breaker: CircuitBreaker
+            started: True if the cursor's first batch was already fetched (aggregate)
+        """
+        self._cursor = cursor
+        self._breaker = breaker
+        self._started = started
+    
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if name not in self.CHAINING:
+            return attr
+        
+        def chain(*args, **kwargs):
+            attr(*args, **kwargs)
+            return self
+        return chain
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self._started:
+            try:
+                return next(self._cursor)
+            except StopIteration:
+                raise
+            except Exception as e:
+                if is_unavailable(e):
+                    self._breaker.record(True)
+                raise
+        
+        self._started = True
+        trial = self._breaker.before_call()
+        try:
+            document = next(self._cursor)
+        except StopIteration:
+            self._breaker.record(False, trial)
+            raise
+        except Exception as e:
+            self._breaker.record(is_unavailable(e), trial)
+            raise
+        self._breaker.record(False, trial)
+        return document
+    
+    next = __next__
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+
+class GuardedCollection:
+    """pymongo Collection whose calls go through a CircuitBreaker"""
+    
+    # Methods that only build a cursor; the breaker sees its first fetch instead
+    LAZY_CURSORS = {'find', 'find_raw_batches'}
+    
+    def __init__(self, collection, breaker):
+        self._collection = collection
+        self._breaker = breaker
+    
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+        if name in self.LAZY_CURSORS:
+            return lambda *args, **kwargs: GuardedCursor(attr(*args, **kwargs), self._breaker)
+        if name == 'with_options':
+            return lambda *args, **kwargs: GuardedCollection(attr(*args, **kwargs), self._breaker)
+        
+        def guarded(*args, **kwargs):
+            result = self._breaker.call(attr, *args, **kwargs)
+            if isinstance(result, (Cursor, CommandCursor)):
+                # aggregate() already ran its command; only later batches are left
+                return GuardedCursor(result, self._breaker, started=True)
+            return result
+        return guarded
+    
+    def __eq__(self, other):
+        if isinstance(other, GuardedCollection):
+            other = other._collection
+        return self._collection == other
+    
+    def __hash__(self):
+        return hash(self._collection)
@@ -0,0 +1,531 @@
+import itertools
+import random
+import threading
+from bson import DEFAULT_CODEC_OPTIONS, ObjectId
+from pymongo import IndexModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.operations import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+from app.storage.base import StorageBackend
+from app.storage.query import (
+    MISSING,
+    apply_update,
+    compile_filter,
+    copy_value,
+    freeze,
+    get_path,
+    is_operator_dict,
+    normalize_sort,
+    project,
+    sort_documents,
+    upsert_seed
+)
+
+
+def _lookup_values(condition):
+    """Values an equality or $in condition can match, or None for other conditions"""
+    if is_operator_dict(condition):
+        if '$eq' in condition:
+            return [condition['$eq']]
+        if '$in' in condition:
+            return list(condition['$in'])
+        return None
+    return [condition]
+
+
+def _index_keys(value):
+    """Keys a field value is indexed under (array elements index individually)"""
+    if value is MISSING:
+        return [None]
+    if isinstance(value, list):
+        return [freeze(item) for item in value] + [freeze(value)]
+    return [freeze(value)]
+
+
+class MemoryCursor:
+    """Lazily evaluated result of MemoryCollection.find"""
+    
+    def __init__(self, collection, spec, projection=None, sort=None, skip=0, limit=0):
+        self._collection = collection
+        self._spec = spec
+        self._projection = projection
+        self._sort = normalize_sort(sort) if sort else None
+        self._skip = skip
+        self._limit = limit
+        self._results = None
+    
+    def sort(self, key_or_list, direction=None):
+        self._sort = normalize_sort(key_or_list, direction)
+        return self
+    
+    def skip(self, skip):
+        self._skip = skip
+        return self
+    
+    def limit(self, limit):
+        self._limit = limit
+        return self
+    
+    def batch_size(self, batch_size):
+        return self
+    
+    def close(self):
+        self._results = iter(())
+    
+    def explain(self):
+        return self._collection._explain(self._spec, sort=self._sort, skip=self._skip, limit=self._limit)
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self._results is None:
+            docs = self._collection._select(self._spec, sort=self._sort, skip=self._skip, limit=self._limit)
+            self._results = (project(doc, self._projection) for doc in docs)
+        return next(self._results)
+
+
+class MemoryCollection:
+    """Dict-backed collection with the subset of the pymongo API the models use
+    
+    Documents are kept by _id and never mutated in place (updates store a
+    modified copy), so reads copy them outside the lock. The first field of
+    every index created through create_indexes gets a hash index used for
+    equality and $in lookups, including inside $or branches; unique indexes
+    raise DuplicateKeyError like MongoDB.
+    """
+    
+    # Read by raw_collection; documents stay plain dicts whatever the options
+    codec_options = DEFAULT_CODEC_OPTIONS
+    
+    def __init__(self, name, rng=None):
+        """
+        Args:
+            name: Collection name
+            rng: random.Random drawing the $sample stage (seed it for repeatable samples)
+        """
+        self.name = name
+        self._random = rng or random.Random()
+        self._lock = threading.RLock()
+        self._reset()
+    
+    def _reset(self):
+        self._docs = {}
+        self._order = {}
+        self._sequence = itertools.count()
+        # field -> {frozen value: set of document keys}
+        self._field_indexes = {}
+        # index name -> (fields, {frozen key tuple: document key})
+        self._unique_indexes = {}
+        self._index_names = ['_id_']
+    
+    # Storage and indexes
+    
+    def _unique_key(self, doc, fields):
+        return tuple(freeze(None if value is MISSING else value) for value in (get_path(doc, field) for field in fields))
+    
+    def _check_unique(self, doc, key):
+        for name, (fields, table) in self._unique_indexes.items():
+            owner = table.get(self._unique_key(doc, fields))
+            if owner is not None and owner != key:
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: {name}",
+                    11000,
+                    {'index': name, 'keyValue': {field: get_path(doc, field) for field in fields}}
+                )
+    
+    def _add(self, key, doc):
+        self._docs[key] = doc
+        for field, index in self._field_indexes.items():
+            for value in _index_keys(get_path(doc, field)):
+                index.setdefault(value, set()).add(key)
+        for fields, table in self._unique_indexes.values():
+            table[self._unique_key(doc, fields)] = key
+    
+    def _remove(self, key):
+        doc = self._docs.pop(key)
+        for field, index in self._field_indexes.items():
+            for value in _index_keys(get_path(doc, field)):
+                keys = index.get(value)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[value]
+        for fields, table in self._unique_indexes.values():
+            unique_key = self._unique_key(doc, fields)
+            if table.get(unique_key) == key:
+                del table[unique_key]
+        return doc
+    
+    def _insert(self, doc):
+        if '_id' not in doc:
+            doc = {'_id': ObjectId(), **doc}
+        key = freeze(doc['_id'])
+        if key in self._docs:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} index: _id_",
+                11000,
+                {'index': '_id_', 'keyValue': {'_id': doc['_id']}}
+            )
+        self._check_unique(doc, key)
+        self._order[key] = next(self._sequence)
+        self._add(key, doc)
+        return doc
+    
+    def _replace(self, old, new):
+        if new.get('_id') != old['_id']:
+            raise OperationFailure("Performing an update on the path '_id' would modify the immutable field '_id'", 66)
+        key = freeze(old['_id'])
+        self._check_unique(new, key)
+        self._remove(key)
+        self._add(key, new)
+    
+    def _delete(self, key):
+        self._remove(key)
+        del self._order[key]
+    
+    def _plan(self, spec):
+        """
+        Pick the hash index that narrows spec down the most
+        Returns:
+            tuple: (keys of the documents that can match or None to scan, explain() stage of the choice)
+        """
+        best = None
+        best_stage = {'stage': 'COLLSCAN'}
+        for field, condition in spec.items():
+            keys = stage = None
+            if field == '$or':
+                branches = [self._plan(branch) for branch in condition]
+                if all(branch_keys is not None for branch_keys, _ in branches):
+                    keys = set().union(*(branch_keys for branch_keys, _ in branches))
+                    stage = {'stage': 'OR', 'inputStages': [branch_stage for _, branch_stage in branches]}
+            elif field == '_id' or field in self._field_indexes:
+                values = _lookup_values(condition)
+                if values is not None:
+                    if field == '_id':
+                        keys = {key for key in map(freeze, values) if key in self._docs}
+                    else:
+                        index = self._field_indexes[field]
+                        keys = set()
+                        for value in values:
+                            keys.update(index.get(freeze(value), ()))
+                    stage = {'stage': 'IXSCAN', 'keyPattern': {field: 1}}
+            if keys is not None and (best is None or len(keys) < len(best)):
+                best = keys
+                best_stage = stage
+        return best, best_stage
+    
+    def _explain(self, spec, sort=None, skip=0, limit=0):
+        """Describe how _select would run spec, in the shape of MongoDB's explain() output"""
+        if spec is not None and not isinstance(spec, dict):
+            spec = {'_id': spec}
+        with self._lock:
+            keys, plan = self._plan(spec or {})
+        if keys is not None:
+            plan = {'stage': 'FETCH', 'inputStage': plan}
+        # Sorting, skipping and limiting always happen on the fetched documents
+        for stage, applies in (('SORT', sort), ('SKIP', skip), ('LIMIT', limit)):
+            if applies:
+                plan = {'stage': stage, 'inputStage': plan}
+        return {'queryPlanner': {'namespace': self.name, 'winningPlan': plan}, 'executionStats': {}}
+    
+    def _select(self, spec, sort=None, skip=0, limit=0):
+        """Stored documents matching spec (callers must copy before handing them out)"""
+        if spec is not None and not isinstance(spec, dict):
+            spec = {'_id': spec}
+        spec = spec or {}
+        matches = compile_filter(spec)
+        with self._lock:
+            keys, _ = self._plan(spec)
+            if keys is None:
+                docs = [doc for doc in self._docs.values() if matches(doc)]
+            else:
+                keys = sorted(keys, key=self._order.__getitem__)
+                docs = [self._docs[key] for key in keys if matches(self._docs[key])]
+        if sort:
+            sort_documents(docs, sort)
+        if skip:
+            docs = docs[skip:]
+        if limit:
+            docs = docs[:limit]
+        return docs
+    
+    def _update(self, spec, update, upsert=False, multi=False, sort=None, replacement=False):
+        """
+        Apply an update or replacement
+        Returns:
+            tuple: (matched, modified, upserted _id or None, document before, document after)
+        """
+        with self._lock:
+            targets = self._select(spec, sort=normalize_sort(sort) if sort else None, limit=0 if multi else 1)
+            if not targets:
+                if not upsert:
+                    return 0, 0, None, None, None
+                doc = upsert_seed(spec if isinstance(spec, dict) else {'_id': spec})
+                if replacement:
+                    doc.update(copy_value(update))
+                else:
+                    apply_update(doc, update, inserting=True)
+                doc = self._insert(doc)
+                return 0, 0, doc['_id'], None, doc
+            
+            modified = 0
+            before = after = None
+            for old in targets:
+                if replacement:
+                    new = {'_id': old['_id'], **copy_value(update)}
+                else:
+                    new = copy_value(old)
+                    apply_update(new, update)
+                if new != old:
+                    self._replace(old, new)
+                    modified += 1
+                before, after = old, new
+            return len(targets), modified, None, before, after
+    
+    def _delete_matching(self, spec, multi=False, sort=None):
+        with self._lock:
+            docs = self._select(spec, sort=normalize_sort(sort) if sort else None, limit=0 if multi else 1)
+            for doc in docs:
+                self._delete(freeze(doc['_id']))
+            return docs
+    
+    # pymongo Collection API
+    
+    def with_options(self, **kwargs):
+        # Documents are always plain dicts; codec and read preference options do not apply
+        return self
+    
+    def create_indexes(self, indexes):
+        names = []
+        with self._lock:
+            for index in indexes:
+                document = index.document
+                fields = list(document['key'])
+                name = document.get('name') or '_'.join(f"{field}_{direction}" for field, direction in document['key'].items())
+                if name not in self._index_names:
+                    if fields[0] != '_id' and fields[0] not in self._field_indexes:
+                        table = {}
+                        for key, doc in self._docs.items():
+                            for value in _index_keys(get_path(doc, fields[0])):
+                                table.setdefault(value, set()).add(key)
+                        self._field_indexes[fields[0]] = table
+                    if document.get('unique'):
+                        table = {}
+                        for key, doc in self._docs.items():
+                            unique_key = self._unique_key(doc, fields)
+                            if unique_key in table:
+                                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name}", 11000)
+                            table[unique_key] = key
+                        self._unique_indexes[name] = (fields, table)
+                    self._index_names.append(name)
+                names.append(name)
+        return names
+    
+    def create_index(self, keys, **kwargs):
+        return self.create_indexes([IndexModel(keys, **kwargs)])[0]
+    
+    def index_information(self):
+        with self._lock:
+            return {name: {} for name in self._index_names}
+    
+    def drop(self):
+        with self._lock:
+            self._reset()
+    
+    def insert_one(self, document):
+        document.setdefault('_id', ObjectId())
+        with self._lock:
+            self._insert(copy_value(document))
+        return InsertOneResult(document['_id'], True)
+    
+    def insert_many(self, documents, ordered=True):
+        inserted_ids = []
+        errors = []
+        with self._lock:
+            for index, document in enumerate(documents):
+                document.setdefault('_id', ObjectId())
+                try:
+                    self._insert(copy_value(document))
+                    inserted_ids.append(document['_id'])
+                except DuplicateKeyError as e:
+                    errors.append({'index': index, 'code': 11000, 'errmsg': str(e), 'op': document})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({
+                'writeErrors': errors,
+                'writeConcernErrors': [],
+                'nInserted': len(inserted_ids),
+                'nUpserted': 0,
+                'nMatched': 0,
+                'nModified': 0,
+                'nRemoved': 0,
+                'upserted': []
+            })
+        return InsertManyResult(inserted_ids, True)
+    
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0, **kwargs):
+        return MemoryCursor(self, filter, projection, sort=sort, skip=skip, limit=limit)
+    
+    def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        docs = self._select(filter, sort=normalize_sort(sort) if sort else None, limit=1)
+        return project(docs[0], projection) if docs else None
+    
+    def count_documents(self, filter, **kwargs):
+        return len(self._select(filter))
+    
+    def estimated_document_count(self, **kwargs):
+        return len(self._docs)
+    
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False, return_document=False, **kwargs):
+        _, _, _, before, after = self._update(filter, update, upsert=upsert, sort=sort)
+        doc = after if return_document else before
+        return project(doc, projection) if doc is not None else None
+    
+    def find_one_and_replace(self, filter, replacement, projection=None, sort=None, upsert=False, return_document=False, **kwargs):
+        _, _, _, before, after = self._update(filter, replacement, upsert=upsert, sort=sort, replacement=True)
+        doc = after if return_document else before
+        return project(doc, projection) if doc is not None else None
+    
+    def find_one_and_delete(self, filter, projection=None, sort=None, **kwargs):
+        docs = self._delete_matching(filter, sort=sort)
+        return project(docs[0], projection) if docs else None
+    
+    def _update_result(self, matched, modified, upserted_id):
+        raw = {'n': 1 if upserted_id is not None else matched, 'nModified': modified}
+        if upserted_id is not None:
+            raw['upserted'] = upserted_id
+        return UpdateResult(raw, True)
+    
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        matched, modified, upserted_id, _, _ = self._update(filter, update, upsert=upsert)
+        return self._update_result(matched, modified, upserted_id)
+    
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        matched, modified, upserted_id, _, _ = self._update(filter, update, upsert=upsert, multi=True)
+        return self._update_result(matched, modified, upserted_id)
+    
+    def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        matched, modified, upserted_id, _, _ = self._update(filter, replacement, upsert=upsert, replacement=True)
+        return self._update_result(matched, modified, upserted_id)
+    
+    def delete_one(self, filter, **kwargs):
+        return DeleteResult({'n': len(self._delete_matching(filter))}, True)
+    
+    def delete_many(self, filter, **kwargs):
+        return DeleteResult({'n': len(self._delete_matching(filter, multi=True))}, True)
+    
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        result = {
+            'writeErrors': [],
+            'writeConcernErrors': [],
+            'nInserted': 0,
+            'nUpserted': 0,
+            'nMatched': 0,
+            'nModified': 0,
+            'nRemoved': 0,
+            'upserted': []
+        }
+        with self._lock:
+            for index, request in enumerate(requests):
+                try:
+                    if isinstance(request, InsertOne):
+                        request._doc.setdefault('_id', ObjectId())
+                        self._insert(copy_value(request._doc))
+                        result['nInserted'] += 1
+                    elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                        matched, modified, upserted_id, _, _ = self._update(
+                            request._filter,
+                            request._doc,
+                            upsert=request._upsert,
+                            multi=isinstance(request, UpdateMany),
+                            replacement=isinstance(request, ReplaceOne)
+                        )
+                        if upserted_id is not None:
+                            result['nUpserted'] += 1
+                            result['upserted'].append({'index': index, '_id': upserted_id})
+                        result['nMatched'] += matched
+                        result['nModified'] += modified
+                    elif isinstance(request, (DeleteOne, DeleteMany)):
+                        result['nRemoved'] += len(self._delete_matching(request._filter, multi=isinstance(request, DeleteMany)))
+                    else:
+                        raise TypeError(f"{request!r} is not a valid request")
+                except OperationFailure as e:
+                    # Like the server, a failed write is reported with its code and the batch goes on when unordered
+                    result['writeErrors'].append({'index': index, 'code': e.code, 'errmsg': str(e), 'op': request})
+                    if ordered:
+                        break
+        if result['writeErrors']:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+    
+    def aggregate(self, pipeline, **kwargs):
+        """Run a pipeline of $match, $sort, $skip, $limit, $sample and $project stages"""
+        docs = None
+        projected = False
+        for stage in pipeline:
+            (operator, argument), = stage.items()
+            if operator == '$match':
+                if docs is None:
+                    docs = self._select(argument)
+                else:
+                    matches = compile_filter(argument)
+                    docs = [doc for doc in docs if matches(doc)]
+                continue
+            if docs is None:
+                docs = self._select({})
+            if operator == '$sort':
+                docs = sort_documents(list(docs), normalize_sort(argument))
+            elif operator == '$skip':
+                docs = docs[argument:]
+            elif operator == '$limit':
+                docs = docs[:argument]
+            elif operator == '$sample':
+                docs = self._random.sample(docs, min(argument['size'], len(docs)))
+            elif operator == '$project':
+                docs = [project(doc, argument) for doc in docs]
+                projected = True
+            else:
+                raise OperationFailure(f"Unsupported aggregation stage in the in-memory store: {operator}")
+        if docs is None:
+            docs = self._select({})
+        return iter(docs if projected else [copy_value(doc) for doc in docs])
+    
+    def watch(self, *args, **kwargs):
+        raise OperationFailure('Change streams are not supported by the in-memory storage backend')
+
+
+class MemoryStorage(StorageBackend):
+    """In-process store for benchmarks, tests and local development
+    
+    Fast and deterministic (no network, no server), but the data lives in
+    this process only: every gunicorn worker gets its own copy.
+    """
+    
+    name = 'memory'
+    
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: Seed of the random generator shared by the collections ($sample); None for an unseeded one
+        """
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._collections = {}
+    
+    def collection(self, name):
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collections[name] = MemoryCollection(name, rng=self.random)
+            return collection
+    
+    def drop_collection(self, name):
+        with self._lock:
+            collection = self._collections.pop(name, None)
+        if collection is not None:
+            collection.drop()
+    
+    def ping(self, timeout=None):
+        pass
@@ -0,0 +1,32 @@
+import pymongo
+from app.storage.base import StorageBackend
+from app.storage.circuit_breaker import GuardedCollection
+
+
+class MongoStorage(StorageBackend):
+    """Storage on a pymongo database"""
+    
+    name = 'mongo'
+    supports_change_streams = True
+    
+    def __init__(self, database, breaker=None):
+        """
+        Args:
+            database: pymongo Database
+            breaker: Optional CircuitBreaker that every collection call goes through
+        """
+        self.database = database
+        self.breaker = breaker
+    
+    def collection(self, name):
+        if self.breaker is None:
+            return self.database[name]
+        return GuardedCollection(self.database[name], self.breaker)
+    
+    def drop_collection(self, name):
+        self.database.drop_collection(name)
+    
+    def ping(self, timeout=None):
+        # pymongo.timeout bounds server selection as well as the command itself
+        with pymongo.timeout(timeout):
+            self.database.client.admin.command('ping')
@@ -0,0 +1,395 @@
+from datetime import datetime
+from pymongo.errors import OperationFailure
+
+# Marker for a path that does not exist in a document
+MISSING = object()
+
+
+def copy_value(value):
+    """
+    Copy a document value (nested dicts and lists are copied, scalars shared)
+    Faster than copy.deepcopy for BSON-like data; datetimes are truncated to
+    milliseconds, the precision BSON keeps, so a stored document reads back
+    as it would from MongoDB
+    """
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    if isinstance(value, datetime) and value.microsecond % 1000:
+        return value.replace(microsecond=value.microsecond - value.microsecond % 1000)
+    return value
+
+
+def freeze(value):
+    """Hashable form of a document value, used as an index key"""
+    if isinstance(value, dict):
+        return tuple((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def get_path(doc, path):
+    """
+    Read a dotted path ('a.b', 'candidates.0') from a document
+    Returns:
+        The value or MISSING
+    """
+    value = doc
+    for part in path.split('.'):
+        if isinstance(value, dict):
+            value = value.get(part, MISSING)
+        elif isinstance(value, list) and part.isdigit():
+            index = int(part)
+            value = value[index] if index < len(value) else MISSING
+        else:
+            return MISSING
+        if value is MISSING:
+            return MISSING
+    return value
+
+
+def set_path(doc, path, value):
+    """Write a dotted path, creating intermediate documents"""
+    parts = path.split('.')
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+        if not isinstance(doc, dict):
+            raise OperationFailure(f"Cannot create field '{part}' in a non-document value")
+    doc[parts[-1]] = value
+
+
+def unset_path(doc, path):
+    """Remove a dotted path if present"""
+    parts = path.split('.')
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def is_operator_dict(value):
+    """Check whether a filter value is an operator document like {'$in': [...]}"""
+    return isinstance(value, dict) and bool(value) and all(key.startswith('$') for key in value)
+
+
+def _equals(value, target):
+    if value is MISSING:
+        return target is None
+    if value == target:
+        return True
+    return isinstance(value, list) and target in value
+
+
+def _membership(items):
+    """Build a fast 'value in items' test that also handles unhashable values"""
+    hashed = set()
+    others = []
+    for item in items:
+        try:
+            hashed.add(item)
+        except TypeError:
+            others.append(item)
+    
+    def contains(value):
+        try:
+            if value in hashed:
+                return True
+        except TypeError:
+            pass
+        return bool(others) and value in others
+    
+    def check(value):
+        if value is MISSING:
+            return contains(None)
+        if isinstance(value, list):
+            return any(contains(item) for item in value) or contains(value)
+        return contains(value)
+    return check
+
+
+def _comparison(compare):
+    def check(value):
+        if value is MISSING or value is None:
+            return False
+        candidates = value if isinstance(value, list) else [value]
+        for candidate in candidates:
+            try:
+                if compare(candidate):
+                    return True
+            except TypeError:
+                continue
+        return False
+    return check
+
+
+def _compile_operator(operator, argument):
+    if operator == '$eq':
+        return lambda value: _equals(value, argument)
+    if operator == '$ne':
+        return lambda value: not _equals(value, argument)
+    if operator == '$in':
+        return _membership(argument)
+    if operator == '$nin':
+        contains = _membership(argument)
+        return lambda value: not contains(value)
+    if operator == '$gt':
+        return _comparison(lambda value: value > argument)
+    if operator == '$gte':
+        return _comparison(lambda value: value >= argument)
+    if operator == '$lt':
+        return _comparison(lambda value: value < argument)
+    if operator == '$lte':
+        return _comparison(lambda value: value <= argument)
+    if operator == '$exists':
+        return lambda value: (value is not MISSING) == bool(argument)
+    if operator == '$size':
+        return lambda value: isinstance(value, list) and len(value) == argument
+    if operator == '$not':
+        checks = [_compile_operator(op, arg) for op, arg in argument.items()]
+        return lambda value: not all(check(value) for check in checks)
+    raise OperationFailure(f"unknown operator: {operator}")
+
+
+def compile_value_test(condition):
+    """
+    Compile the condition on one field (a literal or an operator document)
+    Returns:
+        Function value -> bool (value may be MISSING)
+    """
+    if is_operator_dict(condition):
+        checks = [_compile_operator(operator, argument) for operator, argument in condition.items()]
+        if len(checks) == 1:
+            return checks[0]
+        return lambda value: all(check(value) for check in checks)
+    return lambda value: _equals(value, condition)
+
+
+def compile_filter(spec):
+    """
+    Compile a MongoDB query filter into a predicate
+    Supports field equality (including array membership), $eq, $ne, $in,
+    $nin, $gt, $gte, $lt, $lte, $exists, $size, $not, $and, $or and $nor
+    Args:
+        spec: Filter document (None or {} matches everything)
+    Returns:
+        Function document -> bool
+    """
+    if not spec:
+        return lambda doc: True
+    
+    tests = []
+    for key, condition in spec.items():
+        if key in ('$or', '$and', '$nor'):
+            branches = [compile_filter(branch) for branch in condition]
+            if key == '$or':
+                tests.append(lambda doc, branches=branches: any(branch(doc) for branch in branches))
+            elif key == '$and':
+                tests.append(lambda doc, branches=branches: all(branch(doc) for branch in branches))
+            else:
+                tests.append(lambda doc, branches=branches: not any(branch(doc) for branch in branches))
+        elif key.startswith('$'):
+            raise OperationFailure(f"unknown top level operator: {key}")
+        else:
+            # Values in a filter lose precision like stored ones (datetimes to milliseconds)
+            value_test = compile_value_test(copy_value(condition))
+            tests.append(lambda doc, path=key, value_test=value_test: value_test(get_path(doc, path)))
+    
+    if len(tests) == 1:
+        return tests[0]
+    return lambda doc: all(test(doc) for test in tests)
+
+
+def project(doc, projection):
+    """
+    Copy a document through a projection
+    Supports inclusion and exclusion of (dotted) fields, _id suppression and $slice
+    Args:
+        doc: Stored document
+        projection: dict, list of field names, or None
+    Returns:
+        New document
+    """
+    if projection is None:
+        return copy_value(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    
+    slices = {
+        field: spec['$slice'] for field, spec in projection.items()
+        if isinstance(spec, dict) and '$slice' in spec
+    }
+    fields = {field: value for field, value in projection.items() if field != '_id' and field not in slices}
+    
+    # {'_id': 1} alone includes only _id, like MongoDB
+    if any(fields.values()) or (not fields and not slices and projection.get('_id')):
+        # Inclusion projection
+        result = {}
+        if projection.get('_id', 1) and '_id' in doc:
+            result['_id'] = doc['_id']
+        for field, include in list(fields.items()) + [(field, True) for field in slices]:
+            value = get_path(doc, field)
+            if include and value is not MISSING:
+                set_path(result, field, copy_value(value))
+    else:
+        excluded = set(fields)
+        if not projection.get('_id', 1):
+            excluded.add('_id')
+        result = {key: copy_value(value) for key, value in doc.items() if key not in excluded}
+        for field in excluded:
+            if '.' in field:
+                unset_path(result, field)
+    
+    for field, size in slices.items():
+        value = get_path(result, field)
+        if isinstance(value, list):
+            if isinstance(size, list):
+                skip, limit = size
+                set_path(result, field, value[skip:skip + limit])
+            else:
+                set_path(result, field, value[:size] if size >= 0 else value[size:])
+    return result
+
+
+def sort_key(value):
+    """Order missing/None values before everything else, like MongoDB"""
+    if value is MISSING or value is None:
+        return (0,)
+    return (1, value)
+
+
+def normalize_sort(spec, direction=None):
+    """Turn 'field', ('field', dir), [(field, dir), ...] or {field: dir} into a list of pairs"""
+    if isinstance(spec, str):
+        return [(spec, direction or 1)]
+    if isinstance(spec, dict):
+        return list(spec.items())
+    return [tuple(item) for item in spec]
+
+
+def sort_documents(docs, spec):
+    """
+    Sort documents in place by several keys with mixed directions
+    Args:
+        docs: List of documents
+        spec: List of (field, 1 or -1) pairs
+    Returns:
+        The sorted list
+    """
+    for field, direction in reversed(spec):
+        docs.sort(key=lambda doc: sort_key(get_path(doc, field)), reverse=direction < 0)
+    return docs
+
+
+def _array_at(doc, path, operator):
+    value = get_path(doc, path)
+    if value is MISSING or value is None:
+        value = []
+        set_path(doc, path, value)
+    elif not isinstance(value, list):
+        raise OperationFailure(f"The field '{path}' must be an array for {operator}")
+    return value
+
+
+def _push(doc, path, argument):
+    array = _array_at(doc, path, '$push')
+    if isinstance(argument, dict) and '$each' in argument:
+        array.extend(copy_value(item) for item in argument['$each'])
+        order = argument.get('$sort')
+        if isinstance(order, dict):
+            sort_documents(array, list(order.items()))
+        elif order is not None:
+            array.sort(key=sort_key, reverse=order < 0)
+        if '$slice' in argument:
+            size = argument['$slice']
+            array[:] = array[:size] if size >= 0 else array[size:]
+    else:
+        array.append(copy_value(argument))
+
+
+def _add_to_set(doc, path, argument):
+    array = _array_at(doc, path, '$addToSet')
+    items = argument['$each'] if isinstance(argument, dict) and '$each' in argument else [argument]
+    for item in items:
+        if item not in array:
+            array.append(copy_value(item))
+
+
+def _pull(doc, path, argument):
+    value = get_path(doc, path)
+    if not isinstance(value, list):
+        return
+    if isinstance(argument, dict) and not is_operator_dict(argument):
+        matches = compile_filter(argument)
+    else:
+        value_test = compile_value_test(argument)
+        matches = lambda item: value_test(item)
+    value[:] = [item for item in value if not matches(item)]
+
+
+def _pop(doc, path, argument):
+    value = get_path(doc, path)
+    if isinstance(value, list) and value:
+        value.pop(0 if argument < 0 else -1)
+
+
+def _inc(doc, path, argument):
+    current = get_path(doc, path)
+    set_path(doc, path, (0 if current is MISSING else current) + argument)
+
+
+UPDATE_OPERATORS = {
+    '$set': lambda doc, path, argument: set_path(doc, path, copy_value(argument)),
+    '$setOnInsert': lambda doc, path, argument: set_path(doc, path, copy_value(argument)),
+    '$unset': lambda doc, path, argument: unset_path(doc, path),
+    '$inc': _inc,
+    '$push': _push,
+    '$addToSet': _add_to_set,
+    '$pull': _pull,
+    '$pop': _pop
+}
+
+
+def apply_update(doc, update, inserting=False):
+    """
+    Apply an update document in place
+    Args:
+        doc: Document to modify (a private copy)
+        update: Update document with $ operators
+        inserting: True when the document is being created by an upsert ($setOnInsert applies)
+    """
+    if not update or not all(key.startswith('$') for key in update):
+        raise OperationFailure('update only works with $ operators')
+    for operator, fields in update.items():
+        if operator == '$setOnInsert' and not inserting:
+            continue
+        handler = UPDATE_OPERATORS.get(operator)
+        if handler is None:
+            raise OperationFailure(f"Unknown modifier: {operator}")
+        for path, argument in fields.items():
+            handler(doc, path, argument)
+
+
+def upsert_seed(spec):
+    """
+    Build the document an upsert starts from: the equality fields of the filter
+    Args:
+        spec: Filter document
+    Returns:
+        New document
+    """
+    doc = {}
+    for key, condition in (spec or {}).items():
+        if key == '$and':
+            for branch in condition:
+                doc.update(upsert_seed(branch))
+        elif key.startswith('$'):
+            continue
+        elif is_operator_dict(condition):
+            if '$eq' in condition:
+                set_path(doc, key, copy_value(condition['$eq']))
+        else:
+            set_path(doc, key, copy_value(condition))
+    return doc
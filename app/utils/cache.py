@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheBackend:
+    """
+    Interface for read-through cache stores
+    Implementations must be safe to call from several threads
+    """
+    
+    def get(self, key):
+        """
+        Get a cached value
+        Args:
+            key: Cache key string
+        Returns:
+            Cached value or None on a miss
+        """
+        raise NotImplementedError
+    
+    def get_many(self, keys):
+        """
+        Get several cached values
+        Args:
+            keys: Iterable of cache keys
+        Returns:
+            List of cached values, None for misses
+        """
+        return [self.get(key) for key in keys]
+    
+    def set(self, key, value, ttl=None):
+        """
+        Store a value
+        Args:
+            key: Cache key string
+            value: Value to store (must not be None)
+            ttl: Optional time to live in seconds (defaults to the backend's)
+        """
+        raise NotImplementedError
+    
+    def delete(self, *keys):
+        """
+        Remove values
+        Args:
+            keys: Cache key strings
+        """
+        raise NotImplementedError
+    
+    def clear(self):
+        """Remove every value"""
+        raise NotImplementedError
+    
+    def stats(self):
+        """
+        Get cache counters
+        Returns:
+            dict with hits, misses, evictions, expirations and size
+        """
+        raise NotImplementedError
+
+
+class LRUTTLCache(CacheBackend):
+    """In-process cache bounded by size (LRU eviction) and age (TTL expiry)"""
+    
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+    
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def get_many(self, keys):
+        # One lock acquisition for the whole batch
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._data[key]
+                    self._expirations += 1
+                    entry = None
+                if entry is None:
+                    self._misses += 1
+                    values.append(None)
+                else:
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    values.append(entry[0])
+        return values
+    
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+    
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'size': len(self._data),
+                'maxsize': self.maxsize
+            }
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything (used when caching is disabled)"""
+    
+    def __init__(self):
+        self._misses = 0
+    
+    def get(self, key):
+        self._misses += 1
+        return None
+    
+    def set(self, key, value, ttl=None):
+        pass
+    
+    def delete(self, *keys):
+        pass
+    
+    def clear(self):
+        pass
+    
+    def stats(self):
+        return {'hits': 0, 'misses': self._misses, 'evictions': 0, 'expirations': 0, 'size': 0, 'maxsize': 0}
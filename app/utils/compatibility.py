@@ -0,0 +1,444 @@
+import itertools
+import threading
+import numpy as np
+from app.config import Config
+from app.utils.cache import LRUTTLCache, NullCache
+
+# Relative weight of each taste category in the combined score
+DEFAULT_WEIGHTS = {
+    'songs': 3.0,
+    'artists': 2.0,
+    'genres': 1.0
+}
+
+CATEGORIES = tuple(DEFAULT_WEIGHTS.keys())
+
+# User fields a taste profile is built from (besides the playlist)
+PROFILE_FIELDS = ('favorite_songs', 'favorite_artists', 'favorite_genres')
+
+
+class Vocabulary:
+    """Thread-safe interning of normalized taste tokens to dense integer IDs
+    
+    Bounded by max_size: when it is full, the vocabulary starts over and its
+    generation changes, so IDs interned before (e.g. cached profiles) must
+    not be compared with IDs interned after.
+    """
+    
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.generation = 0
+        self._ids = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def intern(self, token):
+        """
+        Get the integer ID of a token, assigning a new one if needed
+        Args:
+            token: Normalized token string
+        Returns:
+            int token ID
+        """
+        token_id = self._ids.get(token)
+        if token_id is None:
+            with self._lock:
+                token_id = self._assign(token)
+        return token_id
+    
+    def _assign(self, token):
+        # Called with the lock held
+        token_id = self._ids.get(token)
+        if token_id is None:
+            if self.max_size and len(self._ids) >= self.max_size:
+                self._ids = {}
+                self.generation += 1
+            token_id = self._ids[token] = len(self._ids)
+        return token_id
+    
+    def intern_many(self, tokens):
+        """
+        Intern a collection of tokens, taking the lock at most once
+        Args:
+            tokens: Iterable of normalized token strings
+        Returns:
+            set of int token IDs
+        """
+        ids = self._ids
+        found = set()
+        new = []
+        for token in tokens:
+            token_id = ids.get(token)
+            if token_id is None:
+                new.append(token)
+            else:
+                found.add(token_id)
+        if new:
+            with self._lock:
+                found.update(self._assign(token) for token in new)
+        return found
+    
+    def intern_all(self, tokens):
+        """
+        Intern a collection of tokens
+        Args:
+            tokens: Iterable of normalized token strings
+        Returns:
+            Sorted numpy int32 array of unique token IDs
+        """
+        ids = self.intern_many(tokens)
+        return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids))
+
+
+# Process-wide vocabulary shared by every scoring call
+vocabulary = Vocabulary(max_size=Config.TASTE_VOCABULARY_SIZE)
+
+
+def normalize(value):
+    """
+    Normalize a song, artist or genre name for comparison
+    Args:
+        value: Raw string
+    Returns:
+        Lowercased, whitespace-collapsed string
+    """
+    return ' '.join(str(value).lower().split())
+
+
+def taste_tokens(user_doc, playlist_doc=None):
+    """
+    Extract the taste tokens of a user, grouped by category
+    Playlist songs count as songs and their artists as artists
+    Args:
+        user_doc: MongoDB user document
+        playlist_doc: Optional MongoDB playlist document of the user
+    Returns:
+        dict mapping category to a set of namespaced tokens
+    """
+    songs = {f"song:{normalize(song)}" for song in user_doc.get('favorite_songs') or []}
+    artists = {f"artist:{normalize(artist)}" for artist in user_doc.get('favorite_artists') or []}
+    genres = {f"genre:{normalize(genre)}" for genre in user_doc.get('favorite_genres') or []}
+    
+    if playlist_doc:
+        for song in playlist_doc.get('songs') or []:
+            artist_name = normalize(song.get('artist_name', ''))
+            songs.add(f"song:{normalize(song.get('song_name', ''))}|{artist_name}")
+            artists.add(f"artist:{artist_name}")
+    
+    return {'songs': songs, 'artists': artists, 'genres': genres}
+
+
+def encode_profile(tokens, vocab=vocabulary):
+    """
+    Encode one user's taste tokens as sparse ID vectors
+    Args:
+        tokens: dict from taste_tokens
+        vocab: Vocabulary used to intern tokens
+    Returns:
+        dict mapping category to a sorted int32 array of token IDs
+    """
+    return {category: vocab.intern_all(tokens.get(category, ())) for category in CATEGORIES}
+
+
+def pack_profile(profile):
+    """
+    Pack an encoded profile into one array (the form cached and stacked into a CandidateMatrix)
+    Args:
+        profile: dict from encode_profile
+    Returns:
+        tuple: (int32 array of every category's token IDs back to back, tuple of per-category lengths)
+    """
+    return (
+        np.concatenate([profile[category] for category in CATEGORIES]),
+        tuple(len(profile[category]) for category in CATEGORIES)
+    )
+
+
+def encode_packed(tokens, vocab=vocabulary):
+    """
+    Encode one user's taste tokens straight into the packed form
+    (same result as pack_profile(encode_profile(tokens)), without the intermediate arrays)
+    Args:
+        tokens: dict from taste_tokens
+        vocab: Vocabulary used to intern tokens
+    Returns:
+        tuple: (int32 array of every category's token IDs back to back, tuple of per-category lengths)
+    """
+    rows = [sorted(vocab.intern_many(tokens.get(category, ()))) for category in CATEGORIES]
+    lengths = tuple(len(row) for row in rows)
+    return np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int32, count=sum(lengths)), lengths
+
+
+def unpack_profile(packed):
+    """
+    Get the encoded profile back from pack_profile's output
+    Args:
+        packed: tuple from pack_profile
+    Returns:
+        dict mapping category to a sorted int32 array of token IDs
+    """
+    ids, lengths = packed
+    return dict(zip(CATEGORIES, np.split(ids, np.cumsum(lengths)[:-1])))
+
+
+class ProfileCache:
+    """Encoded taste vectors of recently ranked users (per worker)
+    
+    Encoding a candidate (normalizing its favorites and playlist, interning
+    the tokens) costs far more than scoring it, and the same users show up
+    in many refills. Entries are tagged with the vocabulary generation they
+    were encoded in and ignored once it changes; the models invalidate a
+    user when their favorites or playlist change, and the TTL bounds how long
+    other workers keep ranking with the previous version. Keyed by the user
+    IDs as the models pass them (ObjectIds), which hash faster than strings.
+    """
+    
+    def __init__(self, backend):
+        """
+        Args:
+            backend: CacheBackend storing the packed profiles
+        """
+        self.backend = backend
+    
+    def get_many(self, user_ids, generation):
+        """
+        Get the packed profiles of several users
+        Args:
+            user_ids: List of user IDs
+            generation: Vocabulary generation the profiles must come from
+        Returns:
+            List of tuples from pack_profile, None for users not cached
+        """
+        return [
+            entry[1] if entry is not None and entry[0] == generation else None
+            for entry in self.backend.get_many(user_ids)
+        ]
+    
+    def set(self, user_id, generation, packed):
+        self.backend.set(user_id, (generation, packed))
+    
+    def invalidate(self, *user_ids):
+        """
+        Drop users whose favorites or playlist changed
+        Args:
+            user_ids: User ObjectIds
+        """
+        self.backend.delete(*user_ids)
+    
+    def stats(self):
+        return self.backend.stats()
+
+
+def _create_profile_cache():
+    """Build the profile cache from the configuration"""
+    if not Config.PROFILE_CACHE_ENABLED:
+        return ProfileCache(NullCache())
+    return ProfileCache(LRUTTLCache(maxsize=Config.PROFILE_CACHE_SIZE, ttl=Config.PROFILE_CACHE_TTL_SECONDS))
+
+
+profile_cache = _create_profile_cache()
+
+
+def encode_profiles(user_ids, load_tokens, cache=None, vocab=vocabulary):
+    """
+    Encode the taste vectors of several users, using cached encodings where possible
+    All the profiles returned come from one vocabulary generation (encoding
+    starts over if the vocabulary was reset meanwhile)
+    Args:
+        user_ids: List of user IDs
+        load_tokens: Callable taking the list of user IDs missing from the cache
+            and returning a dict mapping each of them to its taste_tokens dict
+        cache: Optional ProfileCache
+        vocab: Vocabulary used to intern tokens
+    Returns:
+        List of packed profiles (see pack_profile), one per user ID
+    """
+    while True:
+        generation = vocab.generation
+        packed = cache.get_many(user_ids, generation) if cache is not None else [None] * len(user_ids)
+        missing = [index for index, profile in enumerate(packed) if profile is None]
+        
+        if missing:
+            tokens = load_tokens([user_ids[index] for index in missing])
+            for index in missing:
+                user_id = user_ids[index]
+                packed[index] = encode_packed(tokens[user_id], vocab)
+                if cache is not None:
+                    cache.set(user_id, generation, packed[index])
+        if vocab.generation == generation:
+            return packed
+
+
+class CandidateMatrix:
+    """Sparse encoding of many candidates' taste vectors
+    
+    The token IDs of every candidate are stored back to back in one array,
+    with the cell (candidate, category) of each, so a batch of candidates is
+    scored with a handful of numpy operations instead of a Python loop.
+    Tokens are namespaced by category, so their IDs never collide across
+    categories.
+    """
+    
+    def __init__(self, candidate_ids, indices, sizes):
+        """
+        Args:
+            candidate_ids: List of candidate IDs
+            indices: int32 array of token IDs, candidate by candidate and category by category
+            sizes: int64 array (candidates x categories) of token counts
+        """
+        self.candidate_ids = candidate_ids
+        self.indices = indices
+        self.sizes = sizes
+        # Cell (candidate * len(CATEGORIES) + category) of every stored token, to count hits
+        self.cells = np.repeat(np.arange(sizes.size, dtype=np.int64), sizes.ravel())
+    
+    def __len__(self):
+        return len(self.candidate_ids)
+    
+    @classmethod
+    def from_packed(cls, candidate_ids, packed_profiles):
+        """
+        Build the matrix from packed profiles
+        Args:
+            candidate_ids: List of candidate IDs, one per profile
+            packed_profiles: List of tuples from pack_profile
+        Returns:
+            CandidateMatrix
+        """
+        count = len(packed_profiles)
+        if not count:
+            return cls([], np.zeros(0, dtype=np.int32), np.zeros((0, len(CATEGORIES)), dtype=np.int64))
+        indices = np.concatenate([ids for ids, _ in packed_profiles]).astype(np.int32, copy=False)
+        sizes = np.fromiter(
+            itertools.chain.from_iterable(lengths for _, lengths in packed_profiles),
+            dtype=np.int64,
+            count=count * len(CATEGORIES)
+        ).reshape(count, len(CATEGORIES))
+        return cls(list(candidate_ids), indices, sizes)
+    
+    @classmethod
+    def from_encoded(cls, candidate_ids, encoded_profiles):
+        """
+        Build the matrix from already encoded profiles
+        Args:
+            candidate_ids: List of candidate IDs, one per profile
+            encoded_profiles: List of dicts from encode_profile
+        Returns:
+            CandidateMatrix
+        """
+        return cls.from_packed(candidate_ids, [pack_profile(profile) for profile in encoded_profiles])
+    
+    @classmethod
+    def from_tokens(cls, candidate_ids, token_sets, vocab=vocabulary):
+        """
+        Build the matrix from candidates' taste tokens
+        Args:
+            candidate_ids: List of candidate IDs, one per token set
+            token_sets: List of dicts from taste_tokens
+            vocab: Vocabulary used to intern tokens
+        Returns:
+            CandidateMatrix
+        """
+        return cls.from_encoded(candidate_ids, [encode_profile(tokens, vocab) for tokens in token_sets])
+
+
+def score_candidates(caller_profile, matrix, weights=None, metric='jaccard'):
+    """
+    Compute weighted compatibility between a caller and every candidate at once
+    Args:
+        caller_profile: dict from encode_profile for the caller
+        matrix: CandidateMatrix of candidates
+        weights: Optional dict of category weights (defaults to DEFAULT_WEIGHTS)
+        metric: 'jaccard' or 'cosine'
+    Returns:
+        numpy float64 array of scores in [0, 1], one per candidate
+    """
+    if metric not in ('jaccard', 'cosine'):
+        raise ValueError(f"Unknown compatibility metric: {metric}")
+    
+    weights = weights or DEFAULT_WEIGHTS
+    
+    caller_sizes = np.array([len(caller_profile[category]) for category in CATEGORIES], dtype=np.float64)
+    # Categories the caller has no tokens in do not count
+    category_weights = np.array(
+        [weights.get(category, 0.0) if len(caller_profile[category]) else 0.0 for category in CATEGORIES],
+        dtype=np.float64
+    )
+    total_weight = category_weights.sum()
+    if not len(matrix) or not total_weight:
+        return np.zeros(len(matrix), dtype=np.float64)
+    
+    # Dense membership table of the caller's tokens, then one gather over all candidates
+    caller_ids = np.concatenate([caller_profile[category] for category in CATEGORIES])
+    size = max(int(caller_ids.max()), int(matrix.indices.max(initial=0))) + 1
+    caller_mask = np.zeros(size, dtype=np.bool_)
+    caller_mask[caller_ids] = True
+    hits = np.flatnonzero(caller_mask[matrix.indices])
+    intersection = np.bincount(matrix.cells[hits], minlength=matrix.sizes.size).reshape(matrix.sizes.shape)
+    intersection = intersection.astype(np.float64)
+    
+    if metric == 'jaccard':
+        denominator = caller_sizes + matrix.sizes - intersection
+    else:
+        denominator = np.sqrt(caller_sizes * matrix.sizes)
+    similarity = np.divide(
+        intersection,
+        denominator,
+        out=np.zeros_like(intersection),
+        where=denominator > 0
+    )
+    return similarity @ category_weights / total_weight
+
+
+def rank_profiles(caller_profile, candidate_ids, packed_profiles, limit=None, weights=None, metric='jaccard'):
+    """
+    Order encoded candidates by compatibility with the caller, best first
+    Args:
+        caller_profile: dict from encode_profile (or unpack_profile) for the caller
+        candidate_ids: List of candidate IDs
+        packed_profiles: List of tuples from pack_profile, one per candidate
+        limit: Optional number of top candidates to return
+        weights: Optional dict of category weights
+        metric: 'jaccard' or 'cosine'
+    Returns:
+        List of (candidate_id, score) tuples sorted by descending score
+    """
+    if not candidate_ids:
+        return []
+    
+    matrix = CandidateMatrix.from_packed(candidate_ids, packed_profiles)
+    scores = score_candidates(caller_profile, matrix, weights=weights, metric=metric)
+    
+    if limit is not None and limit < len(scores):
+        # Partial selection of the top candidates, then sort only those
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        order = top[np.argsort(-scores[top], kind='stable')]
+    else:
+        order = np.argsort(-scores, kind='stable')
+    return [(matrix.candidate_ids[i], float(scores[i])) for i in order]
+
+
+def rank_candidates(caller_tokens, candidate_ids, candidate_tokens, limit=None, weights=None, metric='jaccard'):
+    """
+    Order candidates by compatibility with the caller, best first
+    Args:
+        caller_tokens: dict from taste_tokens for the caller
+        candidate_ids: List of candidate IDs
+        candidate_tokens: List of dicts from taste_tokens, one per candidate
+        limit: Optional number of top candidates to return
+        weights: Optional dict of category weights
+        metric: 'jaccard' or 'cosine'
+    Returns:
+        List of (candidate_id, score) tuples sorted by descending score
+    """
+    if not candidate_ids:
+        return []
+    
+    # Both sides must be encoded in the same vocabulary generation
+    caller_key = object()
+    tokens = dict(zip(candidate_ids, candidate_tokens))
+    tokens[caller_key] = caller_tokens
+    caller, *candidates = encode_profiles([caller_key] + list(candidate_ids), lambda missing: tokens)
+    return rank_profiles(unpack_profile(caller), candidate_ids, candidates, limit=limit, weights=weights, metric=metric)
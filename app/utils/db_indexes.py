@@ -0,0 +1,61 @@
+from app.models import User, Playlist, SwipeRight, Match, DiscoverDeck, TasteIndex
+
+MODELS = [User, Playlist, SwipeRight, Match, DiscoverDeck, TasteIndex]
+
+
+def ensure_indexes():
+    """
+    Create the indexes declared by every model (idempotent)
+    Returns:
+        dict mapping collection name to the list of index names
+    """
+    created = {}
+    for model in MODELS:
+        created[model.COLLECTION_NAME] = model.ensure_indexes()
+    return created
+
+
+def _plan_stages(plan):
+    """
+    Collect every stage name in an explain() plan tree
+    Args:
+        plan: winningPlan document from explain()
+    Returns:
+        list of stage names
+    """
+    stages = []
+    if not isinstance(plan, dict):
+        return stages
+    if 'stage' in plan:
+        stages.append(plan['stage'])
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get('inputStages', []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def audit_query_plans():
+    """
+    Run explain() on every model query and report its winning plan
+    Returns:
+        list of dicts with collection, query, stages and collscan flag
+    """
+    report = []
+    for model in MODELS:
+        collection = model.get_collection()
+        for name, query, sort in model.query_shapes():
+            cursor = collection.find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            explain = cursor.limit(1).explain()
+            winning_plan = explain.get('queryPlanner', {}).get('winningPlan', {})
+            stages = _plan_stages(winning_plan)
+            report.append({
+                'collection': model.COLLECTION_NAME,
+                'query': name,
+                'stages': stages,
+                'collscan': 'COLLSCAN' in stages
+            })
+    return report
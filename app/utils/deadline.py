@@ -0,0 +1,102 @@
+import contextvars
+import time
+import pymongo
+
+# Monotonic time by which the current request must be answered (None outside a request)
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+def remaining(default=None):
+    """
+    Seconds left in the current request's budget
+    Args:
+        default: Upper bound, returned as is outside a request with a deadline
+    Returns:
+        float (at least 0) or default
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    left = max(0.0, deadline - time.monotonic())
+    return left if default is None else min(left, default)
+
+
+class RequestDeadline:
+    """
+    Budget of one request
+    Entering it sets the deadline and opens a pymongo.timeout() scope, so
+    every MongoDB operation the request's models run (server selection,
+    connection checkout, the command and its maxTimeMS) gets the time left
+    instead of the client-wide socketTimeoutMS; a request stuck on a degraded
+    server releases its worker when the budget runs out
+    """
+    
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self._token = None
+        self._scope = None
+    
+    def __enter__(self):
+        self._token = _deadline.set(time.monotonic() + self.seconds)
+        self._scope = pymongo.timeout(self.seconds)
+        self._scope.__enter__()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._scope.__exit__(*exc_info)
+        _deadline.reset(self._token)
+
+
+def no_deadline(view):
+    """Exempt a view from the request deadline (long-lived streams)"""
+    view.no_deadline = True
+    return view
+
+
+def _is_exempt(app, endpoint):
+    view = app.view_functions.get(endpoint)
+    return view is None or getattr(view, 'no_deadline', False)
+
+
+def install_deadline(app, seconds):
+    """
+    Give every request of a Flask app a deadline
+    Args:
+        app: Flask application
+        seconds: Budget per request
+    """
+    from flask import g, request
+    
+    @app.before_request
+    def start_deadline():
+        if not _is_exempt(app, request.endpoint):
+            g.request_deadline = RequestDeadline(seconds).__enter__()
+    
+    @app.teardown_request
+    def end_deadline(error=None):
+        deadline = g.pop('request_deadline', None)
+        if deadline is not None:
+            deadline.__exit__(None, None, None)
+
+
+def install_deadline_async(app, seconds):
+    """
+    Give every request of a Quart app a deadline (motor copies the context
+    into its executor, so pymongo.timeout() applies to motor operations too)
+    Args:
+        app: Quart application
+        seconds: Budget per request
+    """
+    from quart import g, request
+    
+    @app.before_request
+    async def start_deadline():
+        if not _is_exempt(app, request.endpoint):
+            g.request_deadline = RequestDeadline(seconds).__enter__()
+    
+    @app.teardown_request
+    async def end_deadline(error=None):
+        deadline = g.pop('request_deadline', None)
+        if deadline is not None:
+            deadline.__exit__(None, None, None)
+
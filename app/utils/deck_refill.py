@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from app.config import Config
+from app.models.discover_deck import DiscoverDeck
+from app.models.playlist import Playlist
+from app.models.taste_index import TasteIndex
+from app.models.user import User
+from app.utils.compatibility import encode_profiles, profile_cache, rank_profiles, taste_tokens, unpack_profile
+from app.utils.minhash import get_index
+
+# Single background worker per process; refills are cheap and bursty
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='deck-refill')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def refill_deck(user_id):
+    """
+    Gather a pool of unseen candidates, rank them by music-taste compatibility
+    and push the best DECK_SIZE of them onto the user's deck
+    Args:
+        user_id: User ID string
+    Returns:
+        Number of candidates added to the deck
+    """
+    user_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+    user = User.find_by_id(user_id, User.TASTE_PROJECTION)
+    if not user:
+        return 0
+    
+    similar = get_index().query_user(user_id, k=Config.DECK_CANDIDATE_POOL // 4)
+    candidates = DiscoverDeck.sample_candidates(
+        user_id,
+        Config.DECK_CANDIDATE_POOL,
+        tokens=TasteIndex.tokens_for(user),
+        similar_ids=[similar_id for similar_id, _ in similar]
+    )
+    if not candidates:
+        return 0
+    
+    candidate_ids = [candidate['_id'] for candidate in candidates]
+    docs = {candidate['_id']: candidate for candidate in candidates}
+    docs[user_id] = user
+    
+    def load_tokens(user_ids):
+        # Only the users missing from the profile cache need their playlist read and encoded
+        playlists = Playlist.find_by_user_ids(user_ids)
+        return {missing_id: taste_tokens(docs[missing_id], playlists.get(missing_id)) for missing_id in user_ids}
+    
+    caller, *candidate_profiles = encode_profiles([user_id] + candidate_ids, load_tokens, cache=profile_cache)
+    ranked = rank_profiles(unpack_profile(caller), candidate_ids, candidate_profiles, limit=Config.DECK_SIZE)
+    return DiscoverDeck.push_candidates(user_id, [candidate_id for candidate_id, _ in ranked])
+
+
+def _refill(user_id):
+    """Refill a deck in the background and clear its pending flag"""
+    try:
+        refill_deck(user_id)
+    except Exception as e:
+        print(f"⚠ Warning: Failed to refill discover deck for {user_id}: {str(e)}")
+    finally:
+        with _pending_lock:
+            _pending.discard(user_id)
+
+
+def schedule_refill(user_id):
+    """
+    Queue a background refill of a user's deck unless one is already pending
+    Args:
+        user_id: User ID string
+    Returns:
+        bool: True if a refill was scheduled
+    """
+    user_id = str(user_id)
+    with _pending_lock:
+        if user_id in _pending:
+            return False
+        _pending.add(user_id)
+    _executor.submit(_refill, user_id)
+    return True
@@ -0,0 +1,29 @@
+from app.storage.circuit_breaker import is_unavailable
+
+
+def failure_response(error, message='Internal server error'):
+    """
+    Build the response for an unexpected exception
+    Database outages, queries cut short by the request deadline and an open
+    circuit breaker become 503 with a retry_after hint so clients back off;
+    anything else stays a 500
+    Args:
+        error: Exception that was caught
+        message: Prefix of the 500 error message
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    if is_unavailable(error):
+        return {
+            'error': 'Database temporarily unavailable, please retry later',
+            'status_code': 503,
+            'retry_after': getattr(error, 'retry_after', 1)
+        }, 503
+    return {'error': f'{message}: {str(error)}', 'status_code': 500}, 500
+
+
+def retry_after_headers(response):
+    """Build a Retry-After header for responses rejected under load"""
+    if 'retry_after' in response:
+        return {'Retry-After': str(response['retry_after'])}
+    return {}
@@ -0,0 +1,55 @@
+import hashlib
+
+# Responses carrying an ETag are per user and must be revalidated before reuse
+CACHE_CONTROL = 'private, no-cache'
+
+
+def compute_etag(*parts):
+    """
+    Build a strong validator from the values a representation depends on
+    Args:
+        parts: Values such as IDs, timestamps, counts and query parameters
+    Returns:
+        ETag value (unquoted hex digest)
+    """
+    key = '\x1f'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def is_not_modified(request, etag):
+    """
+    Check a request's If-None-Match header against the current ETag
+    Args:
+        request: Flask or Quart request
+        etag: Current ETag value or None
+    Returns:
+        bool: True if a 304 can be returned
+    """
+    return bool(etag) and request.if_none_match.contains_weak(etag)
+
+
+def not_modified_response(response_class, etag):
+    """
+    Build an empty 304 response
+    Args:
+        response_class: Response class of the app (Flask or Quart)
+        etag: Current ETag value
+    Returns:
+        Response object
+    """
+    return set_etag(response_class('', status=304), etag)
+
+
+def set_etag(response, etag):
+    """
+    Attach an ETag and the revalidation Cache-Control header to a response
+    Args:
+        response: Flask or Quart response
+        etag: ETag value or None (no header is set)
+    Returns:
+        The same response
+    """
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+
+# Fallback start time when /proc is not available (close to interpreter start)
+_IMPORTED_AT = time.time()
+
+
+def process_start_time():
+    """
+    Get the wall-clock time the current process started
+    Reads /proc/self/stat on Linux; elsewhere falls back to when this module was imported
+    Returns:
+        float: Unix timestamp
+    """
+    try:
+        with open('/proc/self/stat') as f:
+            # The command name may contain spaces; the fields after it are fixed
+            fields = f.read().rsplit(')', 1)[1].split()
+        started_after_boot = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        # /proc/uptime has 10ms resolution (btime in /proc/stat only whole seconds)
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - started_after_boot)
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED_AT
+
+
+class ColdStartTimer:
+    """Measure the time from process start to the first request served"""
+    
+    def __init__(self):
+        self.started_at = process_start_time()
+        self.app_ready_seconds = None
+        self.first_request_seconds = None
+        self._lock = threading.Lock()
+    
+    def app_ready(self):
+        """Record that create_app() finished"""
+        self.app_ready_seconds = time.time() - self.started_at
+    
+    def request_served(self):
+        """
+        Record a served request (only the first one is kept)
+        Returns:
+            bool: True if this was the first request
+        """
+        if self.first_request_seconds is not None:
+            return False
+        with self._lock:
+            if self.first_request_seconds is not None:
+                return False
+            self.first_request_seconds = time.time() - self.started_at
+        return True
+    
+    def to_dict(self):
+        def rounded(seconds):
+            return round(seconds, 3) if seconds is not None else None
+        return {
+            'app_ready_seconds': rounded(self.app_ready_seconds),
+            'first_request_seconds': rounded(self.first_request_seconds)
+        }
+
+
+class ConnectionMonitor:
+    """
+    Watch the database from a background thread
+    pymongo connects and reconnects on its own; the monitor pings on an
+    interval so the app knows whether the database is up without blocking a
+    request, logs transitions, and runs the on_connect callbacks (e.g. index
+    creation) the first time the database becomes reachable
+    """
+    
+    def __init__(self, storage, interval=5.0, timeout=1.0, on_connect=()):
+        """
+        Args:
+            storage: StorageBackend to ping
+            interval: Seconds between pings
+            timeout: Seconds a ping may take
+            on_connect: Callables run once, on the first successful ping
+        """
+        self.storage = storage
+        self.interval = interval
+        self.timeout = timeout
+        self.connected = None
+        self.last_error = None
+        self.last_checked = None
+        self._pending = list(on_connect)
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start pinging in a daemon thread (returns immediately)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='connection-monitor', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def check(self):
+        """
+        Ping once and update the connection state
+        Returns:
+            bool: True if the database answered
+        """
+        try:
+            self.storage.ping(timeout=self.timeout)
+            error = None
+        except Exception as e:
+            error = str(e)
+        self.last_checked = time.time()
+        self.last_error = error
+        connected = error is None
+        
+        if connected and self.connected is not True:
+            print(f"✓ Connected to {self.storage.name} storage")
+            self._run_pending()
+        elif not connected and self.connected is not False:
+            print(f"⚠ Warning: {self.storage.name} storage unreachable: {error}")
+            print("⚠ Requests that need the database will fail until it is available (retrying in the background)")
+        self.connected = connected
+        return connected
+    
+    def _run_pending(self):
+        while self._pending:
+            callback = self._pending[0]
+            try:
+                callback()
+            except Exception as e:
+                # Keep it pending; it is retried after the next successful ping
+                print(f"⚠ Warning: Startup task {callback.__name__} failed: {str(e)}")
+                return
+            self._pending.pop(0)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            if self._pending and self.connected:
+                self._run_pending()
+            self._stop.wait(self.interval)
+
+
+class ReadinessCheck:
+    """
+    Run dependency checks for /readyz, caching the result
+    Load balancers poll readiness often; the cache keeps that to one database
+    ping per ttl per process, and a single thread refreshes it while the
+    others keep answering from the previous result
+    """
+    
+    def __init__(self, checks, ttl=2.0):
+        """
+        Args:
+            checks: dict mapping a name to a callable returning None when healthy or an error string
+            ttl: Seconds a result is reused
+        """
+        self.checks = checks
+        self.ttl = ttl
+        self._result = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+    
+    def _run_checks(self):
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                error = check()
+            except Exception as e:
+                error = str(e)
+            results[name] = {'status': 'ok'} if error is None else {'status': 'failing', 'error': error}
+        ready = all(result['status'] == 'ok' for result in results.values())
+        return ready, results
+    
+    def status(self):
+        """
+        Get the (cached) readiness
+        Returns:
+            tuple: (ready: bool, dict of per-check results)
+        """
+        if self._result is not None and time.monotonic() < self._expires:
+            return self._result
+        if not self._lock.acquire(blocking=self._result is None):
+            return self._result
+        try:
+            if self._result is None or time.monotonic() >= self._expires:
+                self._result = self._run_checks()
+                self._expires = time.monotonic() + self.ttl
+            return self._result
+        finally:
+            self._lock.release()
+
+
+def storage_check(timeout):
+    """
+    Readiness check that pings the current storage backend
+    Args:
+        timeout: Seconds the ping may take
+    Returns:
+        Callable returning None or an error string
+    """
+    def check():
+        from app.storage import get_storage
+        try:
+            get_storage().ping(timeout=timeout)
+        except Exception as e:
+            # /readyz is public: report the error type, not the topology description
+            return type(e).__name__
+        return None
+    return check
+
+
+def install_health_routes(app, readiness, cold_start):
+    """
+    Add / and /healthz (liveness) and /readyz (readiness) to a Flask app
+    /healthz answers as long as the process serves requests and never touches
+    the database, so a database outage does not get workers restarted;
+    /readyz returns 503 while a dependency is failing
+    Args:
+        app: Flask application
+        readiness: ReadinessCheck
+        cold_start: ColdStartTimer, filled in by the first request
+    """
+    @app.after_request
+    def record_cold_start(response):
+        if cold_start.request_served():
+            print(f"✓ First request served {cold_start.first_request_seconds * 1000:.0f}ms after process start")
+        return response
+    
+    @app.route('/')
+    def health_check():
+        # Kept for the clients and uptime monitors that poll the root URL; same contract as /healthz
+        return {'status': 'ok', 'message': 'Heartbeat Dating App Backend API'}, 200
+    
+    @app.route('/healthz')
+    def healthz():
+        return {'status': 'ok', 'pid': os.getpid(), 'cold_start': cold_start.to_dict()}, 200
+    
+    @app.route('/readyz')
+    def readyz():
+        ready, checks = readiness.status()
+        return {'status': 'ready' if ready else 'unavailable', 'checks': checks}, 200 if ready else 503
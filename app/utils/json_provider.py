@@ -0,0 +1,108 @@
+import json
+from datetime import date, datetime
+from uuid import UUID
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _default(obj):
+    """Encode the BSON and datetime values that model documents carry"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, RawBSONDocument):
+        # Embedded documents of a raw read are decoded only here
+        return dict(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(JSONProvider):
+    """
+    JSON provider on the standard library encoder
+    Encodes ObjectId as its hex string and datetime as ISO 8601, so model
+    documents can be returned without converting every field first
+    """
+    
+    sort_keys = True
+    compact = None
+    mimetype = 'application/json'
+    
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        return json.loads(s, **kwargs)
+    
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self._indent():
+            body = self.dumps(obj, indent=2)
+        else:
+            body = self.dumps(obj, separators=(',', ':'))
+        return self._app.response_class(f"{body}\n", mimetype=self.mimetype)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """
+    JSON provider on orjson
+    orjson serializes datetime natively in C and writes bytes straight into
+    the response body; ObjectId goes through the same default hook
+    """
+    
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj, indent=bool(kwargs.get('indent')), newline=False).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def _encode(self, obj, indent=False, newline=True):
+        option = orjson.OPT_APPEND_NEWLINE if newline else 0
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj, indent=self._indent()), mimetype=self.mimetype)
+
+
+# Providers selectable with the JSON_PROVIDER setting
+JSON_PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'stdlib': StdlibJSONProvider
+}
+
+
+def install_json_provider(app, name):
+    """
+    Replace an app's JSON provider (works for Flask and Quart apps)
+    Args:
+        app: Flask or Quart application
+        name: Key of JSON_PROVIDERS
+    Returns:
+        Name of the installed provider
+    """
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON provider '{name}', expected one of {sorted(JSON_PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        print("⚠ Warning: orjson is not installed, falling back to the stdlib JSON provider")
+        name = 'stdlib'
+    app.json = JSON_PROVIDERS[name](app)
+    return name
@@ -1,6 +1,15 @@
+import hashlib
+import threading
+import time
 import jwt
 from datetime import datetime, timedelta
 from app.config import Config
+from app.utils.cache import LRUTTLCache
+
+# Already-verified tokens, keyed by a digest of the token string
+_token_cache = LRUTTLCache(maxsize=Config.TOKEN_CACHE_SIZE, ttl=Config.TOKEN_CACHE_TTL_SECONDS)
+_verify_lock = threading.Lock()
+_verify_stats = {'verifications': 0, 'failures': 0, 'seconds': 0.0}
 
 
 def generate_token(user_id, email):
@@ -41,3 +50,59 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         return None
 
+
+def decode_token_cached(token):
+    """
+    Decode and validate JWT token, reusing earlier verifications of the same token
+    Cached entries expire no later than the token's exp claim
+    Args:
+        token: JWT token string
+    Returns:
+        dict with user_id and email, or None if invalid
+    """
+    if not Config.TOKEN_CACHE_ENABLED:
+        return decode_token(token)
+    
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        return payload
+    
+    start = time.perf_counter()
+    payload = decode_token(token)
+    elapsed = time.perf_counter() - start
+    with _verify_lock:
+        _verify_stats['verifications'] += 1
+        _verify_stats['seconds'] += elapsed
+        if not payload:
+            _verify_stats['failures'] += 1
+    
+    if payload:
+        remaining = payload.get('exp', 0) - time.time()
+        if remaining > 0:
+            _token_cache.set(key, payload, ttl=min(remaining, Config.TOKEN_CACHE_TTL_SECONDS))
+    return payload
+
+
+def token_cache_stats():
+    """
+    Get verified-token cache statistics
+    Returns:
+        dict with cache counters, hit rate and average verification latency
+    """
+    stats = _token_cache.stats()
+    lookups = stats['hits'] + stats['misses']
+    with _verify_lock:
+        verifications = _verify_stats['verifications']
+        stats['verifications'] = verifications
+        stats['verification_failures'] = _verify_stats['failures']
+        stats['avg_verification_ms'] = (
+            _verify_stats['seconds'] * 1000 / verifications if verifications else 0.0
+        )
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def clear_token_cache():
+    """Drop every cached verification (e.g. after rotating JWT_SECRET_KEY)"""
+    _token_cache.clear()
@@ -0,0 +1,243 @@
+import threading
+from pymongo.errors import PyMongoError
+from app.config import Config
+
+
+class MatchEventSource:
+    """
+    Delivers newly created matches to the match streams open in this process
+    Subscribers register a deliver callable per user; it is called with the
+    match document from the publishing (or watching) thread, so it must only
+    hand the document over (e.g. put it on a queue)
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+    
+    def subscribe(self, user_id, deliver):
+        """
+        Receive the matches of a user
+        Args:
+            user_id: User ID string
+            deliver: Callable taking a match document
+        Returns:
+            Callable that cancels the subscription
+        """
+        user_id = str(user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(deliver)
+        
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(user_id)
+                if callbacks:
+                    callbacks.discard(deliver)
+                    if not callbacks:
+                        del self._subscribers[user_id]
+        
+        return unsubscribe
+    
+    def publish(self, match):
+        """
+        Announce a match created by this process
+        Args:
+            match: Match document
+        """
+        raise NotImplementedError
+    
+    def subscriber_count(self):
+        """Number of open subscriptions in this process"""
+        with self._lock:
+            return sum(len(callbacks) for callbacks in self._subscribers.values())
+    
+    def close(self):
+        """Release background resources"""
+    
+    def _dispatch(self, match):
+        """Call the subscribers of both users of a match"""
+        for user_id in (match.get('user_id_1'), match.get('user_id_2')):
+            with self._lock:
+                callbacks = list(self._subscribers.get(str(user_id), ()))
+            for deliver in callbacks:
+                try:
+                    deliver(match)
+                except Exception as e:
+                    print(f"⚠ Warning: Failed to deliver match event to {user_id}: {str(e)}")
+
+
+class InProcessMatchEvents(MatchEventSource):
+    """Single-node pub/sub: matches reach the streams of the process that created them"""
+    
+    def publish(self, match):
+        self._dispatch(match)
+
+
+class ChangeStreamMatchEvents(MatchEventSource):
+    """
+    Multi-node event source on a MongoDB change stream (requires a replica set)
+    Every process watches inserts into the matches collection, so a match
+    reaches its users' streams whichever worker or node created it
+    """
+    
+    def __init__(self, get_collection, retry_seconds=5):
+        super().__init__()
+        self._get_collection = get_collection
+        self._retry_seconds = retry_seconds
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def subscribe(self, user_id, deliver):
+        self._ensure_watching()
+        return super().subscribe(user_id, deliver)
+    
+    def publish(self, match):
+        # The insert itself reaches every process through the change stream
+        pass
+    
+    def close(self):
+        self._stop.set()
+    
+    def _ensure_watching(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name='match-change-stream', daemon=True)
+                self._thread.start()
+    
+    def _watch(self):
+        """Follow matches inserts, resuming after errors from the last seen event"""
+        pipeline = [{'$match': {'operationType': 'insert'}}]
+        resume_token = None
+        while not self._stop.is_set():
+            try:
+                collection = self._get_collection()
+                with collection.watch(pipeline, resume_after=resume_token, max_await_time_ms=1000) as stream:
+                    while not self._stop.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        resume_token = stream.resume_token
+                        self._dispatch(change['fullDocument'])
+            except (PyMongoError, ConnectionError) as e:
+                self.last_error = str(e)
+                print(f"⚠ Warning: Match change stream failed, retrying: {str(e)}")
+                self._stop.wait(self._retry_seconds)
+            except Exception as e:
+                # Anything else is a bug, but the thread must not die silently with streams waiting on it
+                self.last_error = f"{type(e).__name__}: {str(e)}"
+                print(f"⚠ Warning: Match change stream crashed, retrying: {self.last_error}")
+                self._stop.wait(self._retry_seconds)
+
+
+def _create_source(name):
+    """Build the event source selected by MATCH_EVENTS_BACKEND"""
+    if name == 'memory':
+        return InProcessMatchEvents()
+    if name == 'change_stream':
+        from app.models.match import Match
+        from app.storage import get_storage
+        storage = get_storage()
+        if not storage.supports_change_streams:
+            raise ValueError(
+                f"MATCH_EVENTS_BACKEND 'change_stream' needs MongoDB, the {storage.name} storage cannot watch collections"
+            )
+        return ChangeStreamMatchEvents(Match.get_collection)
+    raise ValueError(f"Unknown MATCH_EVENTS_BACKEND '{name}', expected 'memory' or 'change_stream'")
+
+
+# Process-wide event source, created on first use
+match_events = None
+_source_lock = threading.Lock()
+
+
+def get_match_events():
+    """Get the process-wide match event source"""
+    global match_events
+    if match_events is None:
+        with _source_lock:
+            if match_events is None:
+                match_events = _create_source(Config.MATCH_EVENTS_BACKEND)
+    return match_events
+
+
+def set_match_events(source):
+    """
+    Replace the process-wide match event source (e.g. with a custom backend)
+    Args:
+        source: MatchEventSource implementation
+    """
+    global match_events
+    if match_events is not None:
+        match_events.close()
+    match_events = source
+
+
+def publish_match(match):
+    """
+    Announce a newly created match, never failing the caller
+    Args:
+        match: Match document
+    """
+    try:
+        get_match_events().publish(match)
+    except Exception as e:
+        print(f"⚠ Warning: Failed to publish match event: {str(e)}")
+
+
+class StreamSlots:
+    """
+    Cap the match streams open at once in this process
+    A gthread worker gives each open stream a whole thread for as long as the
+    client stays connected; past the limit new streams are refused so that
+    threads are left for the other routes
+    """
+    
+    def __init__(self, limit):
+        """
+        Args:
+            limit: Maximum number of open streams (0 refuses every stream)
+        """
+        self.limit = limit
+        self.open = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Take a slot for a new stream
+        Returns:
+            bool: False if the limit is reached
+        """
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+    
+    def release(self):
+        """Give back the slot of a closed stream"""
+        with self._lock:
+            self.open -= 1
+
+
+# Streams served by the Flask (gunicorn) app; the async mode has no thread per stream
+sync_stream_slots = StreamSlots(Config.MATCH_STREAMS_MAX_SYNC)
+
+
+def format_sse(data, event=None, event_id=None):
+    """
+    Format one Server-Sent Events message
+    Args:
+        data: Serialized payload string (single line)
+        event: Optional event name
+        event_id: Optional event ID (sent back by clients as Last-Event-ID)
+    Returns:
+        SSE message string
+    """
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,312 @@
+import os
+import threading
+import time
+from pymongo import monitoring
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest
+)
+from prometheus_client import multiprocess
+
+# Buckets for Mongo round trips, which are much shorter than whole requests
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'HTTP requests by route and status',
+    ['method', 'route', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route',
+    ['method', 'route']
+)
+HTTP_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests being handled by route',
+    ['method', 'route'],
+    multiprocess_mode='livesum'
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    'mongodb_command_duration_seconds',
+    'MongoDB command latency by collection and command',
+    ['collection', 'command'],
+    buckets=MONGO_BUCKETS
+)
+MONGO_COMMAND_FAILURES = Counter(
+    'mongodb_command_failures_total',
+    'Failed MongoDB commands by collection and command',
+    ['collection', 'command']
+)
+MONGO_CHECKOUT_WAIT = Histogram(
+    'mongodb_pool_checkout_wait_seconds',
+    'Time spent waiting for a pooled MongoDB connection',
+    ['address'],
+    buckets=MONGO_BUCKETS
+)
+MONGO_CHECKOUT_FAILURES = Counter(
+    'mongodb_pool_checkout_failures_total',
+    'MongoDB connection checkouts that failed (e.g. wait queue timeout)',
+    ['address', 'reason']
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    'mongodb_pool_connections',
+    'Open MongoDB connections in the pool',
+    ['address'],
+    multiprocess_mode='livesum'
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    'mongodb_pool_checked_out_connections',
+    'MongoDB connections currently checked out of the pool',
+    ['address'],
+    multiprocess_mode='livesum'
+)
+
+# In-process caches, sampled from their stats() (per worker counters, summed over the live workers)
+CACHE_HITS = Gauge(
+    'app_cache_hits',
+    'Cache hits by cache',
+    ['cache'],
+    multiprocess_mode='livesum'
+)
+CACHE_MISSES = Gauge(
+    'app_cache_misses',
+    'Cache misses by cache',
+    ['cache'],
+    multiprocess_mode='livesum'
+)
+CACHE_EVICTIONS = Gauge(
+    'app_cache_evictions',
+    'Entries evicted to stay within the size bound, by cache',
+    ['cache'],
+    multiprocess_mode='livesum'
+)
+CACHE_EXPIRATIONS = Gauge(
+    'app_cache_expirations',
+    'Entries dropped after their TTL, by cache',
+    ['cache'],
+    multiprocess_mode='livesum'
+)
+CACHE_ENTRIES = Gauge(
+    'app_cache_entries',
+    'Entries currently cached, by cache',
+    ['cache'],
+    multiprocess_mode='livesum'
+)
+JWT_VERIFICATIONS = Gauge(
+    'jwt_verifications',
+    'JWT signature verifications (token cache misses)',
+    multiprocess_mode='livesum'
+)
+JWT_VERIFICATION_FAILURES = Gauge(
+    'jwt_verification_failures',
+    'JWTs that failed verification',
+    multiprocess_mode='livesum'
+)
+
+# Seconds between two samples of the cache counters by the requests of a worker
+CACHE_SAMPLE_SECONDS = 5.0
+_cache_sampled_at = 0.0
+
+# Commands whose first field is not a collection name
+_COLLECTION_FIELDS = {'getMore': 'collection'}
+
+
+def _address_label(address):
+    host, port = address
+    return f"{host}:{port}"
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Record the latency of every MongoDB command by collection and command name"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections = {}
+    
+    def started(self, event):
+        target = event.command.get(_COLLECTION_FIELDS.get(event.command_name, event.command_name))
+        collection = target if isinstance(target, str) else ''
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = collection
+    
+    def _collection_of(self, event):
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), '')
+    
+    def succeeded(self, event):
+        collection = self._collection_of(event)
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1_000_000)
+    
+    def failed(self, event):
+        collection = self._collection_of(event)
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1_000_000)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Track pool size, checked out connections and checkout wait times"""
+    
+    def __init__(self):
+        # Checkouts start and finish on the same thread
+        self._local = threading.local()
+    
+    def connection_check_out_started(self, event):
+        self._local.checkout_started = time.perf_counter()
+    
+    def connection_checked_out(self, event):
+        started = getattr(self._local, 'checkout_started', None)
+        address = _address_label(event.address)
+        if started is not None:
+            MONGO_CHECKOUT_WAIT.labels(address).observe(time.perf_counter() - started)
+            self._local.checkout_started = None
+        MONGO_POOL_CHECKED_OUT.labels(address).inc()
+    
+    def connection_check_out_failed(self, event):
+        self._local.checkout_started = None
+        MONGO_CHECKOUT_FAILURES.labels(_address_label(event.address), str(event.reason)).inc()
+    
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.labels(_address_label(event.address)).dec()
+    
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.labels(_address_label(event.address)).inc()
+    
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.labels(_address_label(event.address)).dec()
+    
+    def connection_ready(self, event):
+        pass
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+
+
+def mongo_event_listeners():
+    """
+    Listeners to pass to MongoClient/AsyncIOMotorClient(event_listeners=...)
+    Returns:
+        List of pymongo event listeners
+    """
+    return [CommandMetricsListener(), PoolMetricsListener()]
+
+
+def _cache_stats():
+    """Get the stats() of every exported cache by label"""
+    from app.models.user import User
+    from app.utils.compatibility import profile_cache
+    from app.utils.jwt_utils import token_cache_stats
+    return {
+        'user': User.cache_stats(),
+        'jwt': token_cache_stats(),
+        'taste_profile': profile_cache.stats()
+    }
+
+
+def sample_cache_metrics():
+    """Copy the counters of the in-process caches into their gauges"""
+    global _cache_sampled_at
+    _cache_sampled_at = time.monotonic()
+    for cache, stats in _cache_stats().items():
+        CACHE_HITS.labels(cache).set(stats['hits'])
+        CACHE_MISSES.labels(cache).set(stats['misses'])
+        CACHE_EVICTIONS.labels(cache).set(stats['evictions'])
+        CACHE_EXPIRATIONS.labels(cache).set(stats['expirations'])
+        CACHE_ENTRIES.labels(cache).set(stats['size'])
+        if cache == 'jwt':
+            JWT_VERIFICATIONS.set(stats['verifications'])
+            JWT_VERIFICATION_FAILURES.set(stats['verification_failures'])
+
+
+def start_request(method, route):
+    """
+    Mark a request as in progress
+    Args:
+        method: HTTP method
+        route: URL rule of the matched route (low cardinality)
+    Returns:
+        Start time to pass to finish_request
+    """
+    HTTP_IN_PROGRESS.labels(method, route).inc()
+    return time.perf_counter()
+
+
+def finish_request(started, method, route, status):
+    """
+    Record a finished request
+    Args:
+        started: Value returned by start_request
+        method: HTTP method
+        route: URL rule passed to start_request
+        status: HTTP status code
+    """
+    HTTP_IN_PROGRESS.labels(method, route).dec()
+    HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    # Every worker refreshes its cache gauges, not only the one serving /metrics
+    if time.monotonic() - _cache_sampled_at >= CACHE_SAMPLE_SECONDS:
+        sample_cache_metrics()
+
+
+def route_label(request):
+    """Get the URL rule of a Flask or Quart request, or 'unmatched'"""
+    rule = getattr(request, 'url_rule', None)
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def instrument_app(app):
+    """
+    Record request count, latency and in-flight requests of a Flask app
+    Args:
+        app: Flask application
+    """
+    from flask import g, request
+    
+    @app.before_request
+    def start_request_timer():
+        route = route_label(request)
+        g.metrics_request = (request.method, route, start_request(request.method, route))
+    
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+    
+    @app.teardown_request
+    def finish_request_timer(error=None):
+        # Runs after streamed responses have finished too
+        started = g.pop('metrics_request', None)
+        if started:
+            method, route, start = started
+            finish_request(start, method, route, g.pop('metrics_status', 500))
+
+
+def render_metrics():
+    """
+    Render every metric in the Prometheus text format
+    With several worker processes (PROMETHEUS_MULTIPROC_DIR set), the values
+    written by all workers are aggregated
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    sample_cache_metrics()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,541 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from bson import ObjectId
+from app.utils.compatibility import normalize
+
+NUM_PERM = 128
+BANDS = 32
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint32(0xFFFFFFFF)
+
+# Binary file layout (every section aligned to its item size, all memory-mapped):
+#   header
+#   id_order     count int64, snapshot rows ordered by user ID
+#   band_keys    bands * count uint64, each band's keys sorted
+#   signatures   count * NUM_PERM uint32
+#   band_order   bands * count uint32, snapshot row of each sorted band key
+#   ids          count * 12-byte ObjectIds
+FILE_MAGIC = b'MHLSH2\x00\x00'
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('num_perm', '<u4'), ('bands', '<u4'), ('count', '<u8'), ('built_at', '<f8')
+])
+
+# Fixed seed so every worker and every rebuild produce comparable signatures
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def _timestamp(value):
+    """Unix time of a naive UTC datetime (as stored by the models), or now for None"""
+    if value is None:
+        return time.time()
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def playlist_tokens(playlist_doc):
+    """
+    Extract the MinHash tokens of a playlist: its songs and their artists
+    Args:
+        playlist_doc: MongoDB playlist document (or dict with a songs array)
+    Returns:
+        set of namespaced tokens
+    """
+    tokens = set()
+    for song in playlist_doc.get('songs') or []:
+        artist_name = normalize(song.get('artist_name', ''))
+        tokens.add(f"song:{normalize(song.get('song_name', ''))}|{artist_name}")
+        tokens.add(f"artist:{artist_name}")
+    return tokens
+
+
+def signature(tokens):
+    """
+    Compute the MinHash signature of a token set
+    Args:
+        tokens: Iterable of token strings
+    Returns:
+        numpy uint32 array of NUM_PERM values (all MAX_HASH for an empty set)
+    """
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little') for token in tokens),
+        dtype=np.uint64
+    )
+    if not len(hashes):
+        return np.full(NUM_PERM, MAX_HASH, dtype=np.uint32)
+    permuted = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % MERSENNE_PRIME
+    return (permuted.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def _band_keys(signatures, bands):
+    """
+    Hash each band of a batch of signatures into one uint64 key
+    Args:
+        signatures: (N, NUM_PERM) uint32 array
+        bands: Number of LSH bands
+    Returns:
+        (N, bands) uint64 array
+    """
+    rows = signatures.shape[1] // bands
+    chunks = signatures.reshape(len(signatures), bands, rows).astype(np.uint64)
+    keys = np.full((len(signatures), bands), 14695981039346656037, dtype=np.uint64)
+    for row in range(rows):
+        keys = (keys ^ chunks[:, :, row]) * np.uint64(1099511628211)
+    return keys
+
+
+def _snapshot_tables(ids, signatures, bands):
+    """
+    Build the sorted lookup tables of a snapshot
+    Args:
+        ids: (N, 12) uint8 array of user IDs
+        signatures: (N, NUM_PERM) uint32 array
+        bands: Number of LSH bands
+    Returns:
+        tuple: (id_order int64 (N,), band_keys uint64 (bands, N), band_order uint32 (bands, N))
+    """
+    id_order = np.argsort(np.asarray(ids).view('S12').ravel(), kind='stable').astype(np.int64)
+    keys = _band_keys(np.asarray(signatures), bands).T
+    band_order = np.argsort(keys, axis=1, kind='stable')
+    band_keys = np.take_along_axis(keys, band_order, axis=1)
+    return id_order, np.ascontiguousarray(band_keys), band_order.astype(np.uint32)
+
+
+class MinHashLSHIndex:
+    """Approximate similar-user index over MinHash signatures with LSH banding
+    
+    The base snapshot (IDs, signatures and their sorted lookup tables) is
+    memory-mapped from a compact binary file, so workers share its pages and
+    loading it costs no computation. Updates made since the snapshot was
+    built go to a small in-memory overlay, banded like the snapshot, that
+    shadows it; IndexRefresher keeps every worker's overlay in sync and
+    drops what a newer snapshot already contains. The overlay is bounded by
+    max_overlay: past that, the oldest updates are dropped and those users
+    fall back to their snapshot signature until the next rebuild.
+    """
+    
+    def __init__(self, bands=BANDS, max_overlay=None):
+        if NUM_PERM % bands:
+            raise ValueError(f"bands must divide {NUM_PERM}")
+        self.bands = bands
+        self.max_overlay = max_overlay
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+        self._set_base(np.zeros((0, 12), dtype=np.uint8), np.zeros((0, NUM_PERM), dtype=np.uint32))
+        # key -> (signature or None for a removed user, band keys or None, update time), oldest first
+        self._overlay = {}
+        # One dict per band: band key -> set of overlay user keys
+        self._overlay_bands = [{} for _ in range(bands)]
+        self._overflow_warned = False
+    
+    def _set_base(self, ids, signatures, tables=None):
+        """Install a snapshot with its lookup tables (built when not given)"""
+        self._base_ids = ids
+        self._base_signatures = signatures
+        self._id_order, self._band_keys, self._band_order = tables or _snapshot_tables(ids, signatures, self.bands)
+        self._id_keys = np.asarray(ids).view('S12').ravel()
+        self._alive = np.ones(len(ids), dtype=np.bool_)
+    
+    def _base_slot(self, key):
+        """Find the snapshot row of a 12-byte user ID, or None"""
+        i = int(np.searchsorted(self._id_keys, np.bytes_(key), sorter=self._id_order))
+        if i < len(self._id_order):
+            slot = int(self._id_order[i])
+            # tobytes() keeps trailing NUL bytes that numpy strips from 'S12' scalars
+            if self._base_ids[slot].tobytes() == key:
+                return slot
+        return None
+    
+    def __len__(self):
+        with self._lock:
+            return int(self._alive.sum()) + sum(1 for entry in self._overlay.values() if entry[0] is not None)
+    
+    @property
+    def overlay_size(self):
+        return len(self._overlay)
+    
+    @classmethod
+    def build(cls, entries, bands=BANDS, built_at=None):
+        """
+        Build an index from (user_id, tokens) pairs
+        Args:
+            entries: Iterable of (user ObjectId, token set)
+            bands: Number of LSH bands
+            built_at: Unix time the entries were read from (defaults to now); updates
+                made after it are kept by workers that load the saved index
+        Returns:
+            MinHashLSHIndex
+        """
+        index = cls(bands=bands)
+        index.built_at = time.time() if built_at is None else built_at
+        ids = []
+        signatures = []
+        for user_id, tokens in entries:
+            if tokens:
+                ids.append(np.frombuffer(user_id.binary, dtype=np.uint8))
+                signatures.append(signature(tokens))
+        if ids:
+            index._set_base(np.stack(ids), np.stack(signatures))
+        return index
+    
+    @classmethod
+    def load(cls, path, max_overlay=None):
+        """
+        Memory-map an index file written by save()
+        Args:
+            path: File path
+            max_overlay: Optional bound on the number of overlay entries
+        Returns:
+            MinHashLSHIndex
+        """
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if not len(header) or header[0]['magic'] != FILE_MAGIC.rstrip(b'\x00') or header[0]['num_perm'] != NUM_PERM:
+            raise ValueError(f"{path} is not a compatible MinHash index file (rebuild it with `flask db build-minhash-index`)")
+        
+        header = header[0]
+        count = int(header['count'])
+        bands = int(header['bands'])
+        index = cls(bands=bands, max_overlay=max_overlay)
+        index.built_at = float(header['built_at'])
+        if count:
+            offset = HEADER_DTYPE.itemsize
+            sections = {}
+            for name, dtype, shape in (
+                ('id_order', '<i8', (count,)),
+                ('band_keys', '<u8', (bands, count)),
+                ('signatures', '<u4', (count, NUM_PERM)),
+                ('band_order', '<u4', (bands, count)),
+                ('ids', np.uint8, (count, 12))
+            ):
+                sections[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+                offset += sections[name].nbytes
+            index._set_base(
+                sections['ids'],
+                sections['signatures'],
+                (sections['id_order'], sections['band_keys'], sections['band_order'])
+            )
+        return index
+    
+    def save(self, path):
+        """
+        Write the snapshot merged with the overlay to a binary file atomically
+        Args:
+            path: File path
+        Returns:
+            Number of users written
+        """
+        with self._lock:
+            keep = np.flatnonzero(self._alive)
+            ids = [np.asarray(self._base_ids[keep])]
+            signatures = [np.asarray(self._base_signatures[keep])]
+            for key, (sig, _, _) in self._overlay.items():
+                if sig is not None:
+                    ids.append(np.frombuffer(key, dtype=np.uint8)[None, :])
+                    signatures.append(sig[None, :])
+            # Not the newest overlay time: other workers may hold older updates this one lacks
+            built_at = self.built_at
+        ids = np.concatenate(ids)
+        signatures = np.concatenate(signatures).astype('<u4')
+        id_order, band_keys, band_order = _snapshot_tables(ids, signatures, self.bands)
+        
+        header = np.array([(FILE_MAGIC, NUM_PERM, self.bands, len(ids), built_at)], dtype=HEADER_DTYPE)
+        # Unique temporary name: several workers or a cron job may save at once
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for section in (
+                header,
+                id_order.astype('<i8'),
+                band_keys.astype('<u8'),
+                signatures,
+                band_order.astype('<u4'),
+                ids
+            ):
+                f.write(section.tobytes())
+        os.replace(tmp_path, path)
+        return len(ids)
+    
+    def _drop_overlay(self, key):
+        """Remove a user's overlay entry and its band postings (lock held)"""
+        entry = self._overlay.pop(key, None)
+        if entry is not None and entry[1] is not None:
+            for band, band_key in enumerate(entry[1]):
+                users = self._overlay_bands[band].get(band_key)
+                if users is not None:
+                    users.discard(key)
+                    if not users:
+                        del self._overlay_bands[band][band_key]
+        return entry
+    
+    def _apply(self, key, sig, band_keys, updated_at):
+        """Store an update in the overlay unless a newer one is there (lock held)"""
+        current = self._overlay.get(key)
+        if current is not None and current[2] > updated_at:
+            return
+        self._drop_overlay(key)
+        slot = self._base_slot(key)
+        if slot is not None:
+            self._alive[slot] = False
+        # Re-inserted at the end: the overlay stays ordered from oldest to newest update
+        self._overlay[key] = (sig, band_keys, updated_at)
+        if band_keys is not None:
+            for band, band_key in enumerate(band_keys):
+                self._overlay_bands[band].setdefault(band_key, set()).add(key)
+        if self.max_overlay and len(self._overlay) > self.max_overlay:
+            self._evict_oldest()
+    
+    def update(self, user_id, tokens, updated_at=None):
+        """
+        Insert or replace a user's signature (an empty token set removes the user)
+        Args:
+            user_id: User ObjectId or string
+            tokens: Token set of the user
+            updated_at: Optional datetime (naive UTC) of the change; an update older
+                than the one already applied is ignored
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        sig = signature(tokens) if tokens else None
+        band_keys = [int(band_key) for band_key in _band_keys(sig[None, :], self.bands)[0]] if sig is not None else None
+        with self._lock:
+            self._apply(user_id.binary, sig, band_keys, _timestamp(updated_at))
+    
+    def _evict_oldest(self):
+        """Drop the oldest overlay entries beyond max_overlay (lock held)"""
+        if not self._overflow_warned:
+            self._overflow_warned = True
+            print(
+                f"⚠ Warning: MinHash index overlay reached {self.max_overlay} updates; "
+                f"rebuild the index (flask db build-minhash-index) more often"
+            )
+        while len(self._overlay) > self.max_overlay:
+            key = next(iter(self._overlay))
+            self._drop_overlay(key)
+            # The user is ranked by their snapshot signature again until the next rebuild
+            slot = self._base_slot(key)
+            if slot is not None:
+                self._alive[slot] = True
+    
+    def carry_overlay(self, previous):
+        """
+        Take over the updates of the index this one replaces that are newer than this snapshot
+        Args:
+            previous: MinHashLSHIndex being replaced
+        Returns:
+            Number of updates carried over
+        """
+        with previous._lock:
+            entries = [(key, entry) for key, entry in previous._overlay.items() if entry[2] > self.built_at]
+        with self._lock:
+            for key, (sig, band_keys, updated_at) in entries:
+                self._apply(key, sig, band_keys, updated_at)
+        return len(entries)
+    
+    def signature_of(self, user_id):
+        """
+        Get the stored signature of a user
+        Args:
+            user_id: User ObjectId or string
+        Returns:
+            numpy uint32 array or None if the user is not indexed
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        key = user_id.binary
+        with self._lock:
+            if key in self._overlay:
+                return self._overlay[key][0]
+            slot = self._base_slot(key)
+            if slot is None or not self._alive[slot]:
+                return None
+            return np.asarray(self._base_signatures[slot])
+    
+    def query(self, query_signature, k=10, exclude_ids=None):
+        """
+        Find the approximate top-k most similar users to a signature
+        Only users sharing at least one LSH band are compared, so the cost
+        grows with the number of near neighbours rather than the index size
+        Args:
+            query_signature: numpy uint32 array from signature()
+            k: Number of users to return
+            exclude_ids: Optional set of user ObjectIds to leave out
+        Returns:
+            List of (user ObjectId, estimated Jaccard similarity), best first
+        """
+        query_keys = _band_keys(query_signature[None, :], self.bands)[0]
+        excluded = {user_id.binary for user_id in exclude_ids} if exclude_ids else set()
+        
+        with self._lock:
+            slots = []
+            overlay_keys = set()
+            for band in range(self.bands):
+                band_key = query_keys[band]
+                column = self._band_keys[band]
+                lo = np.searchsorted(column, band_key, side='left')
+                hi = np.searchsorted(column, band_key, side='right')
+                if hi > lo:
+                    slots.append(self._band_order[band, lo:hi])
+                overlay_keys.update(self._overlay_bands[band].get(int(band_key), ()))
+            candidates = []
+            if slots:
+                slots = np.unique(np.concatenate(slots))
+                slots = slots[self._alive[slots]]
+                if len(slots):
+                    similarity = (np.asarray(self._base_signatures[slots]) == query_signature).mean(axis=1)
+                    for slot, score in zip(slots, similarity):
+                        candidates.append((bytes(self._base_ids[slot]), float(score)))
+            
+            for key in overlay_keys:
+                candidates.append((key, float((self._overlay[key][0] == query_signature).mean())))
+        
+        candidates = [(key, score) for key, score in candidates if key not in excluded]
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        return [(ObjectId(key), score) for key, score in candidates[:k]]
+    
+    def query_user(self, user_id, k=10, exclude_ids=None):
+        """
+        Find the approximate top-k most similar users to an indexed user
+        Args:
+            user_id: User ObjectId or string
+            k: Number of users to return
+            exclude_ids: Optional set of user ObjectIds to leave out
+        Returns:
+            List of (user ObjectId, estimated Jaccard similarity), best first
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        query_signature = self.signature_of(user_id)
+        if query_signature is None:
+            return []
+        excluded = set(exclude_ids or ())
+        excluded.add(user_id)
+        return self.query(query_signature, k=k, exclude_ids=excluded)
+
+
+# Process-wide index, loaded at startup from Config.MINHASH_INDEX_PATH when present
+lsh_index = MinHashLSHIndex()
+
+
+def load_index(path, max_overlay=None):
+    """
+    Replace the process-wide index with the one stored at path
+    Updates of the current index that the file does not contain yet are kept
+    Args:
+        path: File path written by MinHashLSHIndex.save
+        max_overlay: Optional bound on the number of overlay entries
+    Returns:
+        Number of users in the loaded index
+    """
+    global lsh_index
+    index = MinHashLSHIndex.load(path, max_overlay=max_overlay)
+    previous = lsh_index
+    index.carry_overlay(previous)
+    lsh_index = index
+    # Again for updates that reached the previous index while it was being replaced
+    index.carry_overlay(previous)
+    return len(index)
+
+
+def get_index():
+    """Get the process-wide MinHash LSH index"""
+    return lsh_index
+
+
+class IndexRefresher:
+    """
+    Keep the process-wide index current from a background thread
+    Each worker only sees the playlist updates it served itself; on every
+    pass the refresher applies the ones written by any worker since the last
+    pass, and reloads the index file when a rebuild replaced it
+    """
+    
+    def __init__(self, path, fetch_updates, interval=30.0, max_overlay=None, batch_size=1000, skew=5.0):
+        """
+        Args:
+            path: Index file path
+            fetch_updates: Callable (since datetime, limit) returning playlist documents
+                (user_id, songs, updated_at) updated after since, oldest first
+            interval: Seconds between passes
+            max_overlay: Bound on the number of overlay entries of a loaded index
+            batch_size: Playlists read per query
+            skew: Seconds re-read before the last update seen, for writes whose
+                updated_at was taken before a newer one committed
+        """
+        self.path = path
+        self.fetch_updates = fetch_updates
+        self.interval = interval
+        self.max_overlay = max_overlay
+        self.batch_size = batch_size
+        self.skew = skew
+        self.last_error = None
+        self.last_checked = None
+        self._mtime = self._file_mtime()
+        self._since = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+    
+    def start(self):
+        """Start refreshing in a daemon thread (returns immediately)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='minhash-refresher', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def check(self):
+        """
+        Run one pass: reload a rebuilt index file, then apply the playlist updates since the last pass
+        Returns:
+            Number of playlist updates applied
+        """
+        try:
+            mtime = self._file_mtime()
+            if mtime is not None and mtime != self._mtime:
+                count = load_index(self.path, max_overlay=self.max_overlay)
+                self._mtime = mtime
+                print(f"✓ Reloaded MinHash index: {count} users")
+            applied = self._apply_updates()
+            self.last_error = None
+        except Exception as e:
+            applied = 0
+            if self.last_error is None:
+                print(f"⚠ Warning: MinHash index refresh failed: {str(e)}")
+            self.last_error = str(e)
+        self.last_checked = time.time()
+        return applied
+    
+    def _apply_updates(self):
+        index = get_index()
+        if not index.built_at:
+            # No snapshot loaded: polling would copy every playlist into the overlay
+            return 0
+        if self._since is None:
+            self._since = index.built_at
+        
+        applied = 0
+        since = self._since - self.skew
+        while True:
+            playlists = list(self.fetch_updates(datetime.utcfromtimestamp(since), self.batch_size))
+            for playlist in playlists:
+                index.update(playlist['user_id'], playlist_tokens(playlist), updated_at=playlist['updated_at'])
+            applied += len(playlists)
+            latest = max((_timestamp(playlist['updated_at']) for playlist in playlists), default=since)
+            self._since = max(self._since, latest)
+            # Continue after a full batch; past the skew window, only newer updates are read
+            if len(playlists) < self.batch_size or latest <= since:
+                return applied
+            since = latest
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,59 @@
+import base64
+from datetime import datetime, timedelta
+from bson import ObjectId
+from bson.errors import InvalidId
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(created_at, doc_id):
+    """
+    Encode a (created_at, _id) keyset position as an opaque cursor
+    Args:
+        created_at: datetime of the document
+        doc_id: ObjectId of the document
+    Returns:
+        URL-safe cursor string
+    """
+    millis = (created_at - EPOCH) // timedelta(milliseconds=1)
+    raw = f"{millis}:{doc_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('utf-8').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor back into its keyset position
+    Args:
+        cursor: Cursor string produced by encode_cursor
+    Returns:
+        tuple: (created_at datetime, ObjectId) or None if invalid
+    """
+    if not cursor or not isinstance(cursor, str):
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        millis, doc_id = base64.urlsafe_b64decode(padded).decode('utf-8').split(':')
+        return EPOCH + timedelta(milliseconds=int(millis)), ObjectId(doc_id)
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        return None
+
+
+def parse_limit(value, default, maximum):
+    """
+    Parse a page size query parameter
+    Args:
+        value: Raw query parameter value (string or None)
+        default: Page size used when value is missing
+        maximum: Largest page size allowed
+    Returns:
+        tuple: (limit: int or None, error_message: str or None)
+    """
+    if value is None or value == '':
+        return default, None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return None, "limit must be an integer"
+    if limit < 1 or limit > maximum:
+        return None, f"limit must be between 1 and {maximum}"
+    return limit, None
@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from app.config import Config
+from app.utils.deadline import remaining
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full and the request should be retried later"""
+    
+    def __init__(self, retry_after):
+        super().__init__('Password hashing queue is full')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool with a bounded queue
+    bcrypt releases the GIL, so request threads waiting on the pool do not
+    stall other requests, and admission control rejects work immediately
+    instead of piling up behind a login storm
+    """
+    
+    def __init__(self, pool_size, queue_depth, rounds, timeout, retry_after):
+        self.rounds = rounds
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='bcrypt')
+        # Running plus queued jobs never exceed pool_size + queue_depth
+        self._slots = threading.BoundedSemaphore(pool_size + queue_depth)
+    
+    def _submit(self, func, *args):
+        """Admit a job to the pool or raise PasswordHasherBusy"""
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(self.retry_after)
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+    
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+    
+    def hash_password(self, password):
+        """
+        Hash a password with the configured cost factor
+        Args:
+            password: Plain text password
+        Returns:
+            bcrypt hash string
+        Raises:
+            PasswordHasherBusy: if the queue is full or the job timed out
+        """
+        try:
+            return self._submit(self._hash, password).result(timeout=remaining(self.timeout))
+        except FutureTimeoutError:
+            raise PasswordHasherBusy(self.retry_after)
+    
+    def check_password(self, password, hashed):
+        """
+        Verify a password against a stored bcrypt hash
+        Args:
+            password: Plain text password
+            hashed: Stored bcrypt hash string
+        Returns:
+            bool: True if the password matches
+        Raises:
+            PasswordHasherBusy: if the queue is full or the job timed out
+        """
+        future = self._submit(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+        try:
+            return future.result(timeout=remaining(self.timeout))
+        except FutureTimeoutError:
+            raise PasswordHasherBusy(self.retry_after)
+    
+    def hash_password_async(self, password, callback):
+        """
+        Hash a password in the background and pass the hash to callback
+        Skipped silently when the queue is full
+        Args:
+            password: Plain text password
+            callback: Function called with the new hash
+        Returns:
+            bool: True if the job was queued
+        """
+        def job():
+            callback(self._hash(password))
+        
+        try:
+            future = self._submit(job)
+        except PasswordHasherBusy:
+            return False
+        future.add_done_callback(_log_failure)
+        return True
+    
+    def needs_rehash(self, hashed):
+        """
+        Check whether a stored hash uses a different cost factor than configured
+        Args:
+            hashed: Stored bcrypt hash string ($2b$<cost>$...)
+        Returns:
+            bool: True if the hash should be upgraded
+        """
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+
+def _log_failure(future):
+    """Report errors from background hashing jobs"""
+    error = future.exception()
+    if error:
+        print(f"⚠ Warning: Background password rehash failed: {str(error)}")
+
+
+# Process-wide hasher shared by the auth controllers
+password_hasher = PasswordHasher(
+    pool_size=Config.BCRYPT_POOL_SIZE,
+    queue_depth=Config.BCRYPT_QUEUE_DEPTH,
+    rounds=Config.BCRYPT_ROUNDS,
+    timeout=Config.BCRYPT_TIMEOUT_SECONDS,
+    retry_after=Config.BCRYPT_RETRY_AFTER_SECONDS
+)
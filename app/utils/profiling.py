@@ -0,0 +1,248 @@
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pymongo import monitoring
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+# Commands whose first field is not a collection name
+_COLLECTION_FIELDS = {'getMore': 'collection'}
+
+# Mongo calls of the request being profiled on the current thread
+_local = threading.local()
+
+
+def _frame_name(code):
+    """Name a stack frame as 'function (file:line)' without collapsed-format separators"""
+    filename = code.co_filename
+    marker = f"{os.sep}app{os.sep}"
+    if marker in filename:
+        filename = 'app' + os.sep + filename.rsplit(marker, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+def collapse_stack(frame):
+    """
+    Render a stack in the collapsed format used by flamegraph.pl and speedscope
+    Args:
+        frame: Innermost frame of a thread
+    Returns:
+        'root;caller;...;leaf' string
+    """
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Samples the stacks of registered threads from one background thread
+    
+    The profiled threads run unmodified (no trace hooks), so the overhead on a
+    profiled request is the periodic stack walk, not a per-call cost. The
+    sampler thread exits when no thread is registered.
+    """
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._thread = None
+    
+    def start(self, thread_id):
+        """
+        Start sampling a thread
+        Args:
+            thread_id: threading.get_ident() of the thread
+        """
+        with self._lock:
+            self._targets[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+    
+    def stop(self, thread_id):
+        """
+        Stop sampling a thread
+        Args:
+            thread_id: Thread passed to start
+        Returns:
+            Counter of collapsed stack -> sample count
+        """
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+    
+    def _run(self):
+        sampler_id = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, samples in self._targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != sampler_id:
+                        samples[collapse_stack(frame)] += 1
+
+
+class MongoCallRecorder(monitoring.CommandListener):
+    """Record the Mongo commands issued by threads with an active profile"""
+    
+    def started(self, event):
+        calls = getattr(_local, 'mongo_calls', None)
+        if calls is None:
+            return
+        target = event.command.get(_COLLECTION_FIELDS.get(event.command_name, event.command_name))
+        _local.pending[event.request_id] = (target if isinstance(target, str) else '', time.perf_counter())
+    
+    def _record(self, event, failure=None):
+        calls = getattr(_local, 'mongo_calls', None)
+        if calls is None:
+            return
+        collection, started = _local.pending.pop(event.request_id, ('', None))
+        call = {
+            'command': event.command_name,
+            'collection': collection,
+            'duration_ms': round(event.duration_micros / 1000, 3),
+            'offset_ms': round((started - _local.started) * 1000, 3) if started else None
+        }
+        if failure is not None:
+            call['error'] = str(failure)
+        calls.append(call)
+    
+    def succeeded(self, event):
+        self._record(event)
+    
+    def failed(self, event):
+        self._record(event, failure=event.failure.get('errmsg', event.failure))
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes one profile per request
+    
+    A request is profiled when a random draw falls under sample_rate, or when
+    it carries the X-Profile header with the configured token. Each profile is
+    written under <directory>/<route>/ as a .collapsed stack file and a .json
+    summary listing the request's Mongo calls.
+    """
+    
+    def __init__(self, directory, sample_rate=0.0, token='', interval=0.002):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.sampler = StackSampler(interval)
+    
+    def should_profile(self, header_value):
+        """
+        Check whether a request should be profiled
+        Args:
+            header_value: Value of the X-Profile header or None
+        Returns:
+            bool
+        """
+        if self.token and header_value and hmac.compare_digest(header_value, self.token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+    
+    def begin(self):
+        """
+        Start profiling the current thread
+        Returns:
+            Profile ID
+        """
+        _local.mongo_calls = []
+        _local.pending = {}
+        _local.started = time.perf_counter()
+        self.sampler.start(threading.get_ident())
+        return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    
+    def end(self, profile_id, method, route, status):
+        """
+        Stop profiling the current thread and write its files
+        Args:
+            profile_id: Value returned by begin
+            method: HTTP method
+            route: URL rule of the request
+            status: HTTP status code
+        Returns:
+            Path of the collapsed stack file
+        """
+        samples = self.sampler.stop(threading.get_ident())
+        duration = time.perf_counter() - _local.started
+        mongo_calls = _local.mongo_calls
+        _local.mongo_calls = None
+        _local.pending = None
+        
+        route_dir = os.path.join(self.directory, route_slug(route))
+        os.makedirs(route_dir, exist_ok=True)
+        stack_path = os.path.join(route_dir, f"{profile_id}.collapsed")
+        with open(stack_path, 'w') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        
+        summary = {
+            'id': profile_id,
+            'method': method,
+            'route': route,
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+            'samples': sum(samples.values()),
+            'interval_ms': self.sampler.interval * 1000,
+            'mongo_time_ms': round(sum(call['duration_ms'] for call in mongo_calls), 3),
+            'mongo_calls': mongo_calls
+        }
+        with open(os.path.join(route_dir, f"{profile_id}.json"), 'w') as f:
+            json.dump(summary, f, indent=2)
+        return stack_path
+
+
+def route_slug(route):
+    """Turn a URL rule such as /api/discover/user into a directory name"""
+    slug = route.strip('/').replace('/', '_').replace('<', '').replace('>', '').replace(':', '-')
+    return slug or 'root'
+
+
+def install_profiler(app, profiler):
+    """
+    Profile sampled or explicitly requested requests of a Flask app
+    Args:
+        app: Flask application
+        profiler: RequestProfiler
+    """
+    from flask import g, request
+    
+    @app.before_request
+    def start_profile():
+        if profiler.should_profile(request.headers.get(PROFILE_HEADER)):
+            g.profile_id = profiler.begin()
+    
+    @app.after_request
+    def add_profile_header(response):
+        if 'profile_id' in g:
+            g.profile_status = response.status_code
+            response.headers[PROFILE_ID_HEADER] = g.profile_id
+        return response
+    
+    @app.teardown_request
+    def finish_profile(error=None):
+        profile_id = g.pop('profile_id', None)
+        if profile_id is None:
+            return
+        rule = request.url_rule
+        try:
+            profiler.end(profile_id, request.method, rule.rule if rule else 'unmatched', g.pop('profile_status', 500))
+        except OSError as e:
+            print(f"⚠ Warning: Could not write profile {profile_id}: {str(e)}")
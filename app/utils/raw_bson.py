@@ -0,0 +1,16 @@
+from bson.raw_bson import RawBSONDocument
+
+
+def raw_collection(collection):
+    """
+    Get a view of a collection that returns RawBSONDocuments
+    Raw documents keep the BSON bytes of the server reply; a document's
+    top-level fields are only decoded when one of them is first accessed, and
+    embedded documents stay raw until they are read themselves
+    Args:
+        collection: pymongo or motor collection
+    Returns:
+        Collection with the same settings and RawBSONDocument as document class
+    """
+    codec_options = collection.codec_options.with_options(document_class=RawBSONDocument)
+    return collection.with_options(codec_options=codec_options)
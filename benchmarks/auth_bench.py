@@ -0,0 +1,74 @@
+"""
+Benchmark of require_auth overhead with and without the verified-token cache
+
+Measures decode_token against decode_token_cached, and a full request through
+a @require_auth route using Flask's test client, so no database is needed.
+
+Usage:
+    python -m benchmarks.auth_bench [--requests 5000]
+"""
+import argparse
+import statistics
+import time
+from flask import Flask, request
+from app.config import Config
+from app.middleware.auth_middleware import require_auth
+from app.utils.jwt_utils import generate_token, decode_token, decode_token_cached, clear_token_cache, token_cache_stats
+
+
+def time_calls(func, count):
+    """Run func count times and return per-call latencies in microseconds"""
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def summary(label, timings):
+    """Format median and p99 of a list of latencies"""
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    return f"{label:<28} median {statistics.median(timings):8.1f} us   p99 {p99:8.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+    
+    token = generate_token('507f1f77bcf86cd799439011', 'bench@example.com')
+    
+    bench_app = Flask(__name__)
+    
+    @bench_app.route('/ping')
+    @require_auth
+    def ping():
+        return {'user_id': request.user_id}, 200
+    
+    client = bench_app.test_client()
+    headers = {'Authorization': f"Bearer {token}"}
+    
+    def call_route():
+        client.get('/ping', headers=headers)
+    
+    print(summary('decode_token', time_calls(lambda: decode_token(token), args.requests)))
+    clear_token_cache()
+    print(summary('decode_token_cached', time_calls(lambda: decode_token_cached(token), args.requests)))
+    
+    Config.TOKEN_CACHE_ENABLED = False
+    uncached = time_calls(call_route, args.requests)
+    Config.TOKEN_CACHE_ENABLED = True
+    clear_token_cache()
+    cached = time_calls(call_route, args.requests)
+    
+    print(summary('request (uncached auth)', uncached))
+    print(summary('request (cached auth)', cached))
+    saved = statistics.median(uncached) - statistics.median(cached)
+    print(f"auth overhead saved per request: {saved:.1f} us")
+    print(f"token cache: {token_cache_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold start: time from process start to the first request served
+
+In-process mode starts a fresh interpreter that imports the app and serves
+GET /healthz through the test client, and reads the app's own cold start
+measurement (process start to create_app() done and to first response).
+--server mode starts gunicorn the way the Dockerfile does and times from
+spawning it until /healthz answers over HTTP.
+
+Exits non-zero when the median exceeds --target, so a slow import can be
+caught before it reaches production. MongoDB does not need to be reachable:
+the connection is established in the background.
+
+Usage:
+    python -m benchmarks.cold_start [--runs 10] [--target 1.0]
+    STORAGE_BACKEND=memory python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --server --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.error import URLError
+from urllib.request import urlopen
+
+IN_PROCESS_SCRIPT = '''
+import json
+from app import app
+client = app.test_client()
+client.get('/healthz')
+print(json.dumps(client.get('/healthz').get_json()['cold_start']))
+'''
+
+
+def in_process_run():
+    """
+    Start an interpreter that serves one request in-process
+    Returns:
+        dict with app_ready_seconds and first_request_seconds
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', IN_PROCESS_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_run(timeout=30.0):
+    """
+    Start gunicorn (1 gthread worker) and poll /healthz until it answers
+    Returns:
+        dict with first_request_seconds measured by the caller
+    """
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f"127.0.0.1:{port}", '--workers', '1',
+         '--worker-class', 'gthread', '--threads', '8', 'app:app'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+                    if response.status == 200:
+                        return {'first_request_seconds': time.perf_counter() - start}
+            except (URLError, OSError):
+                time.sleep(0.005)
+        raise SystemExit(f"gunicorn did not answer /healthz within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--server', action='store_true', help='Time a gunicorn server over HTTP')
+    parser.add_argument('--target', type=float, default=1.0, help='Maximum median seconds to first request')
+    args = parser.parse_args()
+    
+    # The child processes import the app from the current directory
+    os.environ.setdefault('PYTHONPATH', os.getcwd())
+    run = server_run if args.server else in_process_run
+    results = [run() for _ in range(args.runs)]
+    
+    for key in ('app_ready_seconds', 'first_request_seconds'):
+        values = sorted(result[key] for result in results if result.get(key) is not None)
+        if values:
+            print(f"{key:<24} median {statistics.median(values) * 1000:7.0f} ms   max {values[-1] * 1000:7.0f} ms")
+    
+    median = statistics.median(result['first_request_seconds'] for result in results)
+    if median > args.target:
+        print(f"✗ median cold start {median:.3f}s exceeds the {args.target:.1f}s target")
+        sys.exit(1)
+    print(f"✓ median cold start {median:.3f}s (target {args.target:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
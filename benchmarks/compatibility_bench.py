@@ -0,0 +1,100 @@
+"""
+Microbenchmark for the music-taste compatibility ranking of a deck refill
+
+Times the path refill_deck runs for one pool of candidates: encoding the
+profiles (taste tokens, vocabulary, packing), building the candidate matrix
+and ranking. 'cold' encodes every candidate, as on a profile cache miss;
+'warm' finds them all in the profile cache, as for users seen in an earlier
+refill; 'score' is score_candidates alone on a prebuilt matrix.
+
+Usage:
+    python -m benchmarks.compatibility_bench [--candidates 10000] [--repeat 50]
+"""
+import argparse
+import random
+import statistics
+import time
+from app.utils.cache import LRUTTLCache
+from app.utils.compatibility import (
+    Vocabulary, CandidateMatrix, ProfileCache, encode_profiles, rank_profiles, score_candidates, taste_tokens,
+    unpack_profile
+)
+
+
+def synthetic_user(rng, artists, genres, songs):
+    """Build a user document with random favorites and a 10-song playlist"""
+    user = {
+        'favorite_songs': rng.sample(songs, rng.randint(3, 15)),
+        'favorite_artists': rng.sample(artists, rng.randint(3, 15)),
+        'favorite_genres': rng.sample(genres, rng.randint(1, 5))
+    }
+    playlist = {
+        'songs': [
+            {'song_name': rng.choice(songs), 'artist_name': rng.choice(artists)}
+            for _ in range(10)
+        ]
+    }
+    return user, playlist
+
+
+def summary(timings):
+    return f"min {min(timings):8.3f} ms  median {statistics.median(timings):8.3f} ms  max {max(timings):8.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=100, help='Deck size kept from the ranking')
+    parser.add_argument('--metric', choices=['jaccard', 'cosine'], default='jaccard')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    artists = [f"Artist {i}" for i in range(5000)]
+    genres = [f"Genre {i}" for i in range(200)]
+    songs = [f"Song {i}" for i in range(50000)]
+    
+    caller_id = -1
+    candidate_ids = list(range(args.candidates))
+    documents = {user_id: synthetic_user(rng, artists, genres, songs) for user_id in [caller_id] + candidate_ids}
+    
+    def load_tokens(user_ids):
+        # What refill_deck does for cache misses (the playlist read aside)
+        return {user_id: taste_tokens(*documents[user_id]) for user_id in user_ids}
+    
+    def refill(cache, vocab):
+        caller, *candidates = encode_profiles([caller_id] + candidate_ids, load_tokens, cache=cache, vocab=vocab)
+        return rank_profiles(unpack_profile(caller), candidate_ids, candidates, limit=args.limit, metric=args.metric)
+    
+    vocab = Vocabulary()
+    cold = []
+    for _ in range(max(1, args.repeat // 10)):
+        cache = ProfileCache(LRUTTLCache(maxsize=args.candidates + 1, ttl=3600))
+        start = time.perf_counter()
+        refill(cache, vocab)
+        cold.append((time.perf_counter() - start) * 1000)
+    
+    warm = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        refill(cache, vocab)
+        warm.append((time.perf_counter() - start) * 1000)
+    
+    caller, *candidates = encode_profiles([caller_id] + candidate_ids, load_tokens, cache=cache, vocab=vocab)
+    caller = unpack_profile(caller)
+    matrix = CandidateMatrix.from_packed(candidate_ids, candidates)
+    scoring = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        score_candidates(caller, matrix, metric=args.metric)
+        scoring.append((time.perf_counter() - start) * 1000)
+    
+    print(f"candidates: {args.candidates}  vocabulary: {len(vocab)}  metric: {args.metric}  limit: {args.limit}")
+    print(f"cold   {summary(cold)}")
+    print(f"warm   {summary(warm)}")
+    print(f"score  {summary(scoring)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Local stand-in for a MongoDB server, for fault injection
+
+Speaks just enough of the wire protocol (OP_QUERY handshake, OP_MSG
+commands) for pymongo to select it as a standalone primary. The handshake
+and ping always answer, so the server looks alive to the driver's monitor;
+other commands behave according to the current mode:
+
+- healthy: answer immediately (empty cursors, ok: 1)
+- slow: answer after --delay seconds, like an overloaded server
+- hang: never answer, like a server stuck on a lock or a dead network path
+
+The mode can be changed while the server runs, so a test can degrade and
+then heal it.
+
+Usage:
+    python -m benchmarks.fake_mongod --port 27018 --mode hang
+"""
+import argparse
+import socket
+import struct
+import threading
+import time
+from datetime import datetime
+import bson
+
+OP_REPLY = 1
+OP_QUERY = 2004
+OP_MSG = 2013
+HANDSHAKE_COMMANDS = {'hello', 'ismaster', 'isMaster', 'ping', 'buildInfo', 'buildinfo', 'endSessions'}
+
+
+class FakeMongod:
+    """Threaded fake mongod whose command latency is controlled by mode"""
+    
+    def __init__(self, port=0, mode='healthy', delay=1.0):
+        self.mode = mode
+        self.delay = delay
+        self.commands = 0
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', port))
+        self._sock.listen(128)
+        self.port = self._sock.getsockname()[1]
+        self._closing = threading.Event()
+        self._request_ids = iter(range(1, 1 << 31))
+    
+    @property
+    def uri(self):
+        return f"mongodb://127.0.0.1:{self.port}/"
+    
+    def start(self):
+        threading.Thread(target=self._accept, name='fake-mongod', daemon=True).start()
+        return self
+    
+    def stop(self):
+        self._closing.set()
+        self._sock.close()
+    
+    def _accept(self):
+        while not self._closing.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+    
+    def _read(self, conn, size):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('client closed the connection')
+            data += chunk
+        return data
+    
+    def _serve(self, conn):
+        with conn:
+            try:
+                while not self._closing.is_set():
+                    length, request_id, _, opcode = struct.unpack('<iiii', self._read(conn, 16))
+                    body = self._read(conn, length - 16)
+                    if opcode == OP_QUERY:
+                        command = self._parse_query(body)
+                    elif opcode == OP_MSG:
+                        command = self._parse_msg(body)
+                    else:
+                        return
+                    name = next(iter(command))
+                    if name not in HANDSHAKE_COMMANDS:
+                        self.commands += 1
+                        if not self._wait_for_mode():
+                            return
+                    reply = self._reply_to(name, command)
+                    conn.sendall(self._encode(opcode, request_id, reply))
+            except (ConnectionError, OSError):
+                return
+    
+    def _wait_for_mode(self):
+        """Delay a command as the mode dictates; False drops the connection"""
+        if self.mode == 'slow':
+            time.sleep(self.delay)
+        while self.mode == 'hang':
+            if self._closing.wait(0.05):
+                return False
+        return True
+    
+    @staticmethod
+    def _parse_query(body):
+        # flags, then the NUL-terminated collection name, numberToSkip, numberToReturn, query
+        end = body.index(b'\x00', 4)
+        return bson.decode(body[end + 9:])
+    
+    @staticmethod
+    def _parse_msg(body):
+        # flagBits, then sections; the kind 0 section holds the command
+        offset = 4
+        command = None
+        while offset < len(body):
+            kind = body[offset]
+            offset += 1
+            size = struct.unpack_from('<i', body, offset)[0]
+            if kind == 0:
+                command = bson.decode(body[offset:offset + size])
+            offset += size
+        return command
+    
+    def _reply_to(self, name, command):
+        if name in ('hello', 'ismaster', 'isMaster'):
+            return {
+                'helloOk': True,
+                'ismaster': True,
+                'isWritablePrimary': True,
+                'maxBsonObjectSize': 16 * 1024 * 1024,
+                'maxMessageSizeBytes': 48000000,
+                'maxWriteBatchSize': 100000,
+                'localTime': datetime.utcnow(),
+                'logicalSessionTimeoutMinutes': 30,
+                'connectionId': 1,
+                'minWireVersion': 0,
+                'maxWireVersion': 17,
+                'ok': 1.0
+            }
+        if name in ('find', 'aggregate', 'listIndexes'):
+            collection = command[name] if isinstance(command[name], str) else 'collection'
+            return {'cursor': {'id': 0, 'ns': f"{command.get('$db', 'test')}.{collection}", 'firstBatch': []}, 'ok': 1.0}
+        return {'n': 0, 'nModified': 0, 'ok': 1.0}
+    
+    def _encode(self, opcode, response_to, reply):
+        document = bson.encode(reply)
+        if opcode == OP_QUERY:
+            body = struct.pack('<iqii', 0, 0, 0, 1) + document
+            reply_opcode = OP_REPLY
+        else:
+            body = struct.pack('<I', 0) + b'\x00' + document
+            reply_opcode = OP_MSG
+        header = struct.pack('<iiii', 16 + len(body), next(self._request_ids), response_to, reply_opcode)
+        return header + body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=27018)
+    parser.add_argument('--mode', choices=['healthy', 'slow', 'hang'], default='hang')
+    parser.add_argument('--delay', type=float, default=1.0, help='Seconds a command takes in slow mode')
+    args = parser.parse_args()
+    
+    server = FakeMongod(args.port, mode=args.mode, delay=args.delay).start()
+    print(f"✓ fake mongod ({args.mode}) listening on {server.uri}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Fault injection: request deadline and circuit breaker against a hung MongoDB
+
+Points the app at a local stand-in (benchmarks.fake_mongod) and keeps
+--workers threads, like gunicorn worker threads, busy on GET /api/profile
+through three phases of --phase-seconds each:
+    
+    healthy -> hang (every command stalls forever) -> healthy again
+
+and reports per phase the status codes, latencies, the longest any worker
+stayed blocked and the circuit breaker's transitions. Requests in flight when
+the mode changes get their own row (e.g. healthy>hang): the ones that started
+on the healthy server and then hung time out at the deadline with a 503, and
+would otherwise show up as errors of the healthy phase. The run passes when
+no request outlived the deadline (plus --slack), the circuit opened during
+the outage and closed again after recovery.
+
+--unprotected disables the deadline and the breaker to show the baseline:
+workers stay blocked for the whole outage (up to socketTimeoutMS, 20s).
+
+Usage:
+    python -m benchmarks.fault_injection [--workers 16] [--deadline-ms 1000] [--phase-seconds 4]
+    python -m benchmarks.fault_injection --unprotected
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from bson import ObjectId
+from benchmarks.fake_mongod import FakeMongod
+from benchmarks.login_storm import percentile
+
+
+class Worker:
+    """Request loop of one simulated worker thread"""
+    
+    def __init__(self, client, token, record):
+        self.client = client
+        self.token = token
+        self.record = record
+        self.busy_since = None
+        self.busy_phase = None
+    
+    def run(self, phases, stop):
+        headers = {'Authorization': f"Bearer {self.token}"}
+        while not stop.is_set():
+            phase = self.busy_phase = phases[-1]
+            self.busy_since = time.perf_counter()
+            response = self.client.get('/api/profile', headers=headers)
+            elapsed = time.perf_counter() - self.busy_since
+            self.busy_since = None
+            if phases[-1] != phase:
+                # Spanned a mode change
+                phase = f"{phase}>{phases[-1]}"
+            self.record(phase, response.status_code, elapsed)
+            if response.status_code == 503:
+                # Clients honoring Retry-After would wait longer; keep the pressure on
+                time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--deadline-ms', type=int, default=1000)
+    parser.add_argument('--phase-seconds', type=float, default=4)
+    parser.add_argument('--open-seconds', type=float, default=1, help='Circuit breaker open time before probing')
+    parser.add_argument('--slack', type=float, default=0.25, help='Seconds a request may exceed the deadline')
+    parser.add_argument('--unprotected', action='store_true', help='Disable the deadline and the circuit breaker')
+    args = parser.parse_args()
+    
+    server = FakeMongod().start()
+    os.environ.update({
+        'MONGODB_URI': server.uri + 'fault_injection',
+        'MONGODB_ENSURE_INDEXES': 'False',
+        'STORAGE_BACKEND': 'mongo',
+        'USER_CACHE_ENABLED': 'False',
+        'REQUEST_DEADLINE_MS': '0' if args.unprotected else str(args.deadline_ms),
+        'CIRCUIT_BREAKER_ENABLED': 'False' if args.unprotected else 'True',
+        'CIRCUIT_BREAKER_OPEN_SECONDS': str(args.open_seconds)
+    })
+    from app import app
+    from app.storage import get_storage
+    from app.utils.jwt_utils import generate_token
+    
+    breaker = get_storage().breaker
+    samples = []
+    lock = threading.Lock()
+    
+    def record(phase, status, elapsed):
+        with lock:
+            samples.append((phase, status, elapsed))
+    
+    phases = ['healthy']
+    stop = threading.Event()
+    workers = [
+        Worker(app.test_client(), generate_token(str(ObjectId()), f"fault-{n}@example.com"), record)
+        for n in range(args.workers)
+    ]
+    threads = [threading.Thread(target=worker.run, args=(phases, stop), daemon=True) for worker in workers]
+    
+    # Watch the breaker state and how long workers have been blocked
+    transitions = []
+    longest_block = defaultdict(float)
+    
+    def watch():
+        state = None
+        while not stop.is_set():
+            if breaker is not None and breaker.state != state:
+                state = breaker.state
+                transitions.append((phases[-1], round(time.perf_counter() - start, 2), state))
+            now = time.perf_counter()
+            for worker in workers:
+                busy_since, phase = worker.busy_since, worker.busy_phase
+                if busy_since is not None:
+                    if phase != phases[-1]:
+                        phase = f"{phase}>{phases[-1]}"
+                    longest_block[phase] = max(longest_block[phase], now - busy_since)
+            time.sleep(0.01)
+    
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    threading.Thread(target=watch, daemon=True).start()
+    
+    for phase, mode in (('healthy', 'healthy'), ('hang', 'hang'), ('recovered', 'healthy')):
+        if phase != 'healthy':
+            server.mode = mode
+            phases.append(phase)
+        time.sleep(args.phase_seconds)
+    stop.set()
+    server.mode = 'healthy'
+    for thread in threads:
+        thread.join(timeout=1)
+    blocked = sum(thread.is_alive() for thread in threads)
+    
+    deadline = args.deadline_ms / 1000
+    print(f"{'phase':<14} {'req':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'blocked s':>9}  statuses")
+    for phase in ('healthy', 'healthy>hang', 'hang', 'hang>recovered', 'recovered'):
+        timings = [elapsed * 1000 for name, _, elapsed in samples if name == phase]
+        statuses = Counter(status for name, status, _ in samples if name == phase)
+        if not timings:
+            print(f"{phase:<14} {0:>6}  (no request finished) blocked {longest_block[phase]:.1f}s")
+            continue
+        print(
+            f"{phase:<14} {len(timings):>6} {percentile(timings, 0.5):>8.1f} {percentile(timings, 0.99):>8.1f} "
+            f"{max(timings):>8.1f} {longest_block[phase]:>9.2f}  {dict(sorted(statuses.items()))}"
+        )
+    for phase, at, state in transitions:
+        print(f"  {at:>6.2f}s  circuit {state} ({phase})")
+    
+    failures = []
+    worst = max(longest_block.values(), default=0.0)
+    if worst > deadline + args.slack:
+        failures.append(f"a worker was blocked {worst:.2f}s (deadline {deadline:.2f}s)")
+    if blocked:
+        failures.append(f"{blocked} workers still blocked after the run")
+    if breaker is not None:
+        states = [(phase, state) for phase, _, state in transitions]
+        if ('hang', 'open') not in states:
+            failures.append('the circuit did not open during the outage')
+        if breaker.state != 'closed':
+            failures.append(f"the circuit is {breaker.state} after recovery")
+    if failures:
+        print('\n'.join(f"✗ {failure}" for failure in failures))
+        sys.exit(1)
+    print(f"✓ every worker was freed within the {deadline * 1000:.0f}ms deadline and the circuit recovered")
+
+
+if __name__ == '__main__':
+    main()
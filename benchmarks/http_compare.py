@@ -0,0 +1,99 @@
+"""
+Load test: requests per second and latency of the WSGI and ASGI entry points
+
+Registers a user with a playlist on each server, then keeps --concurrency
+clients busy on the read endpoints for --duration seconds and reports
+throughput and p50/p99 latency per server. Start both servers against the
+same mongod first, e.g.:
+    
+    gunicorn --bind 0.0.0.0:5001 --workers 2 --worker-class gthread --threads 8 app:app
+    uvicorn app.asgi:asgi_app --port 5002
+
+Usage:
+    python -m benchmarks.http_compare --target gunicorn=http://localhost:5001 \\
+        --target asgi=http://localhost:5002 [--concurrency 200] [--duration 20]
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from benchmarks.login_storm import call, percentile
+
+PATHS = ['/api/profile', '/api/playlist', '/api/discover/matches']
+
+
+def prepare(base_url):
+    """Register a user with a playlist and return its token"""
+    email = f"compare-{uuid.uuid4().hex[:12]}@example.com"
+    password = 'compare-password'
+    status, body, _ = call(base_url, 'POST', '/api/auth/register', {
+        'email': email,
+        'password': password,
+        'favorite_artists': ['Queen'],
+        'favorite_genres': ['Rock']
+    })
+    if status != 201:
+        raise SystemExit(f"{base_url}: registration failed ({status}): {body}")
+    status, body, _ = call(base_url, 'POST', '/api/auth/login', {'email': email, 'password': password})
+    if status != 200:
+        raise SystemExit(f"{base_url}: login failed ({status}): {body}")
+    token = body['token']
+    songs = [{'song_name': f"Song {i}", 'artist_name': 'Queen'} for i in range(10)]
+    call(base_url, 'POST', '/api/playlist', {'songs': songs}, token=token)
+    return token
+
+
+def run_load(base_url, token, concurrency, duration):
+    """Hammer the read endpoints from concurrency threads for duration seconds"""
+    deadline = time.perf_counter() + duration
+    timings = []
+    statuses = Counter()
+    lock = threading.Lock()
+    
+    def client(offset):
+        local_timings = []
+        local_statuses = Counter()
+        i = offset
+        while time.perf_counter() < deadline:
+            status, _, elapsed = call(base_url, 'GET', PATHS[i % len(PATHS)], token=token)
+            local_timings.append(elapsed * 1000)
+            local_statuses[status] += 1
+            i += 1
+        with lock:
+            timings.extend(local_timings)
+            statuses.update(local_statuses)
+    
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True, help='name=base_url (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+    
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        token = prepare(base_url)
+        timings, statuses, elapsed = run_load(base_url, token, args.concurrency, args.duration)
+        if not timings:
+            print(f"{name:<10} no requests completed")
+            continue
+        print(
+            f"{name:<10} {len(timings) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(timings):7.1f} ms  p99 {percentile(timings, 0.99):7.1f} ms  "
+            f"statuses {dict(sorted(statuses.items()))}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark of the match list response encoding
+
+Builds a page of matches with their matched users and compares the previous
+path (to_dict converting every ObjectId/datetime by hand, then Flask's
+default encoder) with the current one (to_dict keeping BSON values, encoded
+by the configured JSON provider). No database is needed.
+
+Usage:
+    python -m benchmarks.json_bench [--matches 100] [--iterations 2000]
+"""
+import argparse
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+from app.models.match import Match
+from app.models.user import User
+from app.utils.json_provider import install_json_provider
+from benchmarks.auth_bench import time_calls, summary
+
+
+def make_page(count):
+    """Build (match document, matched user document) pairs"""
+    now = datetime.utcnow()
+    page = []
+    for i in range(count):
+        user = {
+            '_id': ObjectId(),
+            'email': f"user{i}@example.com",
+            'password': '$2b$12$' + 'x' * 53,
+            'favorite_songs': [f"Song {j}" for j in range(10)],
+            'favorite_artists': ['Queen', 'Daft Punk', 'Radiohead'],
+            'favorite_genres': ['rock', 'electronic'],
+            'spotify_username': f"user{i}",
+            'created_at': now - timedelta(days=i),
+            'updated_at': now
+        }
+        match = {'_id': ObjectId(), 'user_id_1': ObjectId(), 'user_id_2': user['_id'], 'created_at': now - timedelta(minutes=i)}
+        page.append((match, user))
+    return page
+
+
+def legacy_user_dict(user_doc):
+    """User.to_dict as it was before the JSON provider (strings built by hand)"""
+    return {
+        '_id': str(user_doc['_id']),
+        'email': user_doc.get('email'),
+        'favorite_songs': user_doc.get('favorite_songs', []),
+        'favorite_artists': user_doc.get('favorite_artists', []),
+        'favorite_genres': user_doc.get('favorite_genres', []),
+        'spotify_username': user_doc.get('spotify_username'),
+        'created_at': user_doc.get('created_at').isoformat() if user_doc.get('created_at') else None,
+        'updated_at': user_doc.get('updated_at').isoformat() if user_doc.get('updated_at') else None
+    }
+
+
+def legacy_match_dict(match_doc):
+    """Match.to_dict as it was before the JSON provider"""
+    return {
+        '_id': str(match_doc['_id']),
+        'user_id_1': str(match_doc['user_id_1']),
+        'user_id_2': str(match_doc['user_id_2']),
+        'created_at': match_doc.get('created_at').isoformat() if match_doc.get('created_at') else None
+    }
+
+
+def build_response(page, user_to_dict, match_to_dict):
+    """Assemble the body the way build_matches_response does"""
+    matches_list = []
+    for match, user in page:
+        match_dict = match_to_dict(match)
+        matches_list.append({
+            'match_id': match_dict['_id'],
+            'matched_user': user_to_dict(user),
+            'created_at': match_dict['created_at']
+        })
+    return {'matches': matches_list, 'count': len(matches_list)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matches', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    
+    page = make_page(args.matches)
+    
+    legacy_app = Flask('legacy')
+    legacy_app.json = DefaultJSONProvider(legacy_app)
+    
+    def legacy():
+        with legacy_app.app_context():
+            return jsonify(build_response(page, legacy_user_dict, legacy_match_dict)).get_data()
+    
+    print(f"{args.matches} matches per response, {args.iterations} iterations")
+    print(summary('stringify + stdlib jsonify', time_calls(legacy, args.iterations)))
+    
+    for name in ('stdlib', 'orjson'):
+        app = Flask(name)
+        installed = install_json_provider(app, name)
+        
+        def current(app=app):
+            with app.app_context():
+                return jsonify(build_response(page, User.to_dict, Match.to_dict)).get_data()
+        
+        print(summary(f"BSON values + {installed}", time_calls(current, args.iterations)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Load-testing suite: population generator, load driver and report
@@ -0,0 +1,204 @@
+"""
+Scripted load driver for the load suite
+
+Runs --concurrency virtual users for --duration seconds. Each virtual user
+logs in as a random account of the generated population and then picks
+actions with fixed weights: mostly discover and swipe, some matches and
+profile reads, and occasional logins and registrations. Swipes target the
+last profile discover returned, as a client would.
+
+By default requests go through the Flask test client in this process, so
+only a local mongod is needed; with STORAGE_BACKEND=memory not even that,
+as the driver generates the population in the in-memory store first.
+--base-url drives a running server instead.
+The report (throughput and p50/p95/p99 per endpoint) is printed and, with
+--output, saved for benchmarks.load.report to compare.
+
+Usage:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.load.population --users 10000 --drop
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.load.driver --users 10000 --output base.json
+    STORAGE_BACKEND=memory python -m benchmarks.load.driver --users 10000 --output base-memory.json
+    python -m benchmarks.load.driver --base-url http://localhost:5001 --users 10000 --concurrency 64
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from urllib.error import URLError
+from benchmarks.load.population import LOAD_PASSWORD, generate_population, load_email
+from benchmarks.load.report import print_report, summarize
+from benchmarks.login_storm import call
+
+# Relative frequency of each action
+ACTION_WEIGHTS = {
+    'discover': 40,
+    'swipe': 25,
+    'matches': 15,
+    'profile': 10,
+    'login': 8,
+    'register': 2
+}
+
+
+class HttpTransport:
+    """Send requests to a running server"""
+    
+    def __init__(self, base_url):
+        self.base_url = base_url
+    
+    def request(self, method, path, body=None, token=None):
+        try:
+            status, payload, _ = call(self.base_url, method, path, body, token=token)
+        except (URLError, OSError):
+            return 0, {}
+        return status, payload
+
+
+class InProcessTransport:
+    """Send requests through the Flask test client (one client per thread)"""
+    
+    def __init__(self):
+        from app import app
+        self.app = app
+        self._local = threading.local()
+    
+    def request(self, method, path, body=None, token=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {'Authorization': f"Bearer {token}"} if token else {}
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True) or {}
+
+
+class VirtualUser:
+    """One simulated client session"""
+    
+    def __init__(self, transport, population, rng, record):
+        self.transport = transport
+        self.population = population
+        self.rng = rng
+        self.record = record
+        self.token = None
+        self.candidate_id = None
+    
+    def timed(self, endpoint, method, path, body=None):
+        start = time.perf_counter()
+        status, payload = self.transport.request(method, path, body, token=self.token)
+        self.record(endpoint, status, (time.perf_counter() - start) * 1000)
+        return status, payload
+    
+    def login(self):
+        email = load_email(self.rng.randrange(self.population))
+        status, payload = self.timed('login', 'POST', '/api/auth/login', {'email': email, 'password': LOAD_PASSWORD})
+        if status == 200:
+            self.token = payload['token']
+            self.candidate_id = None
+    
+    def register(self):
+        self.timed('register', 'POST', '/api/auth/register', {
+            'email': f"load-new-{uuid.uuid4().hex[:12]}@example.com",
+            'password': LOAD_PASSWORD,
+            'favorite_artists': [f"Artist {self.rng.randint(1, 50)}"],
+            'favorite_genres': ['Rock']
+        })
+    
+    def discover(self):
+        status, payload = self.timed('discover', 'GET', '/api/discover/user')
+        self.candidate_id = payload.get('_id') if status == 200 else None
+    
+    def swipe(self):
+        if self.candidate_id is None:
+            self.discover()
+            if self.candidate_id is None:
+                return
+        self.timed('swipe', 'POST', '/api/discover/swipe-right', {'user_id': self.candidate_id})
+        self.candidate_id = None
+    
+    def matches(self):
+        self.timed('matches', 'GET', '/api/discover/matches')
+    
+    def profile(self):
+        self.timed('profile', 'GET', '/api/profile')
+    
+    def run(self, deadline):
+        actions = list(ACTION_WEIGHTS)
+        weights = list(ACTION_WEIGHTS.values())
+        while time.perf_counter() < deadline:
+            if self.token is None:
+                self.login()
+                if self.token is None:
+                    # Back off instead of spinning on a broken login
+                    time.sleep(0.1)
+                    continue
+            getattr(self, self.rng.choices(actions, weights)[0])()
+
+
+def run_load(transport, population, concurrency, duration, seed=0):
+    """
+    Run the virtual users
+    Args:
+        transport: HttpTransport or InProcessTransport
+        population: Number of generated users to log in as
+        concurrency: Number of virtual users (threads)
+        duration: Seconds to run
+        seed: Random seed of the action mix
+    Returns:
+        tuple: (list of (endpoint, status, ms) samples, elapsed seconds)
+    """
+    samples = []
+    lock = threading.Lock()
+    
+    def record(endpoint, status, milliseconds):
+        with lock:
+            samples.append((endpoint, status, milliseconds))
+    
+    deadline = time.perf_counter() + duration
+    users = [VirtualUser(transport, population, random.Random(seed + i), record) for i in range(concurrency)]
+    threads = [threading.Thread(target=user.run, args=(deadline,)) for user in users]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', help='Drive a running server instead of the in-process app')
+    parser.add_argument('--users', type=int, default=10000, help='Size of the generated population')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+    
+    transport = HttpTransport(args.base_url) if args.base_url else InProcessTransport()
+    if not args.base_url:
+        from app.config import Config
+        if Config.STORAGE_BACKEND == 'memory':
+            counts = generate_population(args.users)
+            print(f"✓ in-memory population: {counts}")
+    samples, elapsed = run_load(transport, args.users, args.concurrency, args.duration, seed=args.seed)
+    if not samples:
+        raise SystemExit('no requests completed')
+    
+    report = summarize(samples, elapsed, meta={
+        'target': args.base_url or 'in-process',
+        'storage': 'remote' if args.base_url else transport.app.config['STORAGE_BACKEND'],
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'duration': args.duration
+    })
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+Synthetic population generator for the load suite
+
+Bulk-inserts N users whose favorite artists and genres follow a Zipf
+distribution (a few artists are liked by almost everyone, most by a few),
+a 10-song playlist per user drawn from the same skewed catalogue, and a
+swipe graph where popular users receive most swipes and a share of the
+swipes are reciprocated into matches. Finishes by creating the indexes and
+rebuilding the taste index, so discover works immediately.
+
+Every user logs in with the same password (LOAD_PASSWORD); emails are
+load-<n>@example.com so the load driver can pick accounts without a lookup.
+
+Usage:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.load.population --users 10000 --drop
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from bson import ObjectId
+
+os.environ.setdefault('MONGODB_DB_NAME', 'heartbeat_load')
+
+LOAD_PASSWORD = 'load-password'
+GENRES = [
+    'Pop', 'Rock', 'Hip Hop', 'R&B', 'Indie', 'Electronic', 'House', 'Techno', 'Jazz', 'Soul',
+    'Funk', 'Metal', 'Punk', 'Folk', 'Country', 'Classical', 'Reggae', 'Latin', 'K-Pop', 'Blues',
+    'Alternative', 'Ambient', 'Disco', 'Grunge', 'Trap', 'Drum and Bass', 'Dubstep', 'Gospel',
+    'Afrobeat', 'Shoegaze', 'Synthwave', 'Emo', 'Ska', 'Bossa Nova', 'Lo-fi', 'Garage'
+]
+
+
+def load_email(n):
+    """Email of the n-th generated user"""
+    return f"load-{n}@example.com"
+
+
+def zipf_cdf(size, exponent):
+    """
+    Cumulative Zipf distribution over ranks 0..size-1
+    Args:
+        size: Number of ranked items
+        exponent: Zipf exponent (larger = more skewed)
+    Returns:
+        numpy float array ending at 1
+    """
+    cdf = np.cumsum(1.0 / np.arange(1, size + 1) ** exponent)
+    return cdf / cdf[-1]
+
+
+def draw(rng, cdf, count):
+    """Draw count ranks (with replacement) in O(count log size)"""
+    return np.minimum(np.searchsorted(cdf, rng.random(count), side='right'), len(cdf) - 1)
+
+
+def pick_distinct(rng, cdf, count):
+    """
+    Draw up to count distinct ranks from a Zipf distribution
+    Args:
+        rng: numpy Generator
+        cdf: Distribution from zipf_cdf
+        count: Number of ranks wanted
+    Returns:
+        list of distinct ranks in draw order
+    """
+    drawn = draw(rng, cdf, count * 3)
+    _, first = np.unique(drawn, return_index=True)
+    return [int(rank) for rank in drawn[np.sort(first)][:count]]
+
+
+def build_users(rng, count, artists, exponent, password_hash, now):
+    """Build user documents with Zipf-distributed favorites"""
+    artist_cdf = zipf_cdf(len(artists), exponent)
+    genre_cdf = zipf_cdf(len(GENRES), exponent)
+    users = []
+    for n in range(count):
+        created_at = now - timedelta(days=int(rng.integers(0, 365)))
+        users.append({
+            '_id': ObjectId(),
+            'email': load_email(n),
+            'password': password_hash,
+            'favorite_songs': [],
+            'favorite_artists': [artists[i] for i in pick_distinct(rng, artist_cdf, int(rng.integers(3, 9)))],
+            'favorite_genres': [GENRES[i] for i in pick_distinct(rng, genre_cdf, int(rng.integers(1, 5)))],
+            'spotify_username': '',
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+    return users
+
+
+def build_playlists(rng, users, artists, exponent, songs_per_artist, now):
+    """Build a 10-song playlist per user, mostly from the user's favorite artists"""
+    artist_cdf = zipf_cdf(len(artists), exponent)
+    song_cdf = zipf_cdf(songs_per_artist, exponent)
+    playlists = []
+    for user in users:
+        songs = []
+        catalogue_picks = draw(rng, artist_cdf, 10)
+        song_numbers = draw(rng, song_cdf, 10) + 1
+        for i in range(10):
+            if user['favorite_artists'] and rng.random() < 0.6:
+                artist = user['favorite_artists'][int(rng.integers(len(user['favorite_artists'])))]
+            else:
+                artist = artists[int(catalogue_picks[i])]
+            song_number = int(song_numbers[i])
+            songs.append({'song_name': f"{artist} Song {song_number}", 'artist_name': artist})
+        playlists.append({
+            'user_id': user['_id'],
+            'songs': songs,
+            'created_at': user['created_at'],
+            'updated_at': now
+        })
+    return playlists
+
+
+def build_swipe_graph(rng, user_ids, swipes_per_user, reciprocation, exponent, now):
+    """
+    Build pending swipes and matches
+    Targets are drawn from a Zipf "popularity" ranking over a shuffled user
+    list; each swipe is reciprocated with the given probability, and a
+    reciprocated pair becomes a match instead of two pending swipes
+    Returns:
+        tuple: (swipe_right documents, match documents)
+    """
+    count = len(user_ids)
+    popularity = rng.permutation(count)
+    cdf = zipf_cdf(count, exponent)
+    swipes = set()
+    matched = set()
+    for source in range(count):
+        for rank in pick_distinct(rng, cdf, swipes_per_user):
+            target = int(popularity[rank])
+            if target == source:
+                continue
+            pair = (min(source, target), max(source, target))
+            if pair in matched:
+                continue
+            if (target, source) in swipes or rng.random() < reciprocation:
+                swipes.discard((target, source))
+                matched.add(pair)
+            else:
+                swipes.add((source, target))
+    
+    def created_at():
+        return now - timedelta(minutes=int(rng.integers(0, 60 * 24 * 30)))
+    
+    swipe_docs = [
+        {'user_id': user_ids[source], 'swiped_user_id': user_ids[target], 'created_at': created_at()}
+        for source, target in swipes
+    ]
+    match_docs = []
+    for first, second in matched:
+        ordered = sorted([user_ids[first], user_ids[second]])
+        match_docs.append({'user_id_1': ordered[0], 'user_id_2': ordered[1], 'created_at': created_at()})
+    return swipe_docs, match_docs
+
+
+def insert_batches(collection, documents, batch_size=5000):
+    """Insert documents with unordered insert_many batches"""
+    for start in range(0, len(documents), batch_size):
+        collection.insert_many(documents[start:start + batch_size], ordered=False)
+
+
+def generate_population(users, seed=42, artists=2000, exponent=1.1, swipes_per_user=20, reciprocation=0.15, drop=False):
+    """
+    Generate and insert a synthetic population
+    Args:
+        users: Number of users
+        seed: Random seed (same seed, same population)
+        artists: Size of the artist catalogue
+        exponent: Zipf exponent for tastes, songs and popularity
+        swipes_per_user: Swipes made by each user
+        reciprocation: Probability that a swipe is returned (becoming a match)
+        drop: Drop the app collections first
+    Returns:
+        dict of document counts per collection
+    """
+    from app.models import User, Playlist, SwipeRight, Match, DiscoverDeck, TasteIndex
+    from app.utils.db_indexes import MODELS, ensure_indexes
+    from app.utils.password_hashing import password_hasher
+    
+    if drop:
+        for model in MODELS:
+            model.get_collection().drop()
+    ensure_indexes()
+    
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    catalogue = [f"Artist {n}" for n in range(1, artists + 1)]
+    
+    user_docs = build_users(rng, users, catalogue, exponent, password_hasher.hash_password(LOAD_PASSWORD), now)
+    playlist_docs = build_playlists(rng, user_docs, catalogue, exponent, 20, now)
+    swipe_docs, match_docs = build_swipe_graph(
+        rng, [user['_id'] for user in user_docs], swipes_per_user, reciprocation, exponent, now
+    )
+    
+    insert_batches(User.get_collection(), user_docs)
+    insert_batches(Playlist.get_collection(), playlist_docs)
+    insert_batches(SwipeRight.get_collection(), swipe_docs)
+    insert_batches(Match.get_collection(), match_docs)
+    TasteIndex.rebuild(User.get_collection())
+    DiscoverDeck.get_collection().delete_many({})
+    
+    return {
+        User.COLLECTION_NAME: len(user_docs),
+        Playlist.COLLECTION_NAME: len(playlist_docs),
+        SwipeRight.COLLECTION_NAME: len(swipe_docs),
+        Match.COLLECTION_NAME: len(match_docs)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--artists', type=int, default=2000)
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent')
+    parser.add_argument('--swipes-per-user', type=int, default=20)
+    parser.add_argument('--reciprocation', type=float, default=0.15)
+    parser.add_argument('--drop', action='store_true', help='Drop the app collections first')
+    args = parser.parse_args()
+    
+    from app.storage import get_storage
+    storage = get_storage()
+    if storage.name == 'memory':
+        sys.exit('The in-memory store lives in one process; benchmarks.load.driver generates its own population')
+    try:
+        storage.ping(timeout=5)
+    except Exception:
+        sys.exit('MongoDB is not reachable; set MONGODB_URI')
+    
+    start = time.perf_counter()
+    counts = generate_population(
+        args.users,
+        seed=args.seed,
+        artists=args.artists,
+        exponent=args.zipf,
+        swipes_per_user=args.swipes_per_user,
+        reciprocation=args.reciprocation,
+        drop=args.drop
+    )
+    for collection_name, count in counts.items():
+        print(f"✓ {collection_name}: {count}")
+    print(f"generated in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Load test reports: per-endpoint throughput and latency percentiles
+
+A report is a JSON file written by benchmarks.load.driver. Comparing two
+reports prints the change per endpoint and exits non-zero when an
+endpoint's p95/p99 latency or throughput regressed by more than the
+threshold, so a run on a branch can be checked against one on main.
+
+Usage:
+    python -m benchmarks.load.report baseline.json current.json [--threshold 0.10]
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime
+from benchmarks.login_storm import percentile
+
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+
+def git_revision():
+    """Short hash of the checked out commit, or None outside a git tree"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(samples, elapsed, meta=None):
+    """
+    Build a report from raw samples
+    Args:
+        samples: Iterable of (endpoint, status code, milliseconds)
+        elapsed: Wall-clock duration of the run in seconds
+        meta: Optional dict describing the run (target, concurrency, ...)
+    Returns:
+        Report dict
+    """
+    timings = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for endpoint, status, milliseconds in samples:
+        timings[endpoint].append(milliseconds)
+        statuses[endpoint][status] += 1
+    
+    endpoints = {}
+    for endpoint, values in sorted(timings.items()):
+        errors = sum(count for status, count in statuses[endpoint].items() if status >= 500 or status == 0)
+        summary = {
+            'requests': len(values),
+            'throughput': round(len(values) / elapsed, 2),
+            'errors': errors,
+            'statuses': {str(status): count for status, count in sorted(statuses[endpoint].items())}
+        }
+        for name, fraction in PERCENTILES:
+            summary[name] = round(percentile(values, fraction), 3)
+        endpoints[endpoint] = summary
+    
+    total = sum(len(values) for values in timings.values())
+    return {
+        'revision': git_revision(),
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput': round(total / elapsed, 2) if elapsed else 0,
+        'meta': meta or {},
+        'endpoints': endpoints
+    }
+
+
+def print_report(report):
+    """Print a report as a table"""
+    meta = ' '.join(f"{key}={value}" for key, value in report['meta'].items())
+    print(f"revision {report['revision'] or '-'}  {report['throughput']:.1f} req/s  {meta}")
+    print(f"{'endpoint':<12} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'5xx':>5}  statuses")
+    for endpoint, summary in report['endpoints'].items():
+        print(
+            f"{endpoint:<12} {summary['requests']:>7} {summary['throughput']:>8.1f} "
+            f"{summary['p50']:>8.1f} {summary['p95']:>8.1f} {summary['p99']:>8.1f} {summary['errors']:>5}  "
+            f"{summary['statuses']}"
+        )
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare two reports endpoint by endpoint
+    Args:
+        baseline: Report dict of the reference run
+        current: Report dict of the run being checked
+        threshold: Allowed relative regression (0.10 = 10%)
+    Returns:
+        tuple: (list of printable rows, list of regression descriptions)
+    """
+    rows = []
+    regressions = []
+    for endpoint, before in baseline['endpoints'].items():
+        after = current['endpoints'].get(endpoint)
+        if after is None:
+            regressions.append(f"{endpoint}: missing from the current run")
+            continue
+        changes = []
+        for metric in ('throughput', 'p50', 'p95', 'p99'):
+            old, new = before[metric], after[metric]
+            change = (new - old) / old if old else 0.0
+            changes.append(f"{metric} {old:.1f} -> {new:.1f} ({change:+.0%})")
+            # Throughput regresses downwards, latency upwards; p50 is reported but not gated
+            worse = -change if metric == 'throughput' else change
+            if metric != 'p50' and worse > threshold:
+                regressions.append(f"{endpoint}: {metric} {old:.1f} -> {new:.1f} ({change:+.0%})")
+        rows.append(f"{endpoint:<12} " + '  '.join(changes))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed relative regression')
+    args = parser.parse_args()
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    
+    print(f"baseline {baseline['revision'] or '-'}  current {current['revision'] or '-'}")
+    rows, regressions = compare(baseline, current, threshold=args.threshold)
+    print('\n'.join(rows))
+    if regressions:
+        print('\n'.join(f"✗ {regression}" for regression in regressions))
+        sys.exit(1)
+    print(f"✓ no endpoint regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Load test: latency of discover and profile endpoints during a login storm
+
+Registers a user, measures baseline latency of GET /api/profile and
+GET /api/discover/user, then repeats the measurement while many threads
+hammer POST /api/auth/login. With bcrypt on its bounded pool, the read
+endpoints should stay flat and surplus logins should get fast 503s.
+
+Requires a running server (e.g. gunicorn from the Dockerfile) and mongod.
+
+Usage:
+    python -m benchmarks.login_storm --base-url http://localhost:5001 [--storm-threads 32] [--samples 200]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib import request as urlrequest
+from urllib.error import HTTPError
+
+
+def call(base_url, method, path, body=None, token=None):
+    """Send a JSON request and return (status code, parsed body, seconds)"""
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urlrequest.Request(f"{base_url}{path}", data=data, headers=headers, method=method)
+    start = time.perf_counter()
+    try:
+        with urlrequest.urlopen(req, timeout=60) as response:
+            payload = response.read()
+            status = response.status
+    except HTTPError as e:
+        payload = e.read()
+        status = e.code
+    elapsed = time.perf_counter() - start
+    try:
+        return status, json.loads(payload or b'{}'), elapsed
+    except ValueError:
+        return status, {}, elapsed
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)]
+
+
+def measure(base_url, token, samples):
+    """Sample profile and discover latencies sequentially"""
+    timings = {'/api/profile': [], '/api/discover/user': []}
+    for _ in range(samples):
+        for path in timings:
+            _, _, elapsed = call(base_url, 'GET', path, token=token)
+            timings[path].append(elapsed * 1000)
+    return timings
+
+
+def report(label, timings):
+    for path, values in timings.items():
+        print(
+            f"{label:<10} {path:<22} p50 {statistics.median(values):7.1f} ms  "
+            f"p95 {percentile(values, 0.95):7.1f} ms  p99 {percentile(values, 0.99):7.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:5001')
+    parser.add_argument('--storm-threads', type=int, default=32)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+    
+    email = f"storm-{uuid.uuid4().hex[:12]}@example.com"
+    password = 'storm-password'
+    for suffix in ('', '-other'):
+        call(args.base_url, 'POST', '/api/auth/register', {
+            'email': email.replace('@', f"{suffix}@"),
+            'password': password,
+            'favorite_artists': ['Queen'],
+            'favorite_genres': ['Rock']
+        })
+    status, body, _ = call(args.base_url, 'POST', '/api/auth/login', {'email': email, 'password': password})
+    if status != 200:
+        raise SystemExit(f"login failed: {status} {body}")
+    token = body['token']
+    
+    report('baseline', measure(args.base_url, token, args.samples))
+    
+    stop = threading.Event()
+    login_statuses = Counter()
+    login_lock = threading.Lock()
+    
+    def storm():
+        while not stop.is_set():
+            status, _, _ = call(args.base_url, 'POST', '/api/auth/login', {'email': email, 'password': password})
+            with login_lock:
+                login_statuses[status] += 1
+    
+    with ThreadPoolExecutor(max_workers=args.storm_threads) as executor:
+        for _ in range(args.storm_threads):
+            executor.submit(storm)
+        time.sleep(1)
+        timings = measure(args.base_url, token, args.samples)
+        stop.set()
+    
+    report('storm', timings)
+    print(f"login responses during storm: {dict(login_statuses)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Load test: delivery latency of match events over Server-Sent Events
+
+Registers --pairs pairs of users, opens a match stream for every user, then
+makes each pair swipe right on each other and measures the time from the
+second swipe request to the event arriving on both streams.
+
+Run it against several workers with MATCH_EVENTS_BACKEND=change_stream and a
+replica set (e.g. `mongod --replSet rs0` then `rs.initiate()`) to check
+cross-process delivery; the in-process backend only reaches streams opened on
+the worker that created the match.
+
+Usage:
+    python -m benchmarks.match_stream --base-url http://localhost:5002 [--pairs 20]
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+from benchmarks.login_storm import call, percentile
+
+
+def register(base_url):
+    """Register a user and return (user_id, token)"""
+    email = f"stream-{uuid.uuid4().hex[:12]}@example.com"
+    password = 'stream-password'
+    status, body, _ = call(base_url, 'POST', '/api/auth/register', {
+        'email': email,
+        'password': password,
+        'favorite_artists': ['Queen'],
+        'favorite_genres': ['Rock']
+    })
+    if status != 201:
+        raise SystemExit(f"registration failed ({status}): {body}")
+    status, body, _ = call(base_url, 'POST', '/api/auth/login', {'email': email, 'password': password})
+    if status != 200:
+        raise SystemExit(f"login failed ({status}): {body}")
+    return body['user_id'], body['token']
+
+
+def listen(base_url, token, arrivals, ready):
+    """Read a match stream and record when each match event arrives"""
+    url = urlparse(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=120)
+    connection.request('GET', '/api/discover/matches/stream', headers={'Authorization': f"Bearer {token}"})
+    response = connection.getresponse()
+    ready.release()
+    event = None
+    for raw_line in response:
+        line = raw_line.decode('utf-8').rstrip('\n')
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('data: ') and event == 'match':
+            arrivals.append((time.perf_counter(), json.loads(line[len('data: '):])['match_id']))
+            event = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:5002')
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=10)
+    args = parser.parse_args()
+    
+    pairs = [(register(args.base_url), register(args.base_url)) for _ in range(args.pairs)]
+    
+    arrivals = {}
+    ready = threading.Semaphore(0)
+    for pair in pairs:
+        for user_id, token in pair:
+            arrivals[user_id] = []
+            threading.Thread(target=listen, args=(args.base_url, token, arrivals[user_id], ready), daemon=True).start()
+    for _ in range(len(arrivals)):
+        ready.acquire()
+    
+    sent = {}
+    for (first_id, first_token), (second_id, second_token) in pairs:
+        call(args.base_url, 'POST', '/api/discover/swipe-right', {'user_id': second_id}, token=first_token)
+        started = time.perf_counter()
+        status, body, _ = call(args.base_url, 'POST', '/api/discover/swipe-right', {'user_id': first_id}, token=second_token)
+        if status != 201 or not body.get('is_new_match'):
+            raise SystemExit(f"expected a new match, got {status}: {body}")
+        sent[body['match']['_id']] = (started, (first_id, second_id))
+    
+    deadline = time.perf_counter() + args.timeout
+    expected = 2 * len(sent)
+    while time.perf_counter() < deadline and sum(len(events) for events in arrivals.values()) < expected:
+        time.sleep(0.05)
+    
+    latencies = []
+    missing = 0
+    for match_id, (sent_at, users) in sent.items():
+        for user_id in users:
+            received = [at for at, event_match_id in arrivals[user_id] if event_match_id == match_id]
+            if received:
+                latencies.append((received[0] - sent_at) * 1000)
+            else:
+                missing += 1
+    
+    print(f"matches: {len(sent)}  events expected: {expected}  received: {len(latencies)}  missing: {missing}")
+    if latencies:
+        print(
+            f"delivery latency  p50 {statistics.median(latencies):7.1f} ms  "
+            f"p99 {percentile(latencies, 0.99):7.1f} ms  max {max(latencies):7.1f} ms"
+        )
+    if missing:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
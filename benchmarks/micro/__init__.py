@@ -0,0 +1 @@
+# Micro-benchmarks of hot pure-Python paths (pytest-benchmark)
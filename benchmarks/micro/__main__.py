@@ -0,0 +1,46 @@
+"""
+Micro-benchmarks of hot pure-Python paths with JSON baselines
+
+Covers the request validators, the model to_dict serializers, JWT
+generation/decoding and Authorization header parsing (pytest-benchmark).
+Runs are stored as JSON under benchmarks/baselines/<machine>/ (committed, so
+a baseline is shared with the rest of the team and CI); comparing against a
+saved baseline fails when a benchmark's median regressed past --fail.
+
+Usage:
+    python -m benchmarks.micro                           # run and print the table
+    python -m benchmarks.micro --save main               # save a baseline
+    python -m benchmarks.micro --compare main            # fail on a >10% median regression
+    python -m benchmarks.micro --compare main --fail median:5% -k email
+"""
+import argparse
+import os
+import sys
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORAGE = os.path.join(os.path.dirname(HERE), 'baselines')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', metavar='NAME', help='Save this run as a named baseline')
+    parser.add_argument('--compare', metavar='NAME', help='Compare against a saved baseline (name or run number)')
+    parser.add_argument('--fail', default='median:10%', help='Regression threshold for --compare (pytest-benchmark syntax)')
+    parser.add_argument('-k', dest='keyword', help='Only run benchmarks matching this expression')
+    args = parser.parse_args()
+    
+    pytest_args = [HERE, '-q', '-c', os.path.join(HERE, 'pytest.ini'), f"--benchmark-storage=file://{STORAGE}"]
+    if args.keyword:
+        pytest_args += ['-k', args.keyword]
+    if args.save:
+        pytest_args.append(f"--benchmark-save={args.save}")
+    if args.compare:
+        # Saved runs are NNNN_<name>.json; match names as well as run numbers
+        baseline = args.compare if args.compare.isdigit() else f"*_{args.compare}"
+        pytest_args += [f"--benchmark-compare={baseline}", f"--benchmark-compare-fail={args.fail}"]
+    sys.exit(pytest.main(pytest_args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import pytest
+from flask import Flask, request
+from app.middleware.auth_middleware import authenticate, require_auth
+from app.utils.jwt_utils import clear_token_cache, decode_token, generate_token
+
+
+@pytest.fixture
+def token(user_doc):
+    return generate_token(user_doc['_id'], user_doc['email'])
+
+
+def bench_generate_token(benchmark, user_doc):
+    assert benchmark(generate_token, user_doc['_id'], user_doc['email'])
+
+
+def bench_decode_token(benchmark, token):
+    assert benchmark(decode_token, token)['email']
+
+
+def bench_authenticate_header_cached(benchmark, token):
+    payload, error = benchmark(authenticate, f"Bearer {token}")
+    assert error is None
+
+
+def bench_authenticate_header_uncached(benchmark, token):
+    def run():
+        clear_token_cache()
+        return authenticate(f"Bearer {token}")
+    payload, error = benchmark(run)
+    assert error is None
+
+
+def bench_require_auth_request(benchmark, token):
+    """Header parsing plus the decorator inside a Flask request context"""
+    app = Flask(__name__)
+    
+    @require_auth
+    def view():
+        return request.user_id
+    
+    headers = {'Authorization': f"Bearer {token}"}
+    
+    def run():
+        with app.test_request_context('/', headers=headers):
+            return view()
+    assert benchmark(run)
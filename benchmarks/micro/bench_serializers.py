@@ -0,0 +1,23 @@
+from app.models import Match, Playlist, SwipeRight, User
+
+
+def bench_user_to_dict(benchmark, user_doc):
+    assert 'password' not in benchmark(User.to_dict, user_doc)
+
+
+def bench_playlist_to_dict(benchmark, playlist_doc):
+    assert len(benchmark(Playlist.to_dict, playlist_doc)['songs']) == 10
+
+
+def bench_match_page_to_dict(benchmark, match_docs):
+    assert len(benchmark(lambda: [Match.to_dict(match) for match in match_docs])) == 20
+
+
+def bench_swipe_to_dict(benchmark, match_docs):
+    swipe = {
+        '_id': match_docs[0]['_id'],
+        'user_id': match_docs[0]['user_id_1'],
+        'swiped_user_id': match_docs[0]['user_id_2'],
+        'created_at': match_docs[0]['created_at']
+    }
+    assert benchmark(SwipeRight.to_dict, swipe)['user_id'] == swipe['user_id']
@@ -0,0 +1,17 @@
+from app.utils.validators import validate_arrays, validate_email, validate_playlist_songs
+
+
+def bench_validate_email_valid(benchmark):
+    assert benchmark(validate_email, 'jane.doe+music@example.co.uk')
+
+
+def bench_validate_email_invalid(benchmark):
+    assert not benchmark(validate_email, 'jane.doe@example')
+
+
+def bench_validate_playlist_songs(benchmark, playlist_songs):
+    assert benchmark(validate_playlist_songs, playlist_songs) == (True, None)
+
+
+def bench_validate_arrays(benchmark, user_doc):
+    assert benchmark(validate_arrays, 'favorite_artists', user_doc['favorite_artists']) == (True, None)
@@ -0,0 +1,49 @@
+import os
+from datetime import datetime
+import pytest
+from bson import ObjectId
+
+# The in-memory store keeps importing the app from waiting on a MongoDB ping
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+
+def make_user_doc():
+    """User document with the favorites a typical profile has"""
+    now = datetime.utcnow()
+    return {
+        '_id': ObjectId(),
+        'email': 'benchmark.user@example.com',
+        'password': '$2b$12$' + 'x' * 53,
+        'favorite_songs': [f"Song {i}" for i in range(10)],
+        'favorite_artists': [f"Artist {i}" for i in range(8)],
+        'favorite_genres': ['Rock', 'Indie', 'Jazz', 'Soul'],
+        'spotify_username': 'benchmark_user',
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+@pytest.fixture
+def user_doc():
+    return make_user_doc()
+
+
+@pytest.fixture
+def playlist_songs():
+    return [{'song_name': f"Song {i}", 'artist_name': f"Artist {i % 4}"} for i in range(10)]
+
+
+@pytest.fixture
+def playlist_doc(playlist_songs):
+    now = datetime.utcnow()
+    return {'_id': ObjectId(), 'user_id': ObjectId(), 'songs': playlist_songs, 'created_at': now, 'updated_at': now}
+
+
+@pytest.fixture
+def match_docs():
+    """One page of matches (the default page size)"""
+    now = datetime.utcnow()
+    return [
+        {'_id': ObjectId(), 'user_id_1': ObjectId(), 'user_id_2': ObjectId(), 'created_at': now}
+        for _ in range(20)
+    ]
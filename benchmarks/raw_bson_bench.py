@@ -0,0 +1,102 @@
+"""
+Benchmark of the RawBSONDocument read path against full decoding
+
+Encodes the documents a profile, playlist and matches response reads into
+the BSON bytes a server reply carries, then compares for each endpoint:
+    decode  - bson.decode_all into dicts, to_dict, JSON encoding
+    raw     - RawBSONDocuments decoded lazily by to_dict and the JSON provider
+reporting median/p99 latency and the peak memory allocated while building one
+response (tracemalloc). No database is needed.
+
+Usage:
+    python -m benchmarks.raw_bson_bench [--matches 100] [--iterations 2000]
+"""
+import argparse
+import tracemalloc
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from flask import Flask, jsonify
+from app.config import Config
+from app.controllers.discover_controller import build_matches_response
+from app.models.playlist import Playlist
+from app.models.user import User
+from app.utils.json_provider import install_json_provider
+from benchmarks.auth_bench import time_calls, summary
+from benchmarks.json_bench import make_page
+
+RAW_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+DICT_OPTIONS = CodecOptions()
+
+
+def make_payloads(match_count):
+    """BSON reply bodies of each endpoint: (name, [collection payload, ...], builder)"""
+    page = make_page(match_count)
+    users = [{field: user[field] for field in ['_id'] + list(User.CARD_PROJECTION)} for _, user in page]
+    matches = [match for match, _ in page]
+    current_user_id = str(matches[0]['user_id_1'])
+    for match in matches:
+        match['user_id_1'] = matches[0]['user_id_1']
+    playlist = {
+        '_id': bson.ObjectId(),
+        'user_id': users[0]['_id'],
+        'songs': [
+            {'song_name': f"Song {i}", 'artist_name': 'Queen', 'album': f"Album {i}", 'duration_ms': 180000 + i}
+            for i in range(10)
+        ],
+        'created_at': users[0]['created_at'],
+        'updated_at': users[0]['updated_at']
+    }
+    
+    def profile(docs):
+        return User.to_dict(docs[0][0])
+    
+    def playlist_response(docs):
+        return Playlist.to_dict(docs[0][0])
+    
+    def matches_response(docs):
+        matched_users = {user['_id']: user for user in docs[1]}
+        return build_matches_response(current_user_id, docs[0], False, matched_users)
+    
+    encode = lambda docs: b''.join(bson.encode(doc) for doc in docs)
+    return [
+        ('profile', [encode(users[:1])], profile),
+        ('playlist', [encode([playlist])], playlist_response),
+        ('matches', [encode(matches), encode(users)], matches_response)
+    ]
+
+
+def peak_bytes(func):
+    """Peak memory allocated while func runs"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matches', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    
+    app = Flask(__name__)
+    provider = install_json_provider(app, Config.JSON_PROVIDER)
+    print(f"JSON provider: {provider}, {args.matches} matches per page, {args.iterations} iterations")
+    
+    for name, payloads, build in make_payloads(args.matches):
+        for mode, options in (('decode', DICT_OPTIONS), ('raw', RAW_OPTIONS)):
+            def respond(payloads=payloads, options=options, build=build):
+                with app.app_context():
+                    docs = [bson.decode_all(payload, options) for payload in payloads]
+                    return jsonify(build(docs)).get_data()
+            
+            respond()
+            peak = peak_bytes(respond)
+            print(f"{summary(f'{name} {mode}', time_calls(respond, args.iterations))}   peak {peak / 1024:8.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Concurrency stress test for the swipe_right pipeline
+
+Every pair of users swipes right on each other at the same moment from two
+threads. Afterwards it checks that each pair has exactly one match, that
+exactly one of the two swipes reported is_new_match, that no swipe_right
+documents are left behind, and reports the Mongo round trips per swipe.
+
+Requires a running mongod; the data goes to a scratch database that is
+dropped at the end.
+
+Usage:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.swipe_stress [--pairs 200] [--threads 32]
+"""
+import argparse
+import os
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import monitoring
+
+os.environ.setdefault('MONGODB_DB_NAME', 'swipe_stress')
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Count Mongo commands issued by each thread"""
+    
+    def __init__(self):
+        self.local = threading.local()
+    
+    def reset(self):
+        self.local.count = 0
+    
+    @property
+    def count(self):
+        return getattr(self.local, 'count', 0)
+    
+    def started(self, event):
+        self.local.count = self.count + 1
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+    
+    # Listeners must be registered before the app creates its MongoClient
+    counter = RoundTripCounter()
+    monitoring.register(counter)
+    
+    from app.storage import get_storage
+    from app.controllers.discover_controller import swipe_right
+    from app.models import User, SwipeRight, Match
+    from app.utils.db_indexes import ensure_indexes
+    
+    try:
+        get_storage().ping(timeout=5)
+    except Exception:
+        sys.exit('MongoDB is not reachable; set MONGODB_URI')
+    
+    for collection_name in (User.COLLECTION_NAME, SwipeRight.COLLECTION_NAME, Match.COLLECTION_NAME):
+        get_storage().drop_collection(collection_name)
+    ensure_indexes()
+    
+    user_ids = User.get_collection().insert_many(
+        [{'email': f"stress{i}@example.com", 'password': ''} for i in range(args.pairs * 2)]
+    ).inserted_ids
+    pairs = [(str(user_ids[2 * i]), str(user_ids[2 * i + 1])) for i in range(args.pairs)]
+    
+    def swipe(current_user_id, swiped_user_id, barrier):
+        barrier.wait()
+        counter.reset()
+        response, status_code = swipe_right(current_user_id, swiped_user_id)
+        return response, status_code, counter.count
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        for first, second in pairs:
+            # Release both sides of the pair at the same time
+            barrier = threading.Barrier(2)
+            results.append((
+                (first, second),
+                executor.submit(swipe, first, second, barrier),
+                executor.submit(swipe, second, first, barrier)
+            ))
+        results = [(pair, a.result(), b.result()) for pair, a, b in results]
+    
+    failures = []
+    round_trips = Counter()
+    for pair, (response_a, status_a, trips_a), (response_b, status_b, trips_b) in results:
+        round_trips[trips_a] += 1
+        round_trips[trips_b] += 1
+        if status_a >= 400 or status_b >= 400:
+            failures.append(f"{pair}: error {response_a} / {response_b}")
+            continue
+        new_matches = sum(bool(response.get('is_new_match')) for response in (response_a, response_b))
+        if new_matches != 1:
+            failures.append(f"{pair}: {new_matches} swipes reported a new match")
+    
+    match_count = Match.get_collection().count_documents({})
+    leftover_swipes = SwipeRight.get_collection().count_documents({})
+    if match_count != args.pairs:
+        failures.append(f"expected {args.pairs} matches, found {match_count}")
+    if leftover_swipes:
+        failures.append(f"{leftover_swipes} swipe_right documents left behind")
+    
+    for collection_name in (User.COLLECTION_NAME, SwipeRight.COLLECTION_NAME, Match.COLLECTION_NAME):
+        get_storage().drop_collection(collection_name)
+    
+    total_swipes = sum(round_trips.values())
+    average = sum(trips * count for trips, count in round_trips.items()) / total_swipes
+    print(f"pairs: {args.pairs}  swipes: {total_swipes}  matches: {match_count}")
+    print(f"round trips per swipe: avg {average:.2f}  histogram {dict(sorted(round_trips.items()))}")
+    if failures:
+        print('\n'.join(f"✗ {failure}" for failure in failures))
+        sys.exit(1)
+    print('✓ no duplicate or lost matches')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+import os
+
+
+def on_starting(server):
+    """Warn when several workers run with match events that only reach their own process"""
+    from app.config import Config
+    if server.cfg.workers > 1 and Config.MATCH_EVENTS_BACKEND == 'memory':
+        print(
+            f"⚠ Warning: MATCH_EVENTS_BACKEND 'memory' only delivers a match to the streams of the worker that "
+            f"created it; with {server.cfg.workers} workers the other streams see it on reconnect (Last-Event-ID). "
+            f"Set MATCH_EVENTS_BACKEND=change_stream with a MongoDB replica set for live delivery"
+        )
+
+
+def child_exit(server, worker):
+    """Drop the live gauges (in-flight requests, pool sizes) of a worker that exited"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
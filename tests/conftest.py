@@ -0,0 +1,19 @@
+import os
+import pytest
+
+# Importing the app installs the in-memory store instead of connecting to MongoDB
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+
+@pytest.fixture
+def storage():
+    """Fresh MemoryStorage with the model indexes and a seeded $sample, installed for the duration of a test"""
+    from app.storage import MemoryStorage, get_storage, set_storage
+    from app.utils.db_indexes import ensure_indexes
+    
+    previous = get_storage()
+    backend = MemoryStorage(seed=0)
+    set_storage(backend)
+    ensure_indexes()
+    yield backend
+    set_storage(previous)
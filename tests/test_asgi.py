@@ -0,0 +1,79 @@
+"""
+ASGI mode: native async routes and the Flask fallback through a2wsgi
+"""
+import asyncio
+import json
+import pytest
+from app.models import User
+from app.utils.jwt_utils import generate_token
+
+
+@pytest.fixture
+def asgi_app():
+    from app.asgi import asgi_app
+    return asgi_app
+
+
+def request(app, method, path, headers=None, body=b''):
+    """Send one HTTP request through an ASGI app; returns (status, headers, body)"""
+    headers = {**(headers or {}), 'Content-Length': str(len(body))} if body else headers or {}
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80)
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+    
+    async def send(message):
+        sent.append(message)
+    
+    asyncio.run(app(scope, receive, send))
+    start = next(message for message in sent if message['type'] == 'http.response.start')
+    body = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+    return start['status'], {name.decode(): value.decode() for name, value in start['headers']}, body
+
+
+def test_only_the_async_read_routes_are_served_natively(asgi_app):
+    native = [('GET', '/api/profile'), ('GET', '/api/playlist'), ('GET', '/api/discover/matches'),
+              ('GET', '/api/discover/matches/stream')]
+    fallback = [('PUT', '/api/profile'), ('POST', '/api/playlist'), ('POST', '/api/auth/login'),
+                ('GET', '/api/discover/user'), ('POST', '/api/discover/swipes'), ('GET', '/healthz'),
+                ('OPTIONS', '/api/profile')]
+    for method, path in native:
+        assert asgi_app._is_async_route({'method': method, 'path': path}), path
+    for method, path in fallback:
+        assert not asgi_app._is_async_route({'method': method, 'path': path}), (method, path)
+
+
+def test_both_sides_answer_through_the_dispatcher(storage, asgi_app):
+    user = User.create({'email': 'me@example.com', 'password': 'hash', 'favorite_genres': ['Rock']})
+    headers = {'Authorization': f"Bearer {generate_token(user['_id'], user['email'])}"}
+    
+    status, _, body = request(asgi_app, 'GET', '/api/profile', headers)
+    assert status == 200
+    assert json.loads(body)['email'] == 'me@example.com'
+    
+    status, _, body = request(
+        asgi_app, 'PUT', '/api/profile', {**headers, 'Content-Type': 'application/json'},
+        json.dumps({'favorite_genres': ['Jazz']}).encode()
+    )
+    assert status == 200
+    assert json.loads(body)['favorite_genres'] == ['Jazz']
+    
+    status, _, _ = request(asgi_app, 'GET', '/healthz')
+    assert status == 200
@@ -0,0 +1,202 @@
+"""
+CircuitBreaker, GuardedCollection and GuardedCursor with a fake clock and a fake collection
+"""
+import pytest
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, ExecutionTimeout, OperationFailure
+from app.storage.circuit_breaker import CircuitBreaker, CircuitOpenError, GuardedCollection, is_unavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeCursor:
+    """Yields documents, raising the exceptions found among them"""
+    
+    def __init__(self, items):
+        self._items = iter(items)
+    
+    def sort(self, *args):
+        return self
+    
+    def limit(self, *args):
+        return self
+    
+    def __next__(self):
+        item = next(self._items)
+        if isinstance(item, Exception):
+            raise item
+        return item
+    
+    def close(self):
+        pass
+
+
+class FakeCollection:
+    """find_one() answers or raises the next scripted outcome; find() returns a FakeCursor"""
+    
+    def __init__(self, outcomes=(), documents=()):
+        self.outcomes = list(outcomes)
+        self.documents = list(documents)
+        self.calls = 0
+    
+    def find_one(self, *args, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else {'_id': 1}
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    def find(self, *args, **kwargs):
+        self.calls += 1
+        return FakeCursor(self.documents)
+
+
+def make_breaker(clock, **kwargs):
+    options = {'failure_rate': 0.5, 'minimum_calls': 4, 'window': 10, 'open_seconds': 5.0, 'half_open_calls': 2}
+    options.update(kwargs)
+    return CircuitBreaker(clock=clock, **options)
+
+
+def run(collection, count=1):
+    """Call find_one count times, swallowing the errors"""
+    for _ in range(count):
+        try:
+            collection.find_one({})
+        except Exception:
+            pass
+
+
+def test_unavailability_errors_are_told_from_answers():
+    assert is_unavailable(ConnectionFailure('down'))
+    assert is_unavailable(ExecutionTimeout('slow'))
+    assert is_unavailable(OperationFailure('operation exceeded time limit', code=50))
+    assert not is_unavailable(DuplicateKeyError('E11000'))
+    assert not is_unavailable(ValueError('bug'))
+
+
+def test_circuit_waits_for_minimum_calls_then_opens_at_the_failure_rate():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    fake = FakeCollection([ConnectionFailure('down')] * 3)
+    collection = GuardedCollection(fake, breaker)
+    
+    run(collection, 3)
+    # Three failures out of three calls, but fewer than minimum_calls
+    assert breaker.state == breaker.CLOSED
+    run(collection)
+    assert breaker.state == breaker.CLOSED
+    
+    fake.outcomes = [ConnectionFailure('down')]
+    run(collection)
+    # 4 failures out of 5 calls
+    assert breaker.state == breaker.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        collection.find_one({})
+    assert error.value.retry_after == 5
+    assert fake.calls == 5
+
+
+def test_answers_do_not_count_as_failures():
+    breaker = make_breaker(FakeClock())
+    collection = GuardedCollection(FakeCollection([DuplicateKeyError('E11000')] * 10), breaker)
+    run(collection, 10)
+    assert breaker.state == breaker.CLOSED
+
+
+def test_failure_rate_below_threshold_keeps_the_circuit_closed():
+    breaker = make_breaker(FakeClock())
+    # Every third call fails: a 33% rate under the 50% threshold
+    outcomes = [ExecutionTimeout('slow') if n % 3 == 2 else {'_id': 1} for n in range(30)]
+    run(GuardedCollection(FakeCollection(outcomes), breaker), 30)
+    assert breaker.state == breaker.CLOSED
+
+
+def open_breaker(clock):
+    breaker = make_breaker(clock)
+    run(GuardedCollection(FakeCollection([ConnectionFailure('down')] * 4), breaker), 4)
+    assert breaker.state == breaker.OPEN
+    return breaker
+
+
+def test_circuit_half_opens_after_open_seconds_and_closes_on_trial_successes():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    
+    clock.advance(4.5)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 1
+    
+    clock.advance(0.5)
+    collection = GuardedCollection(FakeCollection(), breaker)
+    collection.find_one({})
+    assert breaker.state == breaker.HALF_OPEN
+    collection.find_one({})
+    assert breaker.state == breaker.CLOSED
+
+
+def test_half_open_admits_a_limited_number_of_trials():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.advance(5)
+    
+    assert breaker.before_call() and breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # A finished trial frees its slot
+    breaker.record(False, trial=True)
+    assert breaker.before_call()
+
+
+def test_failed_trial_opens_the_circuit_again():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.advance(5)
+    
+    run(GuardedCollection(FakeCollection([ConnectionFailure('still down')]), breaker))
+    assert breaker.state == breaker.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.check_open()
+    assert error.value.retry_after == 5
+
+
+def test_cursor_is_admitted_on_its_first_fetch():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    fake = FakeCollection(documents=[{'_id': 1}])
+    
+    # Building the cursor sends nothing, so it is not refused
+    cursor = GuardedCollection(fake, breaker).find({}).sort('_id').limit(1)
+    with pytest.raises(CircuitOpenError):
+        next(cursor)
+
+
+def test_cursor_errors_count_as_failures():
+    breaker = make_breaker(FakeClock())
+    # First fetch fails
+    for _ in range(4):
+        with pytest.raises(ConnectionFailure):
+            list(GuardedCollection(FakeCollection(documents=[ConnectionFailure('down')]), breaker).find({}))
+    assert breaker.state == breaker.OPEN
+    
+    breaker = make_breaker(FakeClock())
+    # A later batch fails after the first documents came back
+    for _ in range(2):
+        with pytest.raises(ExecutionTimeout):
+            list(GuardedCollection(FakeCollection(documents=[{'_id': 1}, ExecutionTimeout('slow')]), breaker).find({}))
+    # 2 successful first fetches and 2 failed batches
+    assert breaker.state == breaker.OPEN
+
+
+def test_iterating_a_large_result_records_one_call():
+    breaker = make_breaker(FakeClock())
+    assert len(list(GuardedCollection(FakeCollection(documents=[{'_id': n} for n in range(100)]), breaker).find({}))) == 100
+    assert len(breaker._outcomes) == 1
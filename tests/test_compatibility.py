@@ -0,0 +1,65 @@
+from app.utils.cache import LRUTTLCache
+from app.utils.compatibility import (
+    ProfileCache, Vocabulary, encode_profiles, rank_candidates, rank_profiles, unpack_profile
+)
+
+
+def tokens(songs=(), artists=(), genres=()):
+    return {
+        'songs': {f"song:{song}" for song in songs},
+        'artists': {f"artist:{artist}" for artist in artists},
+        'genres': {f"genre:{genre}" for genre in genres}
+    }
+
+
+PROFILES = {
+    'caller': tokens(['a', 'b'], ['x'], ['rock']),
+    'same': tokens(['a', 'b'], ['x'], ['rock']),
+    'close': tokens(['a'], ['x'], ['jazz']),
+    'far': tokens(['z'], ['y'], ['pop'])
+}
+CANDIDATES = ['far', 'close', 'same']
+
+
+def rank_cached(cache, vocab, loaded=None):
+    def load_tokens(user_ids):
+        if loaded is not None:
+            loaded.extend(user_ids)
+        return {user_id: PROFILES[user_id] for user_id in user_ids}
+    
+    caller, *candidates = encode_profiles(['caller'] + CANDIDATES, load_tokens, cache=cache, vocab=vocab)
+    return rank_profiles(unpack_profile(caller), CANDIDATES, candidates)
+
+
+def test_rank_candidates_orders_by_shared_taste():
+    ranked = rank_candidates(PROFILES['caller'], CANDIDATES, [PROFILES[name] for name in CANDIDATES])
+    assert [name for name, _ in ranked] == ['same', 'close', 'far']
+    assert ranked[0][1] == 1.0
+    assert ranked[-1][1] == 0.0
+
+
+def test_cached_profiles_rank_like_fresh_ones():
+    cache = ProfileCache(LRUTTLCache(maxsize=100, ttl=60))
+    vocab = Vocabulary()
+    loaded = []
+    first = rank_cached(cache, vocab, loaded)
+    again = rank_cached(cache, vocab, loaded)
+    
+    assert first == again
+    assert sorted(loaded) == sorted(['caller'] + CANDIDATES)
+    cache.invalidate('close')
+    rank_cached(cache, vocab, loaded)
+    assert loaded[-1] == 'close'
+
+
+def test_vocabulary_reset_reencodes_cached_profiles():
+    cache = ProfileCache(LRUTTLCache(maxsize=100, ttl=60))
+    vocab = Vocabulary(max_size=20)
+    expected = rank_cached(cache, vocab)
+    
+    # Fill the vocabulary so it starts over; cached IDs no longer apply
+    vocab.intern_many(f"song:filler {n}" for n in range(13))
+    assert vocab.generation == 1
+    loaded = []
+    assert rank_cached(cache, vocab, loaded) == expected
+    assert sorted(loaded) == sorted(['caller'] + CANDIDATES)
@@ -0,0 +1,38 @@
+"""
+Request deadlines and their pymongo.timeout() scope
+"""
+import time
+import pytest
+from pymongo import MongoClient, _csot
+from app.storage.circuit_breaker import is_unavailable
+from app.utils.deadline import RequestDeadline, remaining
+
+
+def test_remaining_is_bounded_by_the_request_budget():
+    assert remaining() is None
+    assert remaining(3) == 3
+    with RequestDeadline(0.5):
+        assert 0.4 < remaining() <= 0.5
+        assert remaining(0.1) == 0.1
+        assert remaining(10) <= 0.5
+    assert remaining() is None
+
+
+def test_deadline_opens_a_pymongo_timeout_scope():
+    assert _csot.get_timeout() is None
+    with RequestDeadline(2.0):
+        assert _csot.get_timeout() == 2.0
+        assert 0 < _csot.remaining() <= 2.0
+    assert _csot.get_timeout() is None
+
+
+def test_operations_fail_at_the_deadline_instead_of_the_client_timeouts():
+    # Nothing listens on port 1: server selection would wait serverSelectionTimeoutMS (30s)
+    client = MongoClient('mongodb://localhost:1/', serverSelectionTimeoutMS=30000, connect=False)
+    start = time.monotonic()
+    with RequestDeadline(0.2):
+        with pytest.raises(Exception) as error:
+            client.test.users.find_one({})
+    assert time.monotonic() - start < 2
+    assert is_unavailable(error.value)
+    client.close()
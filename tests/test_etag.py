@@ -0,0 +1,75 @@
+"""
+Conditional GETs (ETag / If-None-Match) on profile, playlist and matches
+"""
+import pytest
+from app.controllers.discover_controller import swipe_right
+from app.models import User
+from app.utils.jwt_utils import generate_token
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+def make_user(email):
+    user = User.create({'email': email, 'password': 'hash', 'favorite_genres': ['Rock']})
+    return str(user['_id']), {'Authorization': f"Bearer {generate_token(user['_id'], email)}"}
+
+
+def assert_revalidates(client, url, headers):
+    """GET url, then check that its ETag answers 304; returns the ETag"""
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    
+    not_modified = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['ETag'] == etag
+    assert not_modified.data == b''
+    return etag
+
+
+def test_profile_etag_changes_on_update(storage, client):
+    _, headers = make_user('me@example.com')
+    etag = assert_revalidates(client, '/api/profile', headers)
+    
+    assert client.put('/api/profile', headers=headers, json={'favorite_genres': ['Jazz']}).status_code == 200
+    response = client.get('/api/profile', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['favorite_genres'] == ['Jazz']
+
+
+def test_playlist_etag_changes_on_update(storage, client):
+    _, headers = make_user('me@example.com')
+    # No playlist yet: no ETag to revalidate
+    missing = client.get('/api/playlist', headers=headers)
+    assert missing.status_code == 404
+    assert 'ETag' not in missing.headers
+    
+    songs = [{'song_name': f"song {n}", 'artist_name': 'artist'} for n in range(10)]
+    assert client.post('/api/playlist', headers=headers, json={'songs': songs}).status_code in (200, 201)
+    etag = assert_revalidates(client, '/api/playlist', headers)
+    
+    songs[0]['song_name'] = 'new song'
+    assert client.post('/api/playlist', headers=headers, json={'songs': songs}).status_code in (200, 201)
+    response = client.get('/api/playlist', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_matches_etag_changes_on_new_match_and_varies_with_the_page(storage, client):
+    user_id, headers = make_user('me@example.com')
+    other_id, _ = make_user('other@example.com')
+    etag = assert_revalidates(client, '/api/discover/matches', headers)
+    assert assert_revalidates(client, '/api/discover/matches?limit=5', headers) != etag
+    
+    swipe_right(user_id, other_id)
+    swipe_right(other_id, user_id)
+    response = client.get('/api/discover/matches', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['count'] == 1
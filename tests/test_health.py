@@ -0,0 +1,8 @@
+def test_root_and_liveness_answer_without_the_database():
+    from app import app
+    client = app.test_client()
+    
+    root = client.get('/')
+    assert root.status_code == 200
+    assert root.json == {'status': 'ok', 'message': 'Heartbeat Dating App Backend API'}
+    assert client.get('/healthz').json['status'] == 'ok'
@@ -0,0 +1,43 @@
+"""
+BSON-aware JSON providers
+"""
+from datetime import datetime
+import pytest
+from bson import BSON, ObjectId
+from bson.raw_bson import RawBSONDocument
+from flask import Flask
+from app.utils.json_provider import JSON_PROVIDERS, install_json_provider
+
+DOC_ID = ObjectId('65f1a2b3c4d5e6f708192a3b')
+DOCUMENT = {
+    '_id': DOC_ID,
+    'created_at': datetime(2024, 5, 1, 12, 30, 15, 123000),
+    'songs': RawBSONDocument(BSON.encode({'song_name': 'Song', 'artist_name': 'Artist'})),
+    'name': 'Zoë'
+}
+EXPECTED = {
+    '_id': '65f1a2b3c4d5e6f708192a3b',
+    'created_at': '2024-05-01T12:30:15.123000',
+    'songs': {'song_name': 'Song', 'artist_name': 'Artist'},
+    'name': 'Zoë'
+}
+
+
+@pytest.mark.parametrize('name', sorted(JSON_PROVIDERS))
+def test_providers_encode_bson_values_alike(name):
+    app = Flask(__name__)
+    assert install_json_provider(app, name) == name
+    
+    with app.app_context():
+        response = app.json.response(DOCUMENT)
+    assert response.mimetype == 'application/json'
+    assert app.json.loads(response.get_data()) == EXPECTED
+    assert app.json.loads(app.json.dumps(DOCUMENT)) == EXPECTED
+    
+    with pytest.raises(TypeError):
+        app.json.dumps({'value': object()})
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        install_json_provider(Flask(__name__), 'simplejson')
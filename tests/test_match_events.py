@@ -0,0 +1,40 @@
+import pytest
+from bson import ObjectId
+from app.utils import match_events
+from app.utils.jwt_utils import generate_token
+from app.utils.match_events import StreamSlots
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+def test_stream_slots_are_bounded():
+    slots = StreamSlots(2)
+    assert slots.acquire() and slots.acquire()
+    assert not slots.acquire()
+    slots.release()
+    assert slots.acquire()
+    assert not StreamSlots(0).acquire()
+
+
+def test_sync_match_streams_are_capped(client, monkeypatch):
+    monkeypatch.setattr(match_events.sync_stream_slots, 'limit', 1)
+    headers = {'Authorization': f"Bearer {generate_token(ObjectId(), 'me@example.com')}"}
+    
+    stream = client.get('/api/discover/matches/stream', headers=headers, buffered=False)
+    assert stream.status_code == 200
+    refused = client.get('/api/discover/matches/stream', headers=headers)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '5'
+    
+    # Closing the first stream frees its slot
+    stream.close()
+    assert match_events.sync_stream_slots.open == 0
+
+
+def test_change_streams_need_mongodb(storage):
+    with pytest.raises(ValueError):
+        match_events._create_source('change_stream')
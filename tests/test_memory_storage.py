@@ -0,0 +1,361 @@
+"""
+The models' queries against the in-memory storage backend
+
+Each test runs on a fresh MemoryStorage (see conftest.storage) and goes
+through the model methods, so the store is checked against what the app
+actually sends to MongoDB.
+"""
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.models import DiscoverDeck, Match, Playlist, SwipeRight, TasteIndex, User
+from app.models import taste_index
+from app.models.taste_index import bucket_of
+from app.storage import MemoryStorage
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def make_user(email, genres=('Rock',)):
+    return User.create({
+        'email': email,
+        'password': 'hash',
+        'favorite_songs': ['Song'],
+        'favorite_artists': ['Artist'],
+        'favorite_genres': list(genres),
+        'spotify_username': email.split('@')[0]
+    })
+
+
+def position(match):
+    """Keyset position of a match as a client sends it back (through a cursor)"""
+    return decode_cursor(encode_cursor(match['created_at'], match['_id']))
+
+
+# Datetimes
+
+
+def test_datetimes_are_stored_with_millisecond_precision(storage):
+    collection = storage.collection('things')
+    created_at = datetime(2024, 5, 1, 12, 0, 0, 123456)
+    collection.insert_one({'_id': 1, 'created_at': created_at, 'history': [{'at': created_at}]})
+    collection.update_one({'_id': 1}, {'$set': {'updated_at': created_at}})
+    
+    doc = collection.find_one({'_id': 1})
+    expected = datetime(2024, 5, 1, 12, 0, 0, 123000)
+    assert doc['created_at'] == expected
+    assert doc['history'][0]['at'] == expected
+    assert doc['updated_at'] == expected
+    # Filter values are truncated too, as the driver encodes them to BSON
+    assert collection.count_documents({'created_at': created_at}) == 1
+    assert collection.count_documents({'created_at': {'$gt': expected}}) == 0
+
+
+def test_upserted_datetimes_are_truncated(storage):
+    collection = storage.collection('things')
+    collection.update_one({'_id': 1}, {'$setOnInsert': {'created_at': datetime(2024, 1, 1, 0, 0, 0, 999999)}}, upsert=True)
+    assert collection.find_one({'_id': 1})['created_at'].microsecond == 999000
+
+
+# Match pagination
+
+
+def test_match_pages_return_every_match_once(storage):
+    user_id = ObjectId()
+    others = [ObjectId() for _ in range(5)]
+    Match.bulk_upsert(user_id, others)
+    
+    seen = []
+    before = None
+    while True:
+        page, has_more = Match.find_page_by_user(user_id, 2, before=before)
+        seen.extend(match['_id'] for match in page)
+        if not has_more:
+            break
+        before = position(page[-1])
+    
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+def test_since_returns_only_newer_matches(storage):
+    user_id = ObjectId()
+    Match.bulk_upsert(user_id, [ObjectId() for _ in range(5)])
+    
+    page, _ = Match.find_page_by_user(user_id, 20)
+    sync = position(page[0])
+    assert Match.find_page_by_user(user_id, 20, after=sync) == ([], False)
+    
+    new_match, _ = Match.upsert(user_id, ObjectId())
+    newer, has_more = Match.find_page_by_user(user_id, 20, after=sync)
+    assert [match['_id'] for match in newer] == [new_match['_id']]
+    assert not has_more
+
+
+def test_match_version_and_matched_ids(storage):
+    user_id = ObjectId()
+    others = [ObjectId() for _ in range(3)]
+    Match.bulk_upsert(user_id, others)
+    Match.bulk_upsert(ObjectId(), [ObjectId()])
+    
+    count, latest = Match.version_for_user(user_id)
+    assert count == 3
+    assert set(latest) == {'_id', 'created_at'}
+    assert sorted(Match.find_matched_user_ids(user_id)) == sorted(others)
+
+
+def test_match_bulk_upsert_reports_existing_matches(storage):
+    user_id = ObjectId()
+    first, second = ObjectId(), ObjectId()
+    Match.bulk_upsert(user_id, [first])
+    
+    matches = Match.bulk_upsert(user_id, [first, second])
+    assert matches[first]['created'] is False
+    assert matches[second]['created'] is True
+    assert Match.find_by_users(second, user_id)['_id'] == matches[second]['_id']
+
+
+# Users
+
+
+def test_user_lookups(storage):
+    alice = make_user('alice@example.com')
+    bob = make_user('bob@example.com')
+    missing = ObjectId()
+    
+    assert User.find_by_email('alice@example.com')['_id'] == alice['_id']
+    assert User.find_auth_by_email('bob@example.com').keys() == {'_id', 'email', 'password'}
+    assert User.find_existing_ids([alice['_id'], str(bob['_id']), missing]) == {alice['_id'], bob['_id']}
+    
+    cards = User.find_by_ids([alice['_id'], bob['_id'], missing])
+    assert set(cards) == {alice['_id'], bob['_id']}
+    assert 'password' not in cards[alice['_id']]
+
+
+def test_cached_user_projections_match_the_store(storage):
+    from app.models.user import apply_projection
+    
+    alice = User.find_by_id(make_user('alice@example.com')['_id'])
+    collection = User.get_collection()
+    for projection in ({}, {'_id': 0}, {'_id': 1}, {'password': 0}, {'email': 1}, {'email': 1, '_id': 0}):
+        assert apply_projection(alice, projection) == collection.find_one({'_id': alice['_id']}, projection), projection
+    assert apply_projection(alice, {'_id': 0}) == {key: value for key, value in alice.items() if key != '_id'}
+    assert apply_projection(alice, {'_id': 1}) == {'_id': alice['_id']}
+
+
+def test_user_email_is_unique(storage):
+    make_user('alice@example.com')
+    with pytest.raises(DuplicateKeyError):
+        make_user('alice@example.com')
+
+
+def test_user_update_returns_the_new_document(storage):
+    alice = make_user('alice@example.com')
+    updated = User.update(alice['_id'], {'spotify_username': 'alice_music'})
+    assert updated['spotify_username'] == 'alice_music'
+    assert User.find_by_id(alice['_id'], User.CARD_PROJECTION)['spotify_username'] == 'alice_music'
+
+
+# Swipes
+
+
+def test_swipes(storage):
+    user_id = ObjectId()
+    swiped = [ObjectId() for _ in range(3)]
+    swipes = SwipeRight.bulk_upsert(user_id, swiped)
+    assert all(swipe['created'] for swipe in swipes.values())
+    assert SwipeRight.bulk_upsert(user_id, swiped[:1])[swiped[0]]['created'] is False
+    
+    assert sorted(SwipeRight.find_swiped_user_ids(user_id)) == sorted(swiped)
+    assert SwipeRight.find_swipers_among(swiped[1], [user_id, ObjectId()]) == {user_id}
+    assert SwipeRight.pop(user_id, swiped[1])['swiped_user_id'] == swiped[1]
+    assert SwipeRight.pop(user_id, swiped[1]) is None
+    assert SwipeRight.bulk_delete_pairs([(user_id, swiped[0]), (user_id, ObjectId())]) == 1
+
+
+def test_unordered_bulk_write_continues_after_a_duplicate(storage):
+    collection = SwipeRight.get_collection()
+    user_id, swiped_user_id = ObjectId(), ObjectId()
+    collection.insert_one({'user_id': user_id, 'swiped_user_id': swiped_user_id})
+    
+    with pytest.raises(BulkWriteError) as error:
+        collection.bulk_write([
+            InsertOne({'user_id': user_id, 'swiped_user_id': swiped_user_id}),
+            UpdateOne({'user_id': user_id, 'swiped_user_id': ObjectId()}, {'$setOnInsert': {'x': 1}}, upsert=True),
+            UpdateOne({'user_id': user_id, 'swiped_user_id': swiped_user_id}, {'$set': {'_id': ObjectId()}})
+        ], ordered=False)
+    errors = error.value.details['writeErrors']
+    assert [(item['index'], item['code']) for item in errors] == [(0, 11000), (2, 66)]
+    assert [item['index'] for item in error.value.details['upserted']] == [1]
+
+
+# Playlists
+
+
+def test_playlists(storage):
+    user_id, other_id = ObjectId(), ObjectId()
+    songs = [{'song_name': 'Song', 'artist_name': 'Artist'}]
+    created = Playlist.update_or_create(user_id, songs)
+    updated = Playlist.update_or_create(user_id, songs + songs)
+    Playlist.update_or_create(other_id, songs)
+    
+    assert updated['_id'] == created['_id']
+    assert len(Playlist.find_by_user_id(user_id)['songs']) == 2
+    assert set(Playlist.find_version(user_id)) == {'_id', 'updated_at'}
+    assert set(Playlist.find_by_user_ids([user_id, str(other_id)])) == {user_id, other_id}
+
+
+# Taste index
+
+
+def test_taste_index_buckets_follow_user_updates(storage):
+    rock = [make_user(f"rock{n}@example.com", genres=('Rock', 'Jazz')) for n in range(20)]
+    pop = make_user('pop@example.com', genres=('Pop',))
+    TasteIndex.rebuild(User.get_collection())
+    
+    # Posting lists are split by user ID; each bucket holds only its own users
+    buckets = list(TasteIndex.get_collection().find({'token': 'genre:rock'}))
+    assert len(buckets) > 1
+    assert all(bucket_of(user_id) == bucket['bucket'] for bucket in buckets for user_id in bucket['user_ids'])
+    
+    ranked = TasteIndex.find_candidates({'genre:rock', 'genre:jazz'}, exclude_ids={rock[0]['_id']})
+    assert {user_id for user_id, _ in ranked} == {user['_id'] for user in rock[1:]}
+    assert all(count == 2 for _, count in ranked)
+    
+    User.update(pop['_id'], {'favorite_genres': ['Rock']})
+    User.update(rock[1]['_id'], {'favorite_genres': ['Pop']})
+    ranked = dict(TasteIndex.find_candidates({'genre:rock'}))
+    assert pop['_id'] in ranked and rock[1]['_id'] not in ranked
+    assert TasteIndex.find_candidates({'genre:pop'}) == [(rock[1]['_id'], 1)]
+    # The emptied pop bucket of the first user is gone
+    assert TasteIndex.get_collection().count_documents({'token': 'genre:pop'}) == 1
+
+
+def test_taste_index_buckets_stay_sorted_and_unique(storage, monkeypatch):
+    monkeypatch.setattr(taste_index, 'BUCKETS', 1)
+    user_ids = [ObjectId() for _ in range(30)]
+    # Newest first, so appending would leave the bucket unsorted
+    for user_id in reversed(user_ids):
+        TasteIndex.update_user(user_id, set(), {'genre:rock'})
+    # Indexing a user twice under the same token leaves one entry
+    TasteIndex.update_user(user_ids[3], set(), {'genre:rock'})
+    
+    bucket = TasteIndex.get_collection().find_one({'token': 'genre:rock'})
+    assert bucket['user_ids'] == user_ids
+    assert sorted(TasteIndex.find_candidates({'genre:rock'})) == [(user_id, 1) for user_id in user_ids]
+    
+    users = [make_user(f"sorted{n}@example.com") for n in range(5)]
+    TasteIndex.rebuild(User.get_collection())
+    assert TasteIndex.get_collection().find_one({'token': 'genre:rock'})['user_ids'] == sorted(user['_id'] for user in users)
+
+
+# Discover deck
+
+
+def test_deck_pops_in_order_without_duplicates(storage):
+    user_id = ObjectId()
+    candidates = [ObjectId() for _ in range(3)]
+    DiscoverDeck.push_candidates(user_id, candidates)
+    DiscoverDeck.push_candidates(user_id, candidates[:1])
+    
+    assert DiscoverDeck.pop_candidate(user_id, peek=5) == (candidates[0], 2)
+    assert DiscoverDeck.pop_candidate(user_id) == (candidates[1], 0)
+    assert DiscoverDeck.pop_candidate(user_id) == (candidates[2], 0)
+    assert DiscoverDeck.pop_candidate(user_id) == (None, 0)
+
+
+def test_empty_deck_pops_what_a_concurrent_refill_pushed(storage, monkeypatch):
+    from app.controllers import discover_controller
+    
+    user = make_user('me@example.com')
+    other = make_user('other@example.com')
+    
+    def concurrent_refill(user_id):
+        # Another request's refill pushed the candidate first; this one adds nothing
+        DiscoverDeck.push_candidates(user['_id'], [other['_id']])
+        return 0
+    
+    monkeypatch.setattr(discover_controller, 'refill_deck', concurrent_refill)
+    response, status_code = discover_controller.get_random_user(str(user['_id']))
+    assert status_code == 200
+    assert response['_id'] == other['_id']
+
+
+def test_deck_sample_excludes_seen_users(storage):
+    user = make_user('me@example.com')
+    swiped = make_user('swiped@example.com')
+    matched = make_user('matched@example.com')
+    queued = make_user('queued@example.com')
+    fresh = [make_user(f"fresh{n}@example.com")['_id'] for n in range(3)]
+    SwipeRight.upsert(user['_id'], swiped['_id'])
+    Match.upsert(user['_id'], matched['_id'])
+    DiscoverDeck.push_candidates(user['_id'], [queued['_id']])
+    
+    sampled = DiscoverDeck.sample_candidates(user['_id'], 10)
+    assert sorted(candidate['_id'] for candidate in sampled) == sorted(fresh)
+    assert all(set(candidate) <= {'_id', *User.TASTE_PROJECTION} for candidate in sampled)
+
+
+def test_seeded_stores_sample_the_same_documents():
+    samples = []
+    for _ in range(2):
+        collection = MemoryStorage(seed=42).collection('items')
+        collection.insert_many([{'_id': n} for n in range(100)])
+        samples.append([doc['_id'] for doc in collection.aggregate([{'$match': {'_id': {'$gte': 10}}}, {'$sample': {'size': 5}}])])
+    assert samples[0] == samples[1]
+    assert len(set(samples[0])) == 5 and min(samples[0]) >= 10
+
+
+# Index audit
+
+
+def test_query_shapes_are_valid_queries(storage):
+    from app.utils.db_indexes import MODELS
+    
+    for model in MODELS:
+        for name, query, sort in model.query_shapes():
+            cursor = model.get_collection().find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            assert list(cursor.limit(1)) == [], name
+
+
+def test_explain_reports_the_index_used(storage):
+    from app.utils.db_indexes import audit_query_plans
+    
+    plan = Match.get_collection().find({'$or': [{'user_id_1': ObjectId()}, {'user_id_2': ObjectId()}]}).explain()
+    assert plan['queryPlanner']['winningPlan'] == {'stage': 'FETCH', 'inputStage': {'stage': 'OR', 'inputStages': [
+        {'stage': 'IXSCAN', 'keyPattern': {'user_id_1': 1}},
+        {'stage': 'IXSCAN', 'keyPattern': {'user_id_2': 1}}
+    ]}}
+    plan = User.get_collection().find({'spotify_username': 'me'}).sort('created_at', -1).limit(1).explain()
+    assert plan['queryPlanner']['winningPlan'] == {'stage': 'LIMIT', 'inputStage': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}}}
+    
+    report = {(entry['collection'], entry['query']): entry for entry in audit_query_plans()}
+    assert report[('users', 'find_by_email')]['stages'] == ['LIMIT', 'FETCH', 'IXSCAN']
+    assert not report[('matches', 'find_page_by_user')]['collscan']
+
+
+# Async (ASGI) models read the same store
+
+
+def test_async_models_use_the_memory_store(storage):
+    from app.asgi.models import AsyncMatch, AsyncUser
+    
+    alice = make_user('alice@example.com')
+    Match.bulk_upsert(alice['_id'], [ObjectId() for _ in range(3)])
+    
+    async def read():
+        user = await AsyncUser.find_card_by_id(alice['_id'])
+        users = await AsyncUser.find_by_ids([alice['_id']])
+        page = await AsyncMatch.find_page_by_user(alice['_id'], 2)
+        version = await AsyncMatch.version_for_user(alice['_id'])
+        return user, users, page, version
+    
+    user, users, (page, has_more), (count, _) = asyncio.run(read())
+    assert user['email'] == 'alice@example.com'
+    assert list(users) == [alice['_id']]
+    assert len(page) == 2 and has_more
+    assert count == 3
@@ -0,0 +1,36 @@
+"""
+Prometheus metrics at /metrics
+"""
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain')
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.get_data(as_text=True))
+        for sample in family.samples
+    }
+
+
+def test_requests_are_counted_by_route_template_and_status(storage, client):
+    key = ('http_requests_total', (('method', 'GET'), ('route', '/api/discover/matches'), ('status', '401')))
+    before = scrape(client).get(key, 0)
+    for _ in range(3):
+        assert client.get('/api/discover/matches').status_code == 401
+    
+    samples = scrape(client)
+    assert samples[key] == before + 3
+    assert samples[('http_requests_in_progress', (('method', 'GET'), ('route', '/api/discover/matches')))] == 0
+    # Unknown paths share one label instead of one series per URL
+    client.get('/no/such/path/12345')
+    assert scrape(client)[('http_requests_total', (('method', 'GET'), ('route', 'unmatched'), ('status', '404')))] >= 1
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from bson import ObjectId
+from app.utils import minhash
+from app.utils.minhash import IndexRefresher, MinHashLSHIndex
+
+
+def songs(*names):
+    return {f"song:{name}|artist" for name in names} | {'artist:artist'}
+
+
+USERS = {ObjectId(): songs(*(f"s{n}" for n in range(i, i + 20))) for i in range(0, 200, 5)}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / 'minhash.bin')
+    MinHashLSHIndex.build(USERS.items(), built_at=1000.0).save(path)
+    return path
+
+
+def test_saved_index_is_memory_mapped_with_its_tables(index_path):
+    built = MinHashLSHIndex.build(USERS.items())
+    loaded = MinHashLSHIndex.load(index_path)
+    
+    assert len(loaded) == len(USERS)
+    assert loaded.built_at == 1000.0
+    assert isinstance(loaded._band_keys, np.memmap)
+    for user_id in list(USERS)[:5]:
+        assert np.array_equal(loaded.signature_of(user_id), built.signature_of(user_id))
+        assert loaded.query_user(user_id) == built.query_user(user_id)
+    assert loaded.signature_of(ObjectId()) is None
+
+
+def test_older_index_files_are_rejected(tmp_path):
+    path = tmp_path / 'old.bin'
+    path.write_bytes(b'MHLSH1\x00\x00' + bytes(24))
+    with pytest.raises(ValueError):
+        MinHashLSHIndex.load(str(path))
+
+
+def test_overlay_updates_shadow_the_snapshot_and_survive_save(index_path, tmp_path):
+    index = MinHashLSHIndex.load(index_path)
+    user_id, other_id = list(USERS)[:2]
+    newcomer = ObjectId()
+    
+    index.update(newcomer, USERS[user_id])
+    assert index.query_user(user_id, k=1)[0] == (newcomer, 1.0)
+    index.update(newcomer, set())
+    assert index.signature_of(newcomer) is None
+    # An update older than the one applied is ignored
+    index.update(other_id, set())
+    index.update(other_id, songs('x'), updated_at=datetime.utcnow() - timedelta(days=1))
+    assert index.signature_of(other_id) is None
+    
+    index.update(user_id, songs('new'))
+    path = str(tmp_path / 'saved.bin')
+    index.save(path)
+    saved = MinHashLSHIndex.load(path)
+    assert len(saved) == len(USERS) - 1
+    assert saved.signature_of(other_id) is None
+    assert np.array_equal(saved.signature_of(user_id), minhash.signature(songs('new')))
+
+
+def test_overlay_is_bounded(index_path):
+    index = MinHashLSHIndex.load(index_path, max_overlay=2)
+    first, second, third = list(USERS)[:3]
+    for user_id in (first, second, third):
+        index.update(user_id, songs('new'))
+    
+    assert index.overlay_size == 2
+    # The oldest update is dropped; that user is back to the snapshot signature
+    assert np.array_equal(index.signature_of(first), MinHashLSHIndex.build(USERS.items()).signature_of(first))
+    assert len(index) == len(USERS)
+
+
+def test_refresher_applies_other_workers_updates_and_reloads(index_path, monkeypatch):
+    monkeypatch.setattr(minhash, 'lsh_index', MinHashLSHIndex())
+    minhash.load_index(index_path)
+    user_id = list(USERS)[0]
+    newcomer = ObjectId()
+    updates = [{'user_id': newcomer, 'songs': [{'song_name': 'a', 'artist_name': 'b'}], 'updated_at': datetime.utcnow()}]
+    
+    refresher = IndexRefresher(index_path, lambda since, limit: [p for p in updates if p['updated_at'] > since][:limit])
+    assert refresher.check() == 1
+    assert minhash.get_index().signature_of(newcomer) is not None
+    
+    # A rebuild older than the update keeps it
+    MinHashLSHIndex.build([(user_id, USERS[user_id])], built_at=1000.0).save(index_path)
+    refresher._mtime = None
+    refresher.check()
+    assert len(minhash.get_index()) == 2
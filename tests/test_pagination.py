@@ -0,0 +1,72 @@
+"""
+Keyset cursors of /api/discover/matches
+"""
+import base64
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.controllers.discover_controller import swipe_right
+from app.models import User
+from app.utils.jwt_utils import generate_token
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+def test_cursor_round_trips_at_millisecond_precision():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    doc_id = ObjectId()
+    cursor = encode_cursor(created_at, doc_id)
+    
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (datetime(2024, 5, 1, 12, 30, 15, 123000), doc_id)
+
+
+@pytest.mark.parametrize('cursor', [
+    None,
+    '',
+    'not a cursor!',
+    base64.urlsafe_b64encode(b'123:not-an-object-id').decode(),
+    base64.urlsafe_b64encode(b'abc:' + str(ObjectId()).encode()).decode(),
+    base64.urlsafe_b64encode(b'\xff\xfe:' + str(ObjectId()).encode()).decode(),
+    base64.urlsafe_b64encode(b'1:2:3').decode(),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_pages_cover_every_match_once_and_tampered_cursors_get_400(storage, client):
+    user = User.create({'email': 'me@example.com', 'password': 'hash', 'favorite_genres': ['Rock']})
+    user_id = str(user['_id'])
+    headers = {'Authorization': f"Bearer {generate_token(user_id, user['email'])}"}
+    for n in range(7):
+        other_id = str(User.create({'email': f"u{n}@example.com", 'password': 'hash'})['_id'])
+        swipe_right(user_id, other_id)
+        swipe_right(other_id, user_id)
+    
+    seen = []
+    url = '/api/discover/matches?limit=3'
+    while True:
+        page = client.get(url, headers=headers).get_json()
+        seen.extend(match['match_id'] for match in page['matches'])
+        if not page['has_more']:
+            break
+        url = f"/api/discover/matches?limit=3&cursor={page['next_cursor']}"
+    assert len(seen) == len(set(seen)) == 7
+    
+    first_page = client.get('/api/discover/matches?limit=3', headers=headers).get_json()
+    cursor = first_page['next_cursor']
+    # Edit the decoded ObjectId and re-encode it
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    tampered = base64.urlsafe_b64encode(raw[:-1] + b'z').decode().rstrip('=')
+    for query in (f"cursor={tampered}", f"since={cursor[:-6]}", f"cursor={cursor}&since={cursor}"):
+        response = client.get(f"/api/discover/matches?{query}", headers=headers)
+        assert response.status_code == 400, query
+    
+    # since returns only the matches newer than the sync cursor
+    newest = first_page['sync_cursor']
+    assert client.get(f"/api/discover/matches?since={newest}", headers=headers).get_json()['count'] == 0
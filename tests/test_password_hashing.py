@@ -0,0 +1,74 @@
+"""
+Bounded bcrypt pool and its admission control
+"""
+import threading
+import pytest
+from app.controllers import auth_controller
+from app.models import User
+from app.utils.password_hashing import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(pool_size=1, queue_depth=1, rounds=4, timeout=5, retry_after=7)
+
+
+@pytest.fixture
+def gate():
+    """Event the blocking jobs wait on; set at teardown so the pool drains"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def fill(hasher, gate):
+    """Occupy every running and queued slot of the pool"""
+    return [hasher._submit(gate.wait) for _ in range(2)]
+
+
+def test_hashes_and_checks_passwords(hasher):
+    hashed = hasher.hash_password('secret')
+    assert hasher.check_password('secret', hashed)
+    assert not hasher.check_password('wrong', hashed)
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(1, 0, rounds=5, timeout=5, retry_after=1).needs_rehash(hashed)
+
+
+def test_full_pool_rejects_work_immediately(hasher, gate):
+    jobs = fill(hasher, gate)
+    with pytest.raises(PasswordHasherBusy) as error:
+        hasher.hash_password('secret')
+    assert error.value.retry_after == 7
+    assert not hasher.hash_password_async('secret', lambda new_hash: None)
+    
+    gate.set()
+    for job in jobs:
+        job.result(timeout=5)
+    # Finished jobs give their slots back
+    assert hasher.check_password('secret', hasher.hash_password('secret'))
+
+
+def test_queued_job_past_its_timeout_is_busy(gate):
+    hasher = PasswordHasher(pool_size=1, queue_depth=1, rounds=4, timeout=0.05, retry_after=1)
+    hasher._submit(gate.wait)
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash_password('secret')
+
+
+def test_register_and_login_answer_503_when_the_pool_is_full(storage, client, hasher, gate, monkeypatch):
+    User.create({'email': 'me@example.com', 'password': hasher.hash_password('secret')})
+    monkeypatch.setattr(auth_controller, 'password_hasher', hasher)
+    fill(hasher, gate)
+    
+    for url, email in (('/api/auth/register', 'new@example.com'), ('/api/auth/login', 'me@example.com')):
+        response = client.post(url, json={'email': email, 'password': 'secret'})
+        assert response.status_code == 503, url
+        assert response.headers['Retry-After'] == '7'
+        assert response.get_json()['retry_after'] == 7
+    assert User.find_by_email('new@example.com') is None
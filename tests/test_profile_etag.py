@@ -0,0 +1,38 @@
+"""
+Profile ETags stay correct when another worker (with its own user cache) updates the user
+"""
+import pytest
+from app.controllers.profile_controller import update_user_profile
+from app.models import User
+from app.utils.cache import LRUTTLCache
+from app.utils.jwt_utils import generate_token
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+def test_update_on_another_worker_changes_the_etag_and_body(storage, client, monkeypatch):
+    monkeypatch.setattr(User, 'cache', LRUTTLCache(maxsize=100, ttl=3600))
+    user = User.create({'email': 'me@example.com', 'password': 'hash', 'favorite_genres': ['Rock']})
+    headers = {'Authorization': f"Bearer {generate_token(user['_id'], user['email'])}"}
+    
+    # A full read (login, swipe lookups...) caches the user document on this worker
+    User.find_by_id(user['_id'])
+    first = client.get('/api/profile', headers=headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get('/api/profile', headers={**headers, 'If-None-Match': etag}).status_code == 304
+    
+    # The second worker updates the user through its own cache; this worker's copy is now stale
+    this_worker_cache = User.cache
+    User.set_cache_backend(LRUTTLCache(maxsize=100, ttl=3600))
+    assert update_user_profile(str(user['_id']), {'favorite_genres': ['Jazz']})[1] == 200
+    User.set_cache_backend(this_worker_cache)
+    
+    second = client.get('/api/profile', headers={**headers, 'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    assert second.get_json()['favorite_genres'] == ['Jazz']
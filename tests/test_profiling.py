@@ -0,0 +1,49 @@
+"""
+On-demand request profiling
+"""
+import json
+import os
+import time
+from flask import Flask
+from app.utils.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, RequestProfiler, install_profiler, route_slug
+
+
+def make_app(directory):
+    app = Flask(__name__)
+    install_profiler(app, RequestProfiler(str(directory), token='secret-token', interval=0.001))
+    
+    @app.route('/slow/<int:item_id>')
+    def slow_view(item_id):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {'item_id': item_id}
+    
+    return app
+
+
+def test_only_requests_with_the_token_are_profiled(tmp_path):
+    client = make_app(tmp_path).test_client()
+    assert PROFILE_ID_HEADER not in client.get('/slow/1').headers
+    assert PROFILE_ID_HEADER not in client.get('/slow/1', headers={PROFILE_HEADER: 'wrong'}).headers
+    assert not os.listdir(tmp_path)
+    
+    response = client.get('/slow/1', headers={PROFILE_HEADER: 'secret-token'})
+    profile_id = response.headers[PROFILE_ID_HEADER]
+    route_dir = tmp_path / route_slug('/slow/<int:item_id>')
+    
+    with open(route_dir / f"{profile_id}.json") as f:
+        summary = json.load(f)
+    assert summary['route'] == '/slow/<int:item_id>'
+    assert summary['status'] == 200
+    assert summary['duration_ms'] >= 50
+    assert summary['samples'] > 0
+    stacks = (route_dir / f"{profile_id}.collapsed").read_text().splitlines()
+    assert any('slow_view' in line.rsplit(' ', 1)[0] for line in stacks)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in stacks)
+
+
+def test_route_slugs_are_directory_names():
+    assert route_slug('/api/discover/user') == 'api_discover_user'
+    assert route_slug('/slow/<int:item_id>') == 'slow_int-item_id'
+    assert route_slug('/') == 'root'
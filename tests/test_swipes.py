@@ -0,0 +1,135 @@
+"""
+swipe_right and swipe_right_batch against the in-memory storage backend
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from app.controllers.discover_controller import swipe_right, swipe_right_batch
+from app.models import Match, SwipeRight, User
+
+
+def make_user(email):
+    return User.create({'email': email, 'password': 'hash', 'favorite_genres': ['Rock']})
+
+
+def test_swiping_yourself_is_rejected_in_any_case(storage):
+    user_id = str(make_user('me@example.com')['_id'])
+    
+    for own_id in (user_id, user_id.upper()):
+        assert swipe_right(user_id, own_id)[1] == 400
+        response, status_code = swipe_right_batch(user_id, [{'user_id': own_id}])
+        assert status_code == 200
+        assert response['results'][0]['error'] == 'Cannot swipe right on yourself'
+    
+    assert SwipeRight.get_collection().count_documents({}) == 0
+    assert Match.get_collection().count_documents({}) == 0
+
+
+class CommandCounter:
+    """Count the collection calls (database round trips) each thread makes"""
+    
+    def __init__(self, storage):
+        self.local = threading.local()
+        self._collection = storage.collection
+    
+    @property
+    def count(self):
+        return getattr(self.local, 'count', 0)
+    
+    def reset(self):
+        self.local.count = 0
+    
+    def collection(self, name):
+        collection = self._collection(name)
+        counter = self
+        
+        class Counted:
+            def __getattr__(self, attr):
+                value = getattr(collection, attr)
+                if not callable(value):
+                    return value
+                
+                def counted(*args, **kwargs):
+                    counter.local.count = counter.count + 1
+                    return value(*args, **kwargs)
+                return counted
+        
+        return Counted()
+
+
+def test_concurrent_mutual_swipes_make_exactly_one_match(storage, monkeypatch):
+    pairs = [
+        (str(make_user(f"a{n}@example.com")['_id']), str(make_user(f"b{n}@example.com")['_id']))
+        for n in range(50)
+    ]
+    User.find_existing_ids([user_id for pair in pairs for user_id in pair])
+    counter = CommandCounter(storage)
+    monkeypatch.setattr(storage, 'collection', counter.collection)
+    
+    def swipe(current_user_id, swiped_user_id, barrier):
+        barrier.wait()
+        counter.reset()
+        response, status_code = swipe_right(current_user_id, swiped_user_id)
+        return response, status_code, counter.count
+    
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = []
+        for first, second in pairs:
+            # Release both sides of a pair at the same moment
+            barrier = threading.Barrier(2)
+            futures.append((executor.submit(swipe, first, second, barrier), executor.submit(swipe, second, first, barrier)))
+        results = [(a.result(), b.result()) for a, b in futures]
+    
+    for sides in results:
+        assert all(status_code in (200, 201) for _, status_code, _ in sides)
+        assert sum(bool(response.get('is_new_match')) for response, _, _ in sides) == 1
+        for response, _, commands in sides:
+            # Swipe upsert and reciprocal pop, plus the match upsert and swipe cleanup on a matching side
+            assert commands == (4 if 'match' in response else 2), (response, commands)
+    
+    assert Match.get_collection().count_documents({}) == len(pairs)
+    assert SwipeRight.get_collection().count_documents({}) == 0
+
+
+def test_known_users_cost_no_existence_round_trip(storage, monkeypatch):
+    first, second, third = (str(make_user(f"u{n}@example.com")['_id']) for n in range(3))
+    counter = CommandCounter(storage)
+    monkeypatch.setattr(storage, 'collection', counter.collection)
+    
+    counter.reset()
+    swipe_right(first, second)
+    assert counter.count == 3
+    # Both users are now known to exist: only the swipe upsert and the reciprocal pop remain
+    counter.reset()
+    swipe_right(second, third)
+    assert counter.count == 3
+    counter.reset()
+    swipe_right(first, third)
+    assert counter.count == 2
+
+
+def test_batch_reports_each_swipe_and_matches_reciprocal_ones(storage, monkeypatch):
+    me, liked_me, stranger = (str(make_user(f"batch{n}@example.com")['_id']) for n in range(3))
+    swipe_right(liked_me, me)
+    missing = str(ObjectId())
+    counter = CommandCounter(storage)
+    monkeypatch.setattr(storage, 'collection', counter.collection)
+    
+    counter.reset()
+    response, status_code = swipe_right_batch(me, [
+        {'user_id': liked_me}, {'user_id': stranger}, {'user_id': stranger}, {'user_id': missing}, {'user_id': 'bad'}, {}
+    ])
+    assert status_code == 200
+    assert [result['status_code'] for result in response['results']] == [201, 201, 400, 404, 400, 400]
+    assert response['results'][0]['is_new_match']
+    assert response['results'][2]['error'] == 'Duplicate swipe in batch'
+    assert [match['_id'] for match in response['new_matches']] == [response['results'][0]['match']['_id']]
+    # Existence check, bulk swipe upsert, reciprocal lookup, match upsert and swipe cleanup
+    assert counter.count <= 5
+    
+    # Replaying a recorded swipe is idempotent
+    response, _ = swipe_right_batch(me, [{'user_id': stranger}])
+    assert response['results'][0]['status_code'] == 200
+    assert response['new_matches'] == []
+    assert Match.get_collection().count_documents({}) == 1
+    assert SwipeRight.get_collection().count_documents({}) == 1
@@ -0,0 +1,65 @@
+"""
+Verified-token cache of require_auth
+"""
+import time
+import jwt
+import pytest
+from app.config import Config
+from app.utils import jwt_utils
+from app.utils.cache import LRUTTLCache
+from app.utils.jwt_utils import clear_token_cache, decode_token_cached, generate_token, token_cache_stats
+
+
+@pytest.fixture(autouse=True)
+def token_cache(monkeypatch):
+    cache = LRUTTLCache(maxsize=100, ttl=300)
+    monkeypatch.setattr(jwt_utils, '_token_cache', cache)
+    monkeypatch.setattr(Config, 'TOKEN_CACHE_ENABLED', True)
+    return cache
+
+
+def token_expiring_in(seconds):
+    payload = {'user_id': 'user', 'email': 'me@example.com', 'exp': int(time.time() + seconds), 'iat': int(time.time())}
+    return jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm=Config.JWT_ALGORITHM)
+
+
+def test_verified_tokens_are_reused():
+    token = generate_token('user', 'me@example.com')
+    before = token_cache_stats()['verifications']
+    
+    assert decode_token_cached(token)['user_id'] == 'user'
+    assert decode_token_cached(token)['user_id'] == 'user'
+    assert token_cache_stats()['verifications'] == before + 1
+
+
+def test_cached_entries_expire_with_the_token(token_cache):
+    token = token_expiring_in(10)
+    assert decode_token_cached(token)
+    
+    (_, expires_at), = token_cache._data.values()
+    # Capped by the exp claim, not the 300s cache TTL
+    assert expires_at - time.monotonic() <= 10
+    
+    assert decode_token_cached(token_expiring_in(-10)) is None
+    assert len(token_cache._data) == 1
+
+
+def test_expired_cache_entries_are_verified_again(token_cache, monkeypatch):
+    token = generate_token('user', 'me@example.com')
+    assert decode_token_cached(token)
+    before = token_cache_stats()['verifications']
+    
+    monkeypatch.setattr(time, 'monotonic', lambda now=time.monotonic(): now + 301)
+    assert decode_token_cached(token)
+    assert token_cache_stats()['verifications'] == before + 1
+
+
+def test_clearing_the_cache_applies_a_rotated_secret(monkeypatch):
+    token = generate_token('user', 'me@example.com')
+    assert decode_token_cached(token)
+    
+    monkeypatch.setattr(Config, 'JWT_SECRET_KEY', 'rotated-secret')
+    # Still trusted from the cache until it is cleared
+    assert decode_token_cached(token)
+    clear_token_cache()
+    assert decode_token_cached(token) is None